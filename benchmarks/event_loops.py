@@ -0,0 +1,108 @@
+"""
+Compares per-packet latency and CPU usage of the background receive loop for the
+stock asyncio loop and uvloop (when installed).
+
+A stub Motive server runs in a separate process, answers the connection request and
+streams NatNet 4.1 frames that carry their send time on `stamp_transmit`.
+
+Usage:
+    python benchmarks/event_loops.py [--rate 240] [--seconds 5] [--rigid-bodies 20]
+"""
+
+import argparse
+import multiprocessing
+import socket
+import statistics
+import struct
+import time
+
+from natnet_client.client import NatNetClient
+from natnet_client.loops import uvloop_available, uvloop_factory
+from natnet_client.natnet_params import NatNetParams
+
+
+def pack_frame(frame_number: int, num_rigid_bodies: int, stamp: int) -> bytes:
+    body = struct.pack("<i", frame_number)
+    body += struct.pack("<ii", 0, 0) * 2  # Marker sets and legacy markers
+    body += struct.pack("<ii", num_rigid_bodies, 0)
+    for identifier in range(num_rigid_bodies):
+        body += struct.pack(
+            "<i3f4ffh", identifier, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0, 1.0, 0.0, 1
+        )
+    body += struct.pack("<ii", 0, 0) * 5  # Skeletons to devices
+    body += struct.pack("<iid", 0, 0, 0.0) + struct.pack("<qqq", 0, 0, stamp)
+    body += struct.pack("<iih", 0, 0, 0)
+    return struct.pack("<hh", 7, len(body)) + body
+
+
+def server_info() -> bytes:
+    body = b"Benchmark".ljust(256, b"\0") + bytes((1, 0, 0, 0, 4, 1, 0, 0))
+    return struct.pack("<hh", 1, len(body)) + body
+
+
+def stub_server(port: int, rate: float, seconds: float, num_rigid_bodies: int) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", port))
+    _, client = sock.recvfrom(1024)
+    sock.sendto(server_info(), client)
+    period = 1 / rate
+    start = time.perf_counter()
+    for frame_number in range(int(rate * seconds)):
+        while time.perf_counter() < start + frame_number * period:
+            pass
+        frame = pack_frame(frame_number, num_rigid_bodies, time.perf_counter_ns())
+        sock.sendto(frame, client)
+    sock.close()
+
+
+def run(name: str, params: NatNetParams, args: argparse.Namespace) -> None:
+    server = multiprocessing.Process(
+        target=stub_server,
+        args=(params.command_port, args.rate, args.seconds, args.rigid_bodies),
+    )
+    server.start()
+    time.sleep(0.2)
+    client = NatNetClient(params)
+    latencies = []
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    if not client.connect(2):
+        raise RuntimeError("Stub server did not answer")
+    for frame in client.mocap(timeout=1):
+        latencies.append(time.perf_counter_ns() - frame.suffix_data.stamp_transmit)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    client.shutdown()
+    server.join()
+    latencies.sort()
+    print(
+        f"{name:>8}: {len(latencies)} frames, "
+        f"latency p50 {latencies[len(latencies) // 2] / 1e3:.1f} us, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] / 1e3:.1f} us, "
+        f"mean {statistics.fmean(latencies) / 1e3:.1f} us, "
+        f"CPU {100 * cpu / wall:.1f} %"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rate", type=float, default=240.0)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rigid-bodies", type=int, default=20)
+    parser.add_argument("--port", type=int, default=15100)
+    args = parser.parse_args()
+    params = NatNetParams(use_multicast=False, command_port=args.port)
+    run("asyncio", params, args)
+    if uvloop_available():
+        params = NatNetParams(
+            use_multicast=False,
+            command_port=args.port,
+            event_loop_factory=uvloop_factory(),
+        )
+        run("uvloop", params, args)
+    else:
+        print("uvloop not installed, skipping")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Measures the throughput of the whole client pipeline by replaying a capture file
+as fast as possible. Without a capture a synthetic one is generated.
+
+Usage:
+    python benchmarks/replay_throughput.py [--capture session.nncap] [--frames 20000] [--rigid-bodies 20] [--metrics]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from event_loops import pack_frame, server_info
+
+from natnet_client.capture import CaptureSource, CaptureWriter
+from natnet_client.client import NatNetClient
+from natnet_client.natnet_params import NatNetParams
+from natnet_client.replay import CaptureReplay
+
+
+def synthetic_capture(path: str, frames: int, num_rigid_bodies: int) -> None:
+    with CaptureWriter(path) as capture:
+        timestamp = time.monotonic_ns()
+        capture.record(server_info(), timestamp, CaptureSource.SYNTHETIC)
+        for frame_number in range(frames):
+            timestamp += 1_000_000_000 // 240
+            capture.record(
+                pack_frame(frame_number, num_rigid_bodies, timestamp), timestamp
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--capture")
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--rigid-bodies", type=int, default=20)
+    parser.add_argument("--metrics", action="store_true")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.capture
+        if path is None:
+            path = os.path.join(directory, "synthetic.nncap")
+            synthetic_capture(path, args.frames, args.rigid_bodies)
+        client = NatNetClient(NatNetParams(enable_metrics=args.metrics))
+        stats = CaptureReplay(client, path, speed=None).run()
+    print(
+        f"{stats.frames} frames in {stats.elapsed:.2f} s: "
+        f"{stats.frames_per_second:.0f} frames/s, "
+        f"{stats.packets_per_second:.0f} packets/s"
+    )
+    if client.metrics is not None:
+        for name, timing in client.metrics.snapshot()["timings"].items():
+            print(f"{name:>28}: mean {timing['mean_ns'] / 1e3:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
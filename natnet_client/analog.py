@@ -0,0 +1,310 @@
+"""
+Continuous sample streams of the force plates and devices, requires numpy.
+
+Every mocap frame carries a few analog sub-samples per channel. `AnalogStreams`
+appends them to one ring per force plate and device, each channel a contiguous row,
+and gives every sub-sample its own timestamp spread over the frame period. Like
+`natnet_client.history` the rings are stored twice, so windows are contiguous, and
+they are copied under the lock of the ring since frames are appended on the client
+receive thread.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import ClassVar, Dict, List, Tuple
+
+try:
+    import numpy
+except ImportError as error:
+    raise ImportError(
+        "Analog streams require numpy, `pip install new-natnet-client[numpy]`"
+    ) from error
+
+from natnet_client.clock_sync import FrameTiming
+from natnet_client.client import NatNetClient
+from natnet_client.descriptors import MoCapDescription
+from natnet_client.mo_cap_data import Channel
+
+
+@dataclass(frozen=True)
+class AnalogSamples:
+    """Consecutive samples, oldest first, `values[c]` is channel `c`"""
+
+    timestamp_ns: numpy.ndarray
+    frame_number: numpy.ndarray
+    values: numpy.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp_ns)
+
+    def gaps(self) -> numpy.ndarray:
+        """Indices of the samples that follow missing frames or a restart of the frame numbers"""
+        steps = numpy.diff(self.frame_number)
+        return numpy.flatnonzero((steps > 1) | (steps < 0)) + 1
+
+
+@dataclass
+class AnalogBuffer:
+    """
+    Ring of the samples of one force plate or device
+
+    Args:
+        channels: (int). Channels of the force plate or device
+        capacity: (int, optional). Samples kept per channel. Defaults to 65536
+    """
+
+    channels: int
+    capacity: int = 65536
+
+    missed_frames: int = field(init=False, default=0)
+    _lock: threading.Lock = field(
+        init=False, default_factory=threading.Lock, repr=False
+    )
+    _count: int = field(init=False, default=0)
+    _last_frame_number: int | None = field(init=False, default=None)
+    _timestamps: numpy.ndarray = field(init=False, repr=False)
+    _frame_numbers: numpy.ndarray = field(init=False, repr=False)
+    _values: numpy.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.capacity <= 0:
+            raise ValueError("The capacity must be positive")
+        self._timestamps = numpy.zeros(2 * self.capacity, dtype=numpy.int64)
+        self._frame_numbers = numpy.zeros(2 * self.capacity, dtype=numpy.int32)
+        self._values = numpy.zeros((self.channels, 2 * self.capacity))
+
+    @property
+    def count(self) -> int:
+        """Samples appended since the creation of the buffer"""
+        return self._count
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def append(
+        self, timestamps_ns: numpy.ndarray, frame_number: int, values: numpy.ndarray
+    ) -> None:
+        """Appends the (channels, samples) `values` of one frame"""
+        # Only the newest samples fit when a frame brings more than the capacity
+        timestamps_ns = timestamps_ns[-self.capacity :]
+        values = values[:, -self.capacity :]
+        with self._lock:
+            if (
+                self._last_frame_number is not None
+                and frame_number > self._last_frame_number
+            ):
+                self.missed_frames += max(frame_number - self._last_frame_number - 1, 0)
+            self._last_frame_number = frame_number
+            slots = (self._count + numpy.arange(len(timestamps_ns))) % self.capacity
+            for slot in (slots, slots + self.capacity):
+                self._timestamps[slot] = timestamps_ns
+                self._frame_numbers[slot] = frame_number
+                self._values[:, slot] = values
+            self._count += len(timestamps_ns)
+
+    def _span(self, start: int, stop: int) -> AnalogSamples:
+        """Copies of the kept samples `start` to `stop`, oldest first, with the lock held"""
+        base = self._count % self.capacity + self.capacity - len(self)
+        span = slice(base + start, base + stop)
+        return AnalogSamples(
+            self._timestamps[span].copy(),
+            self._frame_numbers[span].copy(),
+            self._values[:, span].copy(),
+        )
+
+    def last(self, n: int | None = None) -> AnalogSamples:
+        """Copies of the last `n` samples, every kept sample if `n` is None"""
+        with self._lock:
+            kept = len(self)
+            n = kept if n is None else min(max(n, 0), kept)
+            return self._span(kept - n, kept)
+
+    def window(self, start_ns: int, end_ns: int) -> AnalogSamples:
+        """Copies of the samples with `start_ns <= timestamp < end_ns`"""
+        with self._lock:
+            end = self._count % self.capacity + self.capacity
+            timestamps_ns = self._timestamps[end - len(self) : end]
+            start, stop = numpy.searchsorted(timestamps_ns, (start_ns, end_ns))
+            return self._span(int(start), int(stop))
+
+
+@dataclass
+class AnalogStreams:
+    """
+    Args:
+        capacity: (int, optional). Samples kept per channel of every force plate and device. Defaults to 65536
+        frame_rate: (float | None, optional). Mocap frame rate in Hz, estimated from the frame timestamps when None. Defaults to None
+        reset_window: (int, optional). Frame numbers further back than that restart the stream, e.g. a looping playback, closer ones are late or duplicated frames and dropped. Defaults to 4, network reordering is shallower
+
+    Frames are timed with their Motive timestamp unless `add` is given another time,
+    the sub-samples of a frame follow it at equal steps over one frame period. Until
+    the period is estimated, the sub-samples of the first frame share its time.
+    After a restart the period is estimated again, and timestamps that would go back
+    are shifted to continue after the last sample, so the rings stay sorted by time.
+
+    Example:
+        >>> streams = AnalogStreams(frame_rate=240.0)
+        >>> streams.attach(client)
+        >>> samples = streams.force_plate(1).window(start_ns, end_ns)
+        >>> fz = samples.values[2]
+    """
+
+    capacity: int = 65536
+    frame_rate: float | None = None
+    reset_window: int = 4
+    # Smoothing of the estimated frame period
+    period_smoothing: ClassVar[float] = 0.05
+
+    # Restarts of the frame numbers, and late or duplicated frames dropped
+    resets: int = field(init=False, default=0)
+    late_frames: int = field(init=False, default=0)
+    _force_plates: Dict[int, AnalogBuffer] = field(init=False, default_factory=dict)
+    _devices: Dict[int, AnalogBuffer] = field(init=False, default_factory=dict)
+    _period_ns: float | None = field(init=False, default=None)
+    # The period of a new segment replaces the estimate instead of updating it
+    _new_segment: bool = field(init=False, default=True)
+    # Added to the frame times since the last restart that went back in time
+    _offset_ns: int = field(init=False, default=0)
+    _last_frame: Tuple[int, int] | None = field(init=False, default=None)
+    _clients: List[NatNetClient] = field(init=False, default_factory=list)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self) -> None:
+        if self.frame_rate is not None:
+            self._period_ns = 1e9 / self.frame_rate
+
+    @property
+    def period_ns(self) -> float | None:
+        """Mocap frame period, given or estimated"""
+        return self._period_ns
+
+    def _update_period(self, frame_number: int, timestamp_ns: int) -> None:
+        if self.frame_rate is None and self._last_frame is not None:
+            last_frame_number, last_timestamp_ns = self._last_frame
+            frames = frame_number - last_frame_number
+            if frames > 0 and timestamp_ns > last_timestamp_ns:
+                period_ns = (timestamp_ns - last_timestamp_ns) / frames
+                if self._period_ns is None or self._new_segment:
+                    self._period_ns = period_ns
+                    self._new_segment = False
+                else:
+                    self._period_ns += self.period_smoothing * (
+                        period_ns - self._period_ns
+                    )
+        self._last_frame = (frame_number, timestamp_ns)
+
+    def _append(
+        self,
+        buffers: Dict[int, AnalogBuffer],
+        identifier: int,
+        channels: Tuple[Channel, ...],
+        frame_number: int,
+        timestamp_ns: int,
+    ) -> None:
+        samples = max((channel.num_frames for channel in channels), default=0)
+        if not samples:
+            return
+        buffer = buffers.get(identifier)
+        if buffer is None or buffer.channels != len(channels):
+            buffer = buffers[identifier] = AnalogBuffer(len(channels), self.capacity)
+        values = numpy.full((len(channels), samples), numpy.nan)
+        for row, channel in zip(values, channels):
+            row[: len(channel.frames)] = channel.frames
+        step_ns = (self._period_ns or 0.0) / samples
+        timestamps_ns = timestamp_ns + numpy.round(
+            numpy.arange(samples) * step_ns
+        ).astype(numpy.int64)
+        buffer.append(timestamps_ns, frame_number, values)
+
+    def add(self, frame: MoCapDescription, timestamp_ns: int | None = None) -> None:
+        """Appends the sub-samples of every force plate and device of `frame`"""
+        if timestamp_ns is None:
+            timestamp_ns = round(frame.suffix_data.timestamp * 1e9)
+        frame_number = frame.prefix_data.frame_number
+        with self._lock:
+            if self._last_frame is not None and frame_number <= self._last_frame[0]:
+                if self._last_frame[0] - frame_number <= self.reset_window:
+                    # Duplicated or out of order frame, the rings only grow forward
+                    self.late_frames += 1
+                    return
+                self._restart(timestamp_ns)
+            timestamp_ns += self._offset_ns
+            self._update_period(frame_number, timestamp_ns)
+            for force_plate in frame.force_plate_data.force_plates:
+                self._append(
+                    self._force_plates,
+                    force_plate.identifier,
+                    force_plate.channels,
+                    frame_number,
+                    timestamp_ns,
+                )
+            for device in frame.device_data.devices:
+                self._append(
+                    self._devices,
+                    device.identifier,
+                    device.channels,
+                    frame_number,
+                    timestamp_ns,
+                )
+
+    def _restart(self, timestamp_ns: int) -> None:
+        """Starts a new segment after the frame numbers went back"""
+        _, last_timestamp_ns = self._last_frame  # type: ignore
+        step_ns = round(self._period_ns or 0.0)
+        if timestamp_ns + self._offset_ns <= last_timestamp_ns:
+            self._offset_ns = last_timestamp_ns + step_ns - timestamp_ns
+        self.resets += 1
+        self._last_frame = None
+        self._new_segment = True
+        for buffer in (*self._force_plates.values(), *self._devices.values()):
+            buffer._last_frame_number = None
+
+    def _on_frame(self, frame: MoCapDescription, timing: FrameTiming) -> None:
+        self.add(frame)
+
+    def attach(self, client: NatNetClient) -> None:
+        """Records the samples of every frame decoded by `client` until `detach`"""
+        client.add_frame_listener(self._on_frame)
+        self._clients.append(client)
+
+    def detach(self, client: NatNetClient) -> None:
+        client.remove_frame_listener(self._on_frame)
+        self._clients.remove(client)
+
+    @property
+    def force_plates(self) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._force_plates)
+
+    @property
+    def devices(self) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._devices)
+
+    def force_plate(self, identifier: int) -> AnalogBuffer:
+        """
+        Raises:
+            KeyError. If no sample of the force plate arrived
+        """
+        return self._force_plates[identifier]
+
+    def device(self, identifier: int) -> AnalogBuffer:
+        """
+        Raises:
+            KeyError. If no sample of the device arrived
+        """
+        return self._devices[identifier]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._force_plates.clear()
+            self._devices.clear()
+            self._last_frame = None
+            self._offset_ns = 0
+            self._new_segment = True
+            self.resets = 0
+            self.late_frames = 0
+            if self.frame_rate is None:
+                self._period_ns = None
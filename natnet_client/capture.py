@@ -0,0 +1,529 @@
+"""
+Append only capture files of raw NatNet datagrams.
+
+Capture file:
+    CAPTURE_MAGIC, CAPTURE_HEADER (wall clock ns, monotonic ns at creation) and then
+    one RECORD_HEADER (length, monotonic receive ns, message id, source) followed by
+    the datagram, as received, per packet.
+
+Index file, `<capture>.idx`:
+    INDEX_MAGIC and one INDEX_ENTRY (message id, frame number, monotonic receive ns,
+    capture file offset of the record) per packet. Frame number is 0 for messages
+    other than FRAME_OF_DATA.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import BinaryIO, ClassVar, Generator, List, Tuple
+
+from natnet_client import unpackers
+from natnet_client.descriptors import Descriptors, MoCapDescription
+from natnet_client.enums import NatMessages
+from natnet_client.transforms import CoordinateTransform
+
+CAPTURE_MAGIC = b"NNCAP\x00\x01\x00"
+CAPTURE_HEADER = struct.Struct("<qq")
+RECORD_HEADER = struct.Struct("<IqhB")
+INDEX_MAGIC = b"NNIDX\x00\x01\x00"
+INDEX_ENTRY = struct.Struct("<hiqQ")
+# Frames this far behind the last one before a bitstream change keep the previous
+# layout, as `FrameSequenceTracker.window`
+LATE_FRAMES = 64
+
+
+class CaptureSource(IntEnum):
+    DATA = 0
+    COMMAND = 1
+    # Written by the client when a capture starts, e.g. the current ServerInfo
+    SYNTHETIC = 2
+
+
+def index_path(path: str | os.PathLike[str]) -> str:
+    return os.fspath(path) + ".idx"
+
+
+@dataclass(frozen=True, slots=True)
+class CaptureRecord:
+    offset: int
+    timestamp_ns: int
+    source: CaptureSource
+    message_id: int
+    data: bytes
+
+
+@dataclass(frozen=True, slots=True)
+class IndexEntry:
+    message_id: int
+    frame_number: int
+    timestamp_ns: int
+    offset: int
+
+
+@dataclass
+class CaptureWriter:
+    """
+    Writes every recorded datagram from a background thread, `record` only enqueues
+    the packet so the receive path never waits on the disk.
+
+    Args:
+        path: (str | os.PathLike). Capture file, created or truncated
+        flush_interval: (float, optional). Maximum seconds between flushes to disk. Defaults to 0.5
+        flush_bytes: (int, optional). Bytes written before a flush, even if `flush_interval` did not elapse. Defaults to 4 MiB
+
+    Records that arrive once `close` started are not written, they are counted in
+    `dropped_records`.
+    """
+
+    logger: ClassVar[logging.Logger] = logging.getLogger("NatNet-Capture")
+
+    path: str | os.PathLike[str]
+    flush_interval: float = 0.5
+    flush_bytes: int = 4 * 1024 * 1024
+
+    _queue: queue.SimpleQueue[Tuple[bytes, int, int] | None] = field(
+        init=False, default_factory=queue.SimpleQueue
+    )
+    _thread: threading.Thread | None = field(init=False, default=None)
+    _records: int = field(init=False, default=0)
+    _dropped: int = field(init=False, default=0)
+    _bytes: int = field(init=False, default=0)
+    # Set from `start` until `close`, checked with the sentinel put under `_lock`
+    _accepting: bool = field(init=False, default=False)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def records(self) -> int:
+        """Records written to disk so far"""
+        return self._records
+
+    @property
+    def dropped_records(self) -> int:
+        """Records received after `close` started, not written"""
+        return self._dropped
+
+    def start(self) -> None:
+        if self._thread is not None:
+            raise RuntimeError("The capture is already running")
+        capture = open(self.path, "wb", buffering=1024 * 1024)
+        index = open(index_path(self.path), "wb", buffering=256 * 1024)
+        capture.write(CAPTURE_MAGIC)
+        capture.write(CAPTURE_HEADER.pack(time.time_ns(), time.monotonic_ns()))
+        index.write(INDEX_MAGIC)
+        self._bytes = len(CAPTURE_MAGIC) + CAPTURE_HEADER.size
+        self._records = 0
+        self._accepting = True
+        self._thread = threading.Thread(
+            target=self._writer, args=(capture, index), name="NatNet-Capture"
+        )
+        self._thread.start()
+        self.logger.info("Capturing to %s", self.path)
+
+    def record(
+        self,
+        data: bytes,
+        timestamp_ns: int,
+        source: CaptureSource = CaptureSource.DATA,
+    ) -> None:
+        """Queues a datagram, including its message id and size header"""
+        with self._lock:
+            if self._accepting:
+                self._queue.put((data, timestamp_ns, source))
+            else:
+                self._dropped += 1
+
+    def _write_batch(
+        self,
+        batch: List[Tuple[bytes, int, int]],
+        capture: BinaryIO,
+        index: BinaryIO,
+    ) -> None:
+        frame_of_data = NatMessages.FRAME_OF_DATA.value
+        for data, timestamp_ns, source in batch:
+            message_id = int.from_bytes(data[:2], byteorder="little", signed=True)
+            frame_number = 0
+            if message_id == frame_of_data:
+                frame_number = int.from_bytes(
+                    data[4:8], byteorder="little", signed=True
+                )
+            index.write(
+                INDEX_ENTRY.pack(message_id, frame_number, timestamp_ns, self._bytes)
+            )
+            capture.write(
+                RECORD_HEADER.pack(len(data), timestamp_ns, message_id, source)
+            )
+            capture.write(data)
+            self._bytes += RECORD_HEADER.size + len(data)
+        self._records += len(batch)
+
+    def _writer(self, capture: BinaryIO, index: BinaryIO) -> None:
+        running = True
+        unflushed = 0
+        flushed_at = time.monotonic()
+        try:
+            while running:
+                # Sleep until the next flush is due, or forever when nothing waits
+                timeout = None
+                if unflushed:
+                    timeout = max(
+                        self.flush_interval - (time.monotonic() - flushed_at), 0.0
+                    )
+                batch: List[Tuple[bytes, int, int]] = []
+                try:
+                    item = self._queue.get(timeout=timeout)
+                    while item is not None:
+                        batch.append(item)
+                        item = self._queue.get_nowait()
+                    running = False
+                except queue.Empty:
+                    pass
+                if batch:
+                    written = self._bytes
+                    self._write_batch(batch, capture, index)
+                    unflushed += self._bytes - written
+                if unflushed and (
+                    unflushed >= self.flush_bytes
+                    or time.monotonic() - flushed_at >= self.flush_interval
+                ):
+                    capture.flush()
+                    index.flush()
+                    unflushed = 0
+                    flushed_at = time.monotonic()
+        finally:
+            capture.close()
+            index.close()
+
+    def close(self) -> None:
+        """Writes every queued record and closes the files"""
+        if self._thread is None:
+            raise RuntimeError("The capture is not running")
+        with self._lock:
+            self._accepting = False
+            self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self.logger.info("Capture %s closed, %i records", self.path, self._records)
+
+    def __enter__(self) -> CaptureWriter:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def read_capture_header(file: BinaryIO) -> Tuple[int, int]:
+    """
+    Returns:
+        Tuple[int, int]: Wall clock and monotonic ns when the capture was created
+    Raises:
+        ValueError. If the file is not a capture
+    """
+    if file.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+        raise ValueError("Not a NatNet capture file")
+    return CAPTURE_HEADER.unpack(file.read(CAPTURE_HEADER.size))
+
+
+def iter_capture(
+    path: str | os.PathLike[str],
+) -> Generator[CaptureRecord, None, None]:
+    """Reads every record of a capture file sequentially"""
+    with open(path, "rb", buffering=1024 * 1024) as file:
+        read_capture_header(file)
+        offset = len(CAPTURE_MAGIC) + CAPTURE_HEADER.size
+        while len(header := file.read(RECORD_HEADER.size)) == RECORD_HEADER.size:
+            length, timestamp_ns, message_id, source = RECORD_HEADER.unpack(header)
+            data = file.read(length)
+            if len(data) < length:
+                # Truncated last record, e.g. the process died while writing
+                break
+            yield CaptureRecord(
+                offset, timestamp_ns, CaptureSource(source), message_id, data
+            )
+            offset += RECORD_HEADER.size + length
+
+
+def read_index(path: str | os.PathLike[str]) -> List[IndexEntry]:
+    """Reads the index of a capture file, `path` is the capture file itself"""
+    with open(index_path(path), "rb") as file:
+        if file.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+            raise ValueError("Not a NatNet capture index")
+        data = file.read()
+    usable = len(data) - len(data) % INDEX_ENTRY.size
+    return [IndexEntry(*entry) for entry in INDEX_ENTRY.iter_unpack(data[:usable])]
+
+
+@dataclass(frozen=True)
+class _FrameColumn:
+    """One field of the frame entries of a mapped index, read on access for bisect"""
+
+    capture: MappedCapture
+    column: int
+
+    def __len__(self) -> int:
+        return len(self.capture)
+
+    def __getitem__(self, index: int) -> int:
+        return self.capture._entry(index)[self.column]
+
+
+@dataclass
+class MappedCapture:
+    """
+    Random access to the frames of a capture file, the file and its index are memory
+    mapped and frames are only decoded when requested.
+
+    Only the index row, frame number key and layout of every frame are kept in
+    memory, 13 bytes per frame. Seeking by timestamp is a binary search over the
+    index, by frame number a binary search over the keys sorted when the capture is
+    opened, and by SMPTE timecode a binary search that decodes O(log n) frames, since
+    timecodes are not part of the index.
+    Frames are decoded with the layout of the last ServerInfo or bitstream change
+    recorded before them, except late frames numbered up to the last frame received
+    before the change, which were sent with the previous layout.
+
+    Args:
+        path: (str | os.PathLike). Capture file, its index must be next to it
+        coordinate_transform: (CoordinateTransform | None, optional). Frame and units frames are decoded in. Defaults to None, as recorded
+
+    Example:
+        >>> with MappedCapture("session.nncap") as capture:
+        >>>     frame = capture.frame(120_000)
+        >>>     for frame in capture.frames(capture.index_at_time(t0), capture.index_at_time(t1)):
+        >>>         ...
+    """
+
+    path: str | os.PathLike[str]
+    coordinate_transform: CoordinateTransform | None = None
+
+    _file: BinaryIO = field(init=False, repr=False)
+    _map: mmap.mmap = field(init=False, repr=False)
+    _index_file: BinaryIO = field(init=False, repr=False)
+    _index_map: mmap.mmap = field(init=False, repr=False)
+    # Index row of every frame
+    _rows: array[int] = field(init=False, repr=False)
+    # Frame number * 2**32 + index of every frame, sorted, for seeks by frame number
+    _frame_keys: array[int] = field(init=False, repr=False)
+    # Layouts recorded in the capture, and the one of every frame
+    _layouts: List[type[unpackers.DataUnpackerV3_0]] = field(init=False, repr=False)
+    _frame_layouts: array[int] = field(init=False, repr=False)
+    _last_layout: int = field(init=False, default=0, repr=False)
+    _model_def_offset: int | None = field(init=False, default=None)
+    _descriptors: Descriptors | None = field(init=False, default=None)
+
+    def __post_init__(self) -> None:
+        self._file = open(self.path, "rb")
+        read_capture_header(self._file)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index_file = open(index_path(self.path), "rb")
+        if self._index_file.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+            raise ValueError("Not a NatNet capture index")
+        self._index_map = mmap.mmap(
+            self._index_file.fileno(), 0, access=mmap.ACCESS_READ
+        )
+        self._rows = array("I")
+        self._frame_keys = array("q")
+        self._layouts = []
+        self._frame_layouts = array("B")
+        frame_of_data = NatMessages.FRAME_OF_DATA.value
+        server_info = NatMessages.SERVER_INFO.value
+        response = NatMessages.RESPONSE.value
+        model_def = NatMessages.MODEL_DEF.value
+        entries = memoryview(self._index_map)[len(INDEX_MAGIC) :]
+        usable = len(entries) - len(entries) % INDEX_ENTRY.size
+        ordered = True
+        last_frame_number = None
+        # Layout of the frames sent before the last change, and the last frame
+        # number received before it
+        layout = sent_layout = 0
+        previous = None
+        switch_frame_number = 0
+        try:
+            # Entries are unpacked one at a time, never held as a list
+            for row, (message_id, frame_number, _, offset) in enumerate(
+                INDEX_ENTRY.iter_unpack(entries[:usable])
+            ):
+                if message_id == frame_of_data:
+                    key = (frame_number << 32) + len(self._rows)
+                    if self._frame_keys and key < self._frame_keys[-1]:
+                        ordered = False
+                    self._frame_keys.append(key)
+                    self._rows.append(row)
+                    frame_layout = layout
+                    if previous is not None:
+                        behind = switch_frame_number - frame_number
+                        if 0 <= behind < LATE_FRAMES:
+                            frame_layout = previous
+                        elif behind < 0:
+                            previous = None
+                    self._frame_layouts.append(frame_layout)
+                    last_frame_number = frame_number
+                    sent_layout = layout
+                elif message_id == server_info or message_id == response:
+                    version = self._recorded_version(message_id, offset)
+                    if version is None:
+                        continue
+                    layout = self._layout_index(version)
+                    if last_frame_number is not None:
+                        # Frames in flight have the layout of the last frame, even
+                        # after several changes between two frames
+                        previous = sent_layout if sent_layout != layout else None
+                        switch_frame_number = last_frame_number
+                elif message_id == model_def and self._model_def_offset is None:
+                    self._model_def_offset = offset
+        finally:
+            entries.release()
+        if not ordered:
+            # A looping playback or late frames, sorted once so seeks are one bisect
+            self._frame_keys = array("q", sorted(self._frame_keys))
+        if not self._layouts:
+            raise ValueError("The capture has no ServerInfo, the layout is unknown")
+        # Frames before the first ServerInfo got index 0, its layout
+        self._last_layout = layout
+
+    def _recorded_version(self, message_id: int, offset: int) -> Tuple[int, int] | None:
+        """NatNet version set by a ServerInfo or a bitstream change response"""
+        payload = self._payload(offset)
+        if message_id == NatMessages.SERVER_INFO.value:
+            return payload[260], payload[261]
+        response, _, _ = bytes(payload[:256]).partition(b"\0")
+        if not response.startswith(b"Bitstream,"):
+            return None
+        version = response.split(b",")[1].split(b".")
+        if len(version) < 2 or not version[0].isdigit() or not version[1].isdigit():
+            return None
+        return int(version[0]), int(version[1])
+
+    def _layout_index(self, version: Tuple[int, int]) -> int:
+        """Index in `_layouts` of the unpacker of `version`, added if new"""
+        unpacker = unpackers.unpacker_for_version(*version)
+        if self.coordinate_transform is not None:
+            unpacker = unpackers.transformed_unpacker(
+                unpacker, self.coordinate_transform
+            )
+        if unpacker not in self._layouts:
+            self._layouts.append(unpacker)
+        return self._layouts.index(unpacker)
+
+    def _entry(self, index: int) -> Tuple[int, int, int, int]:
+        """(message id, frame number, timestamp ns, offset) of the frame at `index`"""
+        return INDEX_ENTRY.unpack_from(
+            self._index_map, len(INDEX_MAGIC) + self._rows[index] * INDEX_ENTRY.size
+        )
+
+    def _payload(self, offset: int) -> memoryview:
+        """Datagram of the record at `offset` without its message id and size"""
+        length = int.from_bytes(self._map[offset : offset + 4], byteorder="little")
+        start = offset + RECORD_HEADER.size
+        return memoryview(self._map)[start + 4 : start + length]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def unpacker(self) -> type[unpackers.DataUnpackerV3_0]:
+        """Layout of the last frames"""
+        return self._layouts[self._last_layout]
+
+    def unpacker_at(self, index: int) -> type[unpackers.DataUnpackerV3_0]:
+        """Layout of the frame at `index`"""
+        return self._layouts[self._frame_layouts[index]]
+
+    @property
+    def descriptors(self) -> Descriptors | None:
+        """Model definitions recorded in the capture, decoded on first access"""
+        if self._descriptors is None and self._model_def_offset is not None:
+            self._descriptors = self._layouts[0].unpack_descriptors(
+                bytes(self._payload(self._model_def_offset))
+            )
+        return self._descriptors
+
+    def frame_number(self, index: int) -> int:
+        return self._entry(index)[1]
+
+    def timestamp(self, index: int) -> int:
+        """Monotonic receive time, in nanoseconds, of the frame at `index`"""
+        return self._entry(index)[2]
+
+    def raw(self, index: int) -> memoryview:
+        """Undecoded frame at `index`, a view on the mapped file"""
+        return self._payload(self._entry(index)[3])
+
+    def frame_at(self, index: int) -> MoCapDescription:
+        return self.unpacker_at(index).unpack_mocap_data(bytes(self.raw(index)))
+
+    def index_of_frame(self, frame_number: int) -> int:
+        """
+        First index of a frame number, a looping playback records it several times
+
+        Raises:
+            KeyError. If the frame was not recorded
+        """
+        position = bisect.bisect_left(self._frame_keys, frame_number << 32)
+        if position == len(self._frame_keys):
+            raise KeyError(frame_number)
+        key = self._frame_keys[position]
+        if key >> 32 != frame_number:
+            raise KeyError(frame_number)
+        return key & 0xFFFFFFFF
+
+    def frame(self, frame_number: int) -> MoCapDescription:
+        """
+        Raises:
+            KeyError. If the frame was not recorded
+        """
+        return self.frame_at(self.index_of_frame(frame_number))
+
+    def index_at_time(self, timestamp_ns: int) -> int:
+        """Index of the last frame received at or before `timestamp_ns`, 0 if none"""
+        return max(bisect.bisect_right(_FrameColumn(self, 2), timestamp_ns) - 1, 0)
+
+    def index_at_timecode(self, time_code: int, time_code_sub: int = 0) -> int:
+        """Index of the first frame at or after a SMPTE timecode, see `encode_timecode`.
+        Only meaningful when Motive receives timecode
+
+        Returns:
+            int: `len(self)` if every frame is before the timecode
+        """
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            suffix = self.frame_at(middle).suffix_data
+            if (suffix.time_code, suffix.time_code_sub) < (time_code, time_code_sub):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def frames(
+        self, start: int = 0, stop: int | None = None
+    ) -> Generator[MoCapDescription, None, None]:
+        """Decodes frames from index `start` to `stop` lazily"""
+        for index in range(start, len(self) if stop is None else stop):
+            yield self.frame_at(index)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+        self._index_map.close()
+        self._index_file.close()
+
+    def __enter__(self) -> MappedCapture:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -1,14 +1,25 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
 import logging
+import os
 import socket
 import struct
 import threading
 import time
 from collections import deque
 from dataclasses import InitVar, asdict, dataclass, field
-from typing import ClassVar, Generator, Literal, Tuple
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Coroutine,
+    Generator,
+    Literal,
+    Tuple,
+    TypeVar,
+)
 
 import natnet_client.enums
 from natnet_client.exceptions import NatNetClientNotConnectedError
@@ -16,6 +27,35 @@ from natnet_client.natnet_params import NatNetParams
 from natnet_client import unpackers
 
 from natnet_client.descriptors import MoCapDescription, Descriptors
+from natnet_client.capture import CaptureSource, CaptureWriter
+from natnet_client.decimation import DecimationMode, RateLimitedListener
+from natnet_client.metrics import Metrics
+from natnet_client.profiling import EndHook, ProfilingHooks, StartHook
+from natnet_client.stats import FrameSequenceStats, FrameSequenceTracker
+from natnet_client.transforms import CoordinateTransform
+from natnet_client.clock_sync import (
+    ClockSync,
+    FrameTiming,
+    LatencyStats,
+    LatencyTracker,
+)
+
+T = TypeVar("T")
+
+# Called with every decoded frame and its timing
+FrameListener = Callable[[MoCapDescription, FrameTiming], None]
+# Returns the frame, possibly modified, delivered to listeners and `mocap`
+FrameFilter = Callable[[MoCapDescription, FrameTiming], MoCapDescription]
+
+SubscriptionDataType = Literal[
+    "AllTypes",
+    "MarkerSetMarkers",
+    "LabeledMarkers",
+    "RigidBody",
+    "Skeleton",
+    "ForcePlate",
+    "Device",
+]
 
 
 @dataclass(slots=True, frozen=True)
@@ -24,6 +64,7 @@ class ServerInfo:
     version: Tuple[int, ...]
     nat_net_major: int
     nat_net_minor: int
+    high_res_clock_frequency: int | None = None
 
 
 @dataclass
@@ -35,17 +76,18 @@ class NatNetClient:
     _server_info: ServerInfo = field(init=False)
     _command_socket: socket.socket = field(init=False, repr=False)
     _data_socket: socket.socket = field(init=False, repr=False)
-    _bg_thread: threading.Thread = field(init=False)
+    _bg_thread: threading.Thread | None = field(init=False, default=None)
+    # Set instead of `_bg_thread` when the client runs on a shared loop
+    _bg_future: concurrent.futures.Future[None] | None = field(init=False, default=None)
+    _tasks: set[asyncio.Task[None]] = field(init=False, default_factory=set)
     _loop: asyncio.AbstractEventLoop = field(init=False)
     _ready: threading.Event = field(init=False, default_factory=threading.Event)
     _server_ready: threading.Event = field(init=False, default_factory=threading.Event)
     # _server_ready_async: asyncio.Event = field(init=False, default_factory=asyncio.Event)
     _stop: asyncio.Event = field(init=False, default_factory=asyncio.Event)
 
-    _server_responses_lock: threading.Lock = field(
-        init=False, default_factory=threading.Lock
-    )
-    _server_response: None | bytes = field(init=False, default=None)
+    _command_lock: asyncio.Lock = field(init=False, repr=False)
+    _command_response: asyncio.Future[bytes] | None = field(init=False, default=None)
     _server_messages_lock: threading.Lock = field(
         init=False, default_factory=threading.Lock
     )
@@ -60,15 +102,62 @@ class NatNetClient:
     _mocap_asynchronous_event: asyncio.Event = field(
         init=False, default_factory=asyncio.Event
     )
+    _frame_tracker: FrameSequenceTracker = field(
+        init=False, default_factory=FrameSequenceTracker, repr=False
+    )
+    _frame_flags: natnet_client.enums.FrameFlags = field(
+        init=False, default=natnet_client.enums.FrameFlags.NONE
+    )
+    _clock_sync: ClockSync | None = field(init=False, default=None)
+    _latency: LatencyTracker = field(
+        init=False, default_factory=LatencyTracker, repr=False
+    )
+    _frame_timing: FrameTiming | None = field(init=False, default=None)
+    _metrics: Metrics | None = field(init=False, default=None, repr=False)
+    _profiling: ProfilingHooks = field(
+        init=False, default_factory=ProfilingHooks, repr=False
+    )
+    _capture: CaptureWriter | None = field(init=False, default=None)
+    # Last MODEL_DEF datagram, written at the beginning of every capture
+    _model_def_packet: bytes | None = field(init=False, default=None, repr=False)
+    _section_hook: unpackers.SectionHook | None = field(
+        init=False, default=None, repr=False
+    )
+    # Replaced, never mutated, so listeners can be added from another thread
+    _frame_listeners: Tuple[FrameListener, ...] = field(
+        init=False, default=(), repr=False
+    )
+    _frame_filters: Tuple[FrameFilter, ...] = field(init=False, default=(), repr=False)
+    _rate_limited_listeners: Tuple[RateLimitedListener, ...] = field(
+        init=False, default=(), repr=False
+    )
 
     _descriptors: Descriptors | None = field(init=False, default=None)
     _can_change_bitstream: bool = field(init=False, default=False)
+    _unpacker: type[unpackers.DataUnpackerV3_0] = field(
+        init=False, default=unpackers.DataUnpackerV3_0
+    )
+    # Unpacker of the bitstream version, `_unpacker` adds the coordinate transform
+    _layout_unpacker: type[unpackers.DataUnpackerV3_0] = field(
+        init=False, default=unpackers.DataUnpackerV3_0
+    )
+    _coordinate_transform: CoordinateTransform | None = field(init=False, default=None)
+    # Layout in use before the last bitstream change, and the last frame number
+    # received before it was acknowledged, frames up to it were sent with that layout
+    _previous_unpacker: type[unpackers.DataUnpackerV3_0] | None = field(
+        init=False, default=None
+    )
+    _switch_frame_number: int = field(init=False, default=0)
+    _last_frame_number: int | None = field(init=False, default=None)
 
     def __post_init__(self, init_params: NatNetParams) -> None:
         self._params = init_params
         self._server_messages: deque[str] = deque(maxlen=self._params.max_buffer_size)
-
-    # TODO: Add bitstream change support
+        self.set_coordinate_transform(self._params.coordinate_transform)
+        if self._params.enable_metrics:
+            self._metrics = Metrics()
+            self._profiling.add_span(self._metrics.section)
+            self._section_hook = self._profiling
 
     @property
     def params(self) -> NatNetParams:
@@ -86,11 +175,160 @@ class NatNetClient:
     def last_mocap_data(self) -> None | MoCapDescription:
         return self._mocap
 
+    @property
+    def frame_stats(self) -> FrameSequenceStats:
+        """Missing, duplicated and out of order frames, and inter-arrival times"""
+        return self._frame_tracker.stats()
+
+    @property
+    def last_frame_flags(self) -> natnet_client.enums.FrameFlags:
+        """Sequence flags of the last received frame"""
+        return self._frame_flags
+
+    @property
+    def clock_sync(self) -> ClockSync | None:
+        """Motive to host clock mapping, None if the server did not send its clock frequency"""
+        return self._clock_sync
+
+    @property
+    def last_frame_timing(self) -> FrameTiming | None:
+        """Host times of the last frame from exposure to decoding"""
+        return self._frame_timing
+
+    @property
+    def latency_stats(self) -> LatencyStats:
+        """Latency histograms of the last 10 to 20 seconds of frames"""
+        return self._latency.stats()
+
+    @property
+    def total_latency_stats(self) -> LatencyStats:
+        """Latency histograms of every frame since the connection"""
+        return self._latency.total_stats()
+
+    @property
+    def metrics(self) -> Metrics | None:
+        """Stage counters and timings, None unless `NatNetParams.enable_metrics`"""
+        return self._metrics
+
+    def add_profiling_hook(
+        self, on_start: StartHook | None = None, on_end: EndHook | None = None
+    ) -> None:
+        """Registers callbacks for every decoded section of every frame, see `natnet_client.profiling`
+
+        Args:
+            on_start (StartHook|None, optional): Called with (frame_number, section, start perf_counter_ns). Defaults to None.
+            on_end (EndHook|None, optional): Called with (frame_number, section, end perf_counter_ns). Defaults to None.
+        """
+        self._profiling.add(on_start, on_end)
+        self._section_hook = self._profiling
+
+    def remove_profiling_hook(
+        self, on_start: StartHook | None = None, on_end: EndHook | None = None
+    ) -> None:
+        self._profiling.remove(on_start, on_end)
+        self._section_hook = self._profiling if self._profiling else None
+
+    def add_frame_listener(self, listener: FrameListener) -> None:
+        """
+        Calls `listener(frame, timing)` for every decoded frame, before `mocap` is
+        notified. It runs on the receive thread, so it must return quickly.
+        """
+        self._frame_listeners += (listener,)
+
+    def remove_frame_listener(self, listener: FrameListener) -> None:
+        listeners = list(self._frame_listeners)
+        listeners.remove(listener)
+        self._frame_listeners = tuple(listeners)
+
+    def add_frame_filter(self, frame_filter: FrameFilter) -> None:
+        """
+        Replaces every decoded frame with `frame_filter(frame, timing)` before the
+        frame listeners and `mocap` see it, e.g. `natnet_client.filters`. Filters run
+        in the order they were added, on the receive thread.
+        """
+        self._frame_filters += (frame_filter,)
+
+    def remove_frame_filter(self, frame_filter: FrameFilter) -> None:
+        filters = list(self._frame_filters)
+        filters.remove(frame_filter)
+        self._frame_filters = tuple(filters)
+
+    def add_rate_limited_listener(
+        self,
+        listener: FrameListener,
+        rate: float,
+        mode: DecimationMode = "latest",
+    ) -> RateLimitedListener:
+        """
+        Calls `listener(frame, timing)` at most `rate` times per second, after the
+        frame listeners, see `natnet_client.decimation`. Pass the returned listener
+        to `remove_rate_limited_listener`.
+
+        Raises:
+            ValueError. If the rate is not positive or the mode is unknown
+        """
+        limited = RateLimitedListener(listener, rate, mode)
+        self._rate_limited_listeners += (limited,)
+        return limited
+
+    def remove_rate_limited_listener(self, limited: RateLimitedListener) -> None:
+        listeners = list(self._rate_limited_listeners)
+        listeners.remove(limited)
+        self._rate_limited_listeners = tuple(listeners)
+
+    def _frame_wanted(self, received_ns: int) -> bool:
+        """Whether some consumer needs the frame received at `received_ns` decoded"""
+        if self._params.decode_all_frames:
+            return True
+        if self._frame_listeners or self._frame_filters:
+            return True
+        return any(
+            limited.wants(received_ns) for limited in self._rate_limited_listeners
+        )
+
+    @property
+    def capture(self) -> CaptureWriter | None:
+        return self._capture
+
+    def start_capture(self, path: str | os.PathLike[str]) -> CaptureWriter:
+        """Records every received datagram to an indexed capture file, see `natnet_client.capture`
+
+        Args:
+            path (str|os.PathLike): Capture file, the index is written next to it
+
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+            RuntimeError. If a capture is already running
+        """
+        if not self._ready.is_set():
+            raise NatNetClientNotConnectedError(self.params)
+        if self._capture is not None:
+            raise RuntimeError("A capture is already running")
+        capture = CaptureWriter(path)
+        capture.start()
+        # Captures must be decodable on their own
+        now = time.monotonic_ns()
+        capture.record(self._pack_server_info(), now, CaptureSource.SYNTHETIC)
+        if self._model_def_packet is not None:
+            capture.record(self._model_def_packet, now, CaptureSource.SYNTHETIC)
+        self._capture = capture
+        return capture
+
+    def stop_capture(self) -> None:
+        if self._capture is None:
+            raise RuntimeError("There is no capture running")
+        capture, self._capture = self._capture, None
+        capture.close()
+
     @property
     def server_messages(self) -> deque[str]:
         with self._server_messages_lock:
             return self._server_messages.copy()
 
+    @property
+    def can_change_bitstream(self) -> bool:
+        return self._can_change_bitstream
+
     @property
     def descriptors(self) -> Descriptors | None:
         return self._descriptors
@@ -117,6 +355,13 @@ class NatNetClient:
             >>>             print(frame)
         """
         while self._mocap_synchronous_event.wait(timeout):
+            if self._frame_timing is not None:
+                delivered_ns = time.monotonic_ns()
+                self._latency.delivered(self._frame_timing, delivered_ns)
+                if self._metrics is not None:
+                    self._metrics.time(
+                        "deliver", delivered_ns - self._frame_timing.decoded_ns
+                    )
             yield self._mocap  # type: ignore
             self._mocap_synchronous_event.clear()
 
@@ -173,12 +418,29 @@ class NatNetClient:
                 + socket.inet_aton(self._params.local_ip_address),
             )
 
+    def _create_task(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
     async def _start_data(self):
-        asyncio.create_task(self._data_task())
+        self._create_task(self._data_task())
         if not self._params.use_multicast:
-            asyncio.create_task(self._keep_alive_task())
+            self._create_task(self._keep_alive_task())
+
+    def connect(
+        self,
+        timeout: float | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> bool:
+        """
+        Args:
+            timeout (float|None, optional): Time to wait for the server to send back its ServerInfo. Defaults to None.
+            loop (asyncio.AbstractEventLoop|None, optional): Running loop, owned by another thread, to run the client on instead of a dedicated thread. Defaults to None.
 
-    def connect(self, timeout: float | None = None) -> bool:
+        Returns:
+            bool: If the server answered on time
+        """
         if self._ready.is_set():
             raise RuntimeError("You are already connected")
         self._create_command_socket()
@@ -190,11 +452,18 @@ class NatNetClient:
             self._command_socket.close()
             return False
         self.logger.debug("data socket created")
+        self._frame_tracker.reset()
+        self._latency.clear()
+        self._previous_unpacker = None
+        self._last_frame_number = None
+        self._clock_sync = None
+        self._frame_timing = None
         self.logger.info("Client connected")
-        self._bg_thread = threading.Thread(
-            target=asyncio.run, args=(self._main_task(),)
-        )
-        self._bg_thread.start()
+        if loop is None:
+            self._bg_thread = threading.Thread(target=self._run_main_task)
+            self._bg_thread.start()
+        else:
+            self._bg_future = asyncio.run_coroutine_threadsafe(self._main_task(), loop)
         self._ready.wait()
         self.send_request(natnet_client.enums.NatMessages.CONNECT, "")
         connected = self._server_ready.wait(timeout)
@@ -209,8 +478,15 @@ class NatNetClient:
             raise NatNetClientNotConnectedError(self.params)
         self.logger.info("Shuting down client")
         self._ready.clear()
+        if self._capture is not None:
+            self.stop_capture()
         self._loop.call_soon_threadsafe(self._stop.set)
-        self._bg_thread.join()
+        if self._bg_future is not None:
+            self._bg_future.result()
+            self._bg_future = None
+        elif self._bg_thread is not None:
+            self._bg_thread.join()
+            self._bg_thread = None
         self._command_socket.close()
         self._data_socket.close()
         self._server_ready.clear()
@@ -231,9 +507,19 @@ class NatNetClient:
             (self._params.server_address, self._params.command_port),
         )
 
-    def send_request(
+    async def _run_on_loop(self, coro: Coroutine[Any, Any, T]) -> T:
+        """
+        Awaits `coro` on the client loop, from the client loop or from any other loop
+        """
+        if asyncio.get_running_loop() is self._loop:
+            return await coro
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(coro, self._loop)
+        )
+
+    def _build_request(
         self, NAT_command: natnet_client.enums.NatMessages, command: str
-    ) -> int:
+    ) -> bytes:
         if not self._ready.is_set():
             raise NatNetClientNotConnectedError(self.params)
         if NAT_command is natnet_client.enums.NatMessages.UNDEFINED:
@@ -262,9 +548,21 @@ class NatNetClient:
         data += packet_size.to_bytes(2, byteorder="little", signed=True)
         data += command.encode("utf-8")
         data += b"\0"
+        return data
+
+    def send_request(
+        self, NAT_command: natnet_client.enums.NatMessages, command: str
+    ) -> int:
+        data = self._build_request(NAT_command, command)
         future = asyncio.run_coroutine_threadsafe(self._send_request(data), self._loop)
         return future.result()
 
+    async def send_request_async(
+        self, NAT_command: natnet_client.enums.NatMessages, command: str
+    ) -> int:
+        data = self._build_request(NAT_command, command)
+        return await self._run_on_loop(self._send_request(data))
+
     def send_command(self, command: str) -> bool:
         res: int = -1
         for _ in range(3):
@@ -273,28 +571,250 @@ class NatNetClient:
                 break
         return res != -1
 
-    def _update_unpacker_version(self) -> None:
+    async def send_command_async(self, command: str) -> bool:
+        res: int = -1
+        for _ in range(3):
+            res = await self.send_request_async(
+                natnet_client.enums.NatMessages.REQUEST, command
+            )
+            if res != -1:
+                break
+        return res != -1
+
+    async def _request_response(self, command: str) -> bytes:
         """
-        Changes unpacker version based on server's bit stream version
+        Sends a command and waits for its response, runs on the client loop
         """
-        self._unpacker = unpackers.DataUnpackerV3_0
+        async with self._command_lock:
+            self._command_response = self._loop.create_future()
+            try:
+                start = time.monotonic_ns()
+                await self.send_command_async(command)
+                response = await self._command_response
+                if self._clock_sync is not None:
+                    self._clock_sync.add_round_trip(time.monotonic_ns() - start)
+                return response
+            finally:
+                self._command_response = None
+
+    def _command(self, command: str) -> bytes:
+        if not self._ready.is_set():
+            raise NatNetClientNotConnectedError(self.params)
+        future = asyncio.run_coroutine_threadsafe(
+            self._request_response(command), self._loop
+        )
+        return future.result()
+
+    async def _command_async(self, command: str) -> bytes:
+        if not self._ready.is_set():
+            raise NatNetClientNotConnectedError(self.params)
+        return await self._run_on_loop(self._request_response(command))
+
+    async def _change_bitstream_version(self, major: int, minor: int) -> None:
+        if not self._can_change_bitstream:
+            raise RuntimeError(
+                "Bitstream changes need a NatNet 4+ server and unicast mode"
+            )
+        if major not in (3, 4):
+            raise ValueError(f"Unsupported bitstream version {major}.{minor}")
+        await self._request_response(f"Bitstream,{major}.{minor}")
+        # Motive may answer with a plain return code instead of "Bitstream,x.y"
         if (
-            self._server_info.nat_net_major == 4
-            and self._server_info.nat_net_minor >= 1
-        ) or self._server_info.nat_net_major == 0:
-            self._unpacker = unpackers.DataUnpackerV4_1
+            self._server_info.nat_net_major,
+            self._server_info.nat_net_minor,
+        ) != (major, minor):
+            self._set_bitstream_version(major, minor)
+
+    async def _synchronize_clock(self, samples: int) -> int | None:
+        for _ in range(samples):
+            await self._request_response("FrameRate")
+        return self._clock_sync.round_trip_ns if self._clock_sync else None
+
+    def synchronize_clock(self, samples: int = 8) -> int | None:
+        """Measures command round trips, used to remove the network delay from the clock offset
+
+        Args:
+            samples (int, optional): Number of round trips. Defaults to 8.
+
+        Returns:
+            int|None: Smallest round trip in nanoseconds, None if the server clock frequency is unknown
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        if not self._ready.is_set():
+            raise NatNetClientNotConnectedError(self.params)
+        return asyncio.run_coroutine_threadsafe(
+            self._synchronize_clock(samples), self._loop
+        ).result()
+
+    async def synchronize_clock_async(self, samples: int = 8) -> int | None:
+        """Measures command round trips, used to remove the network delay from the clock offset
+
+        Args:
+            samples (int, optional): Number of round trips. Defaults to 8.
+
+        Returns:
+            int|None: Smallest round trip in nanoseconds, None if the server clock frequency is unknown
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        if not self._ready.is_set():
+            raise NatNetClientNotConnectedError(self.params)
+        return await self._run_on_loop(self._synchronize_clock(samples))
+
+    @staticmethod
+    def _current_mode(
+        res: int,
+    ) -> Literal["live", "recording", "playback", "edit", "unknown"]:
+        if res == 0:
+            return "live"
+        if res == 1:
+            return "recording"
+        if res == 2:
+            return "playback"
+        if res == 3:
+            return "edit"
+        return "unknown"
+
+    def _update_unpacker_version(self) -> None:
+        """
+        Changes unpacker version based on server's bit stream version.
+        Always runs on the client loop, same as frame decoding, so the swap is atomic
+        """
+        self._layout_unpacker = unpackers.unpacker_for_version(
+            self._server_info.nat_net_major, self._server_info.nat_net_minor
+        )
+        unpacker = self._transformed(self._layout_unpacker)
+        if unpacker is not self._unpacker:
+            if self._last_frame_number is not None:
+                self._previous_unpacker = self._unpacker
+                self._switch_frame_number = self._last_frame_number
+            self._unpacker = unpacker
         self._server_ready.set()
 
-    def _unpack_mocap_data(self, data: bytes, packet_size: int) -> None:
+    def _transformed(
+        self, unpacker: type[unpackers.DataUnpackerV3_0]
+    ) -> type[unpackers.DataUnpackerV3_0]:
+        if self._coordinate_transform is None:
+            return unpacker
+        return unpackers.transformed_unpacker(unpacker, self._coordinate_transform)
+
+    @property
+    def coordinate_transform(self) -> CoordinateTransform | None:
+        return self._coordinate_transform
+
+    def set_coordinate_transform(self, transform: CoordinateTransform | None) -> None:
+        """
+        Decodes the following frames and model definitions in the frame and units of
+        `transform`, while they are unpacked, so no second pass over the frame is
+        needed. None decodes them as sent by Motive.
+        Descriptors already received keep the previous frame.
+
+        Example:
+            >>> transform = CoordinateTransform.y_up_to_z_up()
+            >>> client.set_coordinate_transform(transform.scaled(client.UnitesToMillimeters()))
+        """
+        self._coordinate_transform = transform
+        self._unpacker = self._transformed(self._layout_unpacker)
+
+    def _set_bitstream_version(self, major: int, minor: int) -> None:
+        template = asdict(self._server_info)
+        template["nat_net_major"] = major
+        template["nat_net_minor"] = minor
+        self._server_info = ServerInfo(**template)
+        self._update_unpacker_version()
+        if self._capture is not None:
+            # The capture must follow the layout even when Motive only sent a return code
+            self._capture.record(
+                self._pack_server_info(), time.monotonic_ns(), CaptureSource.SYNTHETIC
+            )
+
+    def _frame_unpacker(self, frame_number: int) -> type[unpackers.DataUnpackerV3_0]:
+        """Layout the frame was sent with, frames in flight during a bitstream change keep the previous one"""
+        if self._previous_unpacker is not None:
+            behind = self._switch_frame_number - frame_number
+            if 0 <= behind < self._frame_tracker.window:
+                return self._previous_unpacker
+            if behind < 0:
+                # Motive sends every newer frame with the new layout
+                self._previous_unpacker = None
+        return self._unpacker
+
+    def _decode_mocap_data(
+        self, data: bytes, frame_number: int
+    ) -> MoCapDescription | None:
+        hook = self._section_hook
+        start = time.perf_counter_ns() if hook is not None else 0
+        spent_ns = self._profiling.spent_ns
+        try:
+            mocap = self._frame_unpacker(frame_number).unpack_mocap_data(data, hook)
+        except (struct.error, IndexError, ValueError) as error:
+            self.logger.warning("Dropped malformed frame: %s", error)
+            if self._metrics is not None:
+                self._metrics.count("dropped_frames")
+            return None
+        if hook is not None:
+            end = time.perf_counter_ns() - (self._profiling.spent_ns - spent_ns)
+            hook(mocap.prefix_data.frame_number, "mocap_data", start, end)
+        return mocap
+
+    def _unpack_mocap_data(
+        self, data: bytes, packet_size: int, received_ns: int
+    ) -> None:
         self._last_new_data_time = time.time_ns()
-        self._mocap = self._unpacker.unpack_mocap_data(data)
+        frame_number = int.from_bytes(data[:4], byteorder="little", signed=True)
+        self._frame_flags = self._frame_tracker.update(frame_number, received_ns)
+        self._last_frame_number = frame_number
+        if not self._frame_wanted(received_ns):
+            # Skipped frames give no clock or latency sample, the transmit stamp
+            # is in the suffix, after every section of the frame
+            if self._metrics is not None:
+                self._metrics.count("skipped_frames")
+            return
+        mocap = self._decode_mocap_data(data, frame_number)
+        if mocap is None:
+            return
+        decoded_ns = time.monotonic_ns()
+        if self._clock_sync is not None:
+            self._clock_sync.add_sample(mocap.suffix_data.stamp_transmit, received_ns)
+        self._frame_timing = self._latency.update(
+            mocap.suffix_data, self._clock_sync, received_ns, decoded_ns
+        )
+        for frame_filter in self._frame_filters:
+            try:
+                mocap = frame_filter(mocap, self._frame_timing)
+            except Exception:
+                self.logger.exception("Frame filter %r failed", frame_filter)
+        for listener in self._frame_listeners:
+            try:
+                listener(mocap, self._frame_timing)
+            except Exception:
+                self.logger.exception("Frame listener %r failed", listener)
+        for limited in self._rate_limited_listeners:
+            try:
+                limited(mocap, self._frame_timing)
+            except Exception:
+                self.logger.exception("Rate limited listener %r failed", limited)
+        self._mocap = mocap
         self._mocap_synchronous_event.set()
         if self._mocap_loop is not None:
             self._mocap_loop.call_soon_threadsafe(self._mocap_asynchronous_event.set)
+        if self._metrics is not None:
+            self._metrics.time("notify", time.monotonic_ns() - decoded_ns)
 
     def _unpack_data_descriptions(self, data: bytes, packet_size: int) -> None:
         self._descriptors = self._unpacker.unpack_descriptors(data)
 
+    def _pack_server_info(self) -> bytes:
+        info = self._server_info
+        data = info.application_name.encode("utf-8")[:255].ljust(256, b"\0")
+        data += bytes(info.version[:4]).ljust(4, b"\0")
+        data += bytes((info.nat_net_major, info.nat_net_minor, 0, 0))
+        if info.high_res_clock_frequency is not None:
+            data += struct.pack("<Q", info.high_res_clock_frequency)
+        message = natnet_client.enums.NatMessages.SERVER_INFO.value
+        return struct.pack("<hh", message, len(data)) + data
+
     def _unpack_server_info(self, data: bytes, packet_size: int) -> None:
         offset = 0
         application_name_bytes, _, _ = data[
@@ -305,31 +825,43 @@ class NatNetClient:
         nat_net_major, nat_net_minor, _, _ = struct.unpack(
             "BBBB", data[offset : (offset := offset + 4)]
         )
+        high_res_clock_frequency = None
+        if len(data) >= offset + 8:
+            high_res_clock_frequency = struct.unpack(
+                "<Q", data[offset : (offset := offset + 8)]
+            )[0]
         self._server_info = ServerInfo(
-            application_name, version, nat_net_major, nat_net_minor
+            application_name,
+            version,
+            nat_net_major,
+            nat_net_minor,
+            high_res_clock_frequency,
         )
+        if high_res_clock_frequency:
+            self._clock_sync = ClockSync(high_res_clock_frequency)
         self._update_unpacker_version()
         if nat_net_major >= 4 and self._params.use_multicast is False:
             self._can_change_bitstream = True
 
+    def _set_server_response(self, data: bytes) -> None:
+        if self._command_response is not None and not self._command_response.done():
+            self._command_response.set_result(data)
+
     def _unpack_server_response(self, data: bytes, packet_size: int) -> None:
         if packet_size == 4:
-            self._server_response = data
+            self._set_server_response(data)
             return
         response_bytes, _, _ = data[:256].partition(b"\0")
         if len(response_bytes) > 30:
+            self._set_server_response(data)
             return
         response = response_bytes.decode("utf-8")
         messageList = response.split(",")
         if len(messageList) > 1 and messageList[0] == "Bitstream":
             nn_version = messageList[1].split(".")
-            template = asdict(self._server_info)
             if len(nn_version) > 1:
-                template["nat_net_major"] = int(nn_version[0])
-                template["nat_net_minor"] = int(nn_version[1])
-                self._server_info = ServerInfo(**template)
-                self._update_unpacker_version()
-        self._server_response = data
+                self._set_bitstream_version(int(nn_version[0]), int(nn_version[1]))
+        self._set_server_response(data)
 
     def _unpack_server_message(self, data: bytes, packet_size: int) -> None:
         message, _, _ = data.partition(b"\0")
@@ -350,7 +882,20 @@ class NatNetClient:
             packet_size,
         )
 
-    def _process_message(self, data: bytes) -> None:
+    def _process_message(self, data: bytes, received_ns: int | None = None) -> None:
+        if received_ns is None:
+            received_ns = time.monotonic_ns()
+        if self._metrics is None:
+            self._dispatch_message(data, received_ns)
+            return
+        start = time.perf_counter_ns()
+        message = self._dispatch_message(data, received_ns)
+        self._metrics.time("process_message", time.perf_counter_ns() - start)
+        self._metrics.count("messages_" + message.name.lower())
+
+    def _dispatch_message(
+        self, data: bytes, received_ns: int
+    ) -> natnet_client.enums.NatMessages:
         offset = 0
         message_id = int.from_bytes(
             data[offset : (offset := offset + 2)], byteorder="little", signed=True
@@ -360,8 +905,9 @@ class NatNetClient:
             data[offset : (offset := offset + 2)], byteorder="little", signed=True
         )
         if message is natnet_client.enums.NatMessages.FRAME_OF_DATA:
-            self._unpack_mocap_data(data[offset:], packet_size)
+            self._unpack_mocap_data(data[offset:], packet_size, received_ns)
         elif message is natnet_client.enums.NatMessages.MODEL_DEF:
+            self._model_def_packet = data
             self._unpack_data_descriptions(data[offset:], packet_size)
         elif message is natnet_client.enums.NatMessages.SERVER_INFO:
             self._unpack_server_info(data[offset:], packet_size)
@@ -373,12 +919,32 @@ class NatNetClient:
             self._unpack_unrecognized_request(data[offset:], packet_size)
         elif message is natnet_client.enums.NatMessages.UNDEFINED:
             self._unpack_undefined_nat_message(data[offset:], packet_size)
+        return message
+
+    def _run_main_task(self) -> None:
+        loop_factory = self._params.event_loop_factory or asyncio.new_event_loop
+        loop = loop_factory()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._main_task())
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            asyncio.set_event_loop(None)
+            loop.close()
 
     async def _main_task(self) -> None:
         self._loop = asyncio.get_running_loop()
-        asyncio.create_task(self._command_task())
+        self._command_lock = asyncio.Lock()
+        self._stop = asyncio.Event()
+        self._create_task(self._command_task())
         self._ready.set()
-        await self._stop.wait()
+        try:
+            await self._stop.wait()
+        finally:
+            # The loop may be shared with other clients, so nothing can be left running
+            for task in tuple(self._tasks):
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
 
     async def _data_task(self) -> None:
         data = bytes()
@@ -389,6 +955,7 @@ class NatNetClient:
                 data = await asyncio.wait_for(
                     self._loop.sock_recv(self._data_socket, recv_buffer_size), 3
                 )
+                received_ns = time.monotonic_ns()
             except asyncio.TimeoutError:
                 self.logger.debug("Data socket timeout")
                 data = bytes()
@@ -396,7 +963,13 @@ class NatNetClient:
                 self.logger.error("Data error %s: %s", self._params, msg)
                 data = bytes()
             if len(data):
-                self._process_message(data)
+                if self._metrics is not None:
+                    self._metrics.count("data_packets")
+                    self._metrics.count("data_bytes", len(data))
+                # Local reference, the capture can be stopped from another thread
+                if (capture := self._capture) is not None:
+                    capture.record(data, received_ns, CaptureSource.DATA)
+                self._process_message(data, received_ns)
 
     async def _command_task(self) -> None:
         data = bytes()
@@ -407,6 +980,7 @@ class NatNetClient:
                 data = await asyncio.wait_for(
                     self._loop.sock_recv(self._command_socket, recv_buffer_size), 3
                 )
+                received_ns = time.monotonic_ns()
             except asyncio.TimeoutError:
                 self.logger.debug("Command socket timeout")
                 data = bytes()
@@ -414,7 +988,13 @@ class NatNetClient:
                 self.logger.error("Command error %s: %s", self._params, msg)
                 data = bytes()
             if len(data):
-                self._process_message(data)
+                if self._metrics is not None:
+                    self._metrics.count("command_packets")
+                    self._metrics.count("command_bytes", len(data))
+                # Local reference, the capture can be stopped from another thread
+                if (capture := self._capture) is not None:
+                    capture.record(data, received_ns, CaptureSource.COMMAND)
+                self._process_message(data, received_ns)
 
     async def _keep_alive_task(self) -> None:
         self.logger.info("Command thread start")
@@ -429,32 +1009,36 @@ class NatNetClient:
 
     # Implementation of commands described on:
     # https://docs.optitrack.com/developer-tools/natnet-sdk/natnet-remote-requests-commands
+    # Every command has a blocking version and an awaitable `...Async` version,
+    # both are serialized through `_request_response` on the client loop.
 
     def UnitesToMillimeters(self) -> float:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("UnitesToMillimeters")
-            while self._server_response is None:
-                time.sleep(0.001)
-            res = struct.unpack("f", self._server_response)[0]
-            self._server_response = None
-            return res
+        return struct.unpack("f", self._command("UnitesToMillimeters"))[0]
+
+    async def UnitesToMillimetersAsync(self) -> float:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        return struct.unpack("f", await self._command_async("UnitesToMillimeters"))[0]
 
     def FrameRate(self) -> float:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("FrameRate")
-            while self._server_response is None:
-                time.sleep(0.001)
-            res = struct.unpack("f", self._server_response)[0]
-            self._server_response = None
-            return res
+        return struct.unpack("f", self._command("FrameRate"))[0]
+
+    async def FrameRateAsync(self) -> float:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        return struct.unpack("f", await self._command_async("FrameRate"))[0]
 
     def CurrentMode(
         self,
@@ -463,120 +1047,152 @@ class NatNetClient:
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("CurrentMode")
-            while self._server_response is None:
-                time.sleep(0.001)
-            res = int.from_bytes(self._server_response, byteorder="little", signed=True)
-            self._server_response = None
-            if res == 0:
-                return "live"
-            if res == 1:
-                return "recording"
-            if res == 2:
-                return "playback"
-            if res == 3:
-                return "edit"
-            return "unknown"
+        return self._current_mode(
+            int.from_bytes(
+                self._command("CurrentMode"), byteorder="little", signed=True
+            )
+        )
+
+    async def CurrentModeAsync(
+        self,
+    ) -> Literal["live", "recording", "playback", "edit", "unknown"]:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        return self._current_mode(
+            int.from_bytes(
+                await self._command_async("CurrentMode"),
+                byteorder="little",
+                signed=True,
+            )
+        )
 
     def StartRecording(self) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("StartRecording")
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("StartRecording")
+
+    async def StartRecordingAsync(self) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("StartRecording")
 
     def StopRecording(self) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("StopRecording")
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("StopRecording")
+
+    async def StopRecordingAsync(self) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("StopRecording")
 
     def LiveMode(self) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("LiveMode")
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("LiveMode")
+
+    async def LiveModeAsync(self) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("LiveMode")
 
     def EditMode(self) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("EditMode")
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("EditMode")
+
+    async def EditModeAsync(self) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("EditMode")
 
     def TimelinePlay(self) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("TimelinePlay")
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("TimelinePlay")
+
+    async def TimelinePlayAsync(self) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("TimelinePlay")
 
     def TimelineStop(self) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("TimelineStop")
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("TimelineStop")
+
+    async def TimelineStopAsync(self) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("TimelineStop")
 
     def SetPlaybackTakeName(self, name: str) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("SetPlaybackTakeName," + name)
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("SetPlaybackTakeName," + name)
+
+    async def SetPlaybackTakeNameAsync(self, name: str) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("SetPlaybackTakeName," + name)
 
     def SetRecordTakeName(self, name: str) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("SetRecordTakeName," + name)
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("SetRecordTakeName," + name)
+
+    async def SetRecordTakeNameAsync(self, name: str) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("SetRecordTakeName," + name)
 
     def SetCurrentSession(self, name: str) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("SetCurrentSession," + name)
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("SetCurrentSession," + name)
+
+    async def SetCurrentSessionAsync(self, name: str) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("SetCurrentSession," + name)
 
     def CurrentSessionPath(self) -> str:
         """
@@ -585,129 +1201,301 @@ class NatNetClient:
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("CurrentSessionPath")
-            while self._server_response is None:
-                time.sleep(0.001)
-            res = self._server_response.partition(b"\0")[0].decode()
-            self._server_response = None
-            return res
+        return self._command("CurrentSessionPath").partition(b"\0")[0].decode()
+
+    async def CurrentSessionPathAsync(self) -> str:
+        """
+        Returns:
+            str: CurrentSessionPath
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        return (
+            (await self._command_async("CurrentSessionPath"))
+            .partition(b"\0")[0]
+            .decode()
+        )
 
     def SetPlaybackStartFrame(self, frame: int) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("SetPlaybackStartFrame," + str(frame))
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("SetPlaybackStartFrame," + str(frame))
+
+    async def SetPlaybackStartFrameAsync(self, frame: int) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("SetPlaybackStartFrame," + str(frame))
 
     def SetPlaybackStopFrame(self, frame: int) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("SetPlaybackStopFrame," + str(frame))
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("SetPlaybackStopFrame," + str(frame))
+
+    async def SetPlaybackStopFrameAsync(self, frame: int) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("SetPlaybackStopFrame," + str(frame))
 
     def SetPlaybackCurrentFrame(self, frame: int) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("SetPlaybackCurrentFrame," + str(frame))
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("SetPlaybackCurrentFrame," + str(frame))
+
+    async def SetPlaybackCurrentFrameAsync(self, frame: int) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("SetPlaybackCurrentFrame," + str(frame))
 
     def SetPlaybackLooping(self, val: bool) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            if val:
-                self.send_command("SetPlaybackLooping")
-            else:
-                self.send_command("SetPlaybackLooping, 0")
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("SetPlaybackLooping" if val else "SetPlaybackLooping, 0")
+
+    async def SetPlaybackLoopingAsync(self, val: bool) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async(
+            "SetPlaybackLooping" if val else "SetPlaybackLooping, 0"
+        )
 
     def EnableAsset(self, name: str) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("EnableAsset," + name)
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("EnableAsset," + name)
+
+    async def EnableAssetAsync(self, name: str) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("EnableAsset," + name)
 
     def DisableAsset(self, name: str) -> None:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("DisableAsset," + name)
-            while self._server_response is None:
-                time.sleep(0.001)
-            self._server_response = None
+        self._command("DisableAsset," + name)
+
+    async def DisableAssetAsync(self, name: str) -> None:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        await self._command_async("DisableAsset," + name)
 
     def GetProperty(self, node_name: str, property_name: str) -> int:
         """
         Returns:
-            int: # TODO
+            int: Response of Motive to the request read as a little endian integer
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("GetProperty," + node_name + "," + property_name)
-            while self._server_response is None:
-                time.sleep(0.001)
-            res = int.from_bytes(self._server_response, byteorder="little", signed=True)
-            self._server_response = None
-            return res
+        return int.from_bytes(
+            self._command("GetProperty," + node_name + "," + property_name),
+            byteorder="little",
+            signed=True,
+        )
+
+    async def GetPropertyAsync(self, node_name: str, property_name: str) -> int:
+        """
+        Returns:
+            int: Response of Motive to the request read as a little endian integer
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        return int.from_bytes(
+            await self._command_async("GetProperty," + node_name + "," + property_name),
+            byteorder="little",
+            signed=True,
+        )
 
     def SetProperty(
         self, node_name: str, property_name: str, property_value: str
     ) -> int:
         """
         Returns:
-            int: # TODO
+            int: Result code of Motive read as a little endian integer, 0 if the property was set
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command(
+        return int.from_bytes(
+            self._command(
                 "SetProperty," + node_name + "," + property_name + "," + property_value
-            )
-            while self._server_response is None:
-                time.sleep(0.001)
-            res = int.from_bytes(self._server_response, byteorder="little", signed=True)
-            self._server_response = None
-            return res
+            ),
+            byteorder="little",
+            signed=True,
+        )
+
+    async def SetPropertyAsync(
+        self, node_name: str, property_name: str, property_value: str
+    ) -> int:
+        """
+        Returns:
+            int: Result code of Motive read as a little endian integer, 0 if the property was set
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        return int.from_bytes(
+            await self._command_async(
+                "SetProperty," + node_name + "," + property_name + "," + property_value
+            ),
+            byteorder="little",
+            signed=True,
+        )
 
     def CurrentTakeLength(self) -> int:
         """
         Raises:
             NatNetClientNotConnectedError. If there is no connection
         """
-        with self._server_responses_lock:
-            self.send_command("CurrentTakeLength")
-            while self._server_response is None:
-                time.sleep(0.001)
-            res = int.from_bytes(self._server_response, byteorder="little", signed=True)
-            self._server_response = None
-            return res
+        return int.from_bytes(
+            self._command("CurrentTakeLength"), byteorder="little", signed=True
+        )
 
-    # TODO: implement unicast data subscription commands:
+    async def CurrentTakeLengthAsync(self) -> int:
+        """
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+        """
+        return int.from_bytes(
+            await self._command_async("CurrentTakeLength"),
+            byteorder="little",
+            signed=True,
+        )
+
+    def SetBitstreamVersion(self, major: int, minor: int) -> None:
+        """
+        Requests Motive to stream frames with the given NatNet bitstream version, the
+        unpacker is switched once the server acknowledges the change.
+        Older layouts are leaner, e.g. 3.x frames carry no assets nor precision timestamps
+
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+            RuntimeError. If the server does not allow bitstream changes
+            ValueError. If the version cannot be unpacked
+        """
+        if not self._ready.is_set():
+            raise NatNetClientNotConnectedError(self.params)
+        asyncio.run_coroutine_threadsafe(
+            self._change_bitstream_version(major, minor), self._loop
+        ).result()
+
+    async def SetBitstreamVersionAsync(self, major: int, minor: int) -> None:
+        """
+        Requests Motive to stream frames with the given NatNet bitstream version, the
+        unpacker is switched once the server acknowledges the change.
+        Older layouts are leaner, e.g. 3.x frames carry no assets nor precision timestamps
+
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+            RuntimeError. If the server does not allow bitstream changes
+            ValueError. If the version cannot be unpacked
+        """
+        if not self._ready.is_set():
+            raise NatNetClientNotConnectedError(self.params)
+        await self._run_on_loop(self._change_bitstream_version(major, minor))
+
+    # Implementation of unicast data subscription commands described on:
     # https://docs.optitrack.com/developer-tools/natnet-sdk/natnet-unicast-data-subscription-commands
+    # Once subscribed Motive only streams the requested data, so frames shrink and
+    # the unpackers, driven by the counts on each section, decode only what arrives.
+
+    def _subscription_command(self, command: str) -> str:
+        if self._params.use_multicast:
+            raise RuntimeError("Data subscriptions are only available in unicast mode")
+        return command
+
+    def SubscribeToData(
+        self, data_type: SubscriptionDataType, name: str = "All"
+    ) -> None:
+        """
+        Args:
+            data_type (SubscriptionDataType): Type of data to subscribe to
+            name (str, optional): Asset name, "All" or "None". Defaults to "All".
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+            RuntimeError. If the client uses multicast
+        """
+        self._command(self._subscription_command(f"SubscribeToData,{data_type},{name}"))
+
+    async def SubscribeToDataAsync(
+        self, data_type: SubscriptionDataType, name: str = "All"
+    ) -> None:
+        """
+        Args:
+            data_type (SubscriptionDataType): Type of data to subscribe to
+            name (str, optional): Asset name, "All" or "None". Defaults to "All".
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+            RuntimeError. If the client uses multicast
+        """
+        await self._command_async(
+            self._subscription_command(f"SubscribeToData,{data_type},{name}")
+        )
+
+    def SubscribeByID(self, data_type: SubscriptionDataType, identifier: int) -> None:
+        """
+        Args:
+            data_type (SubscriptionDataType): Type of data to subscribe to
+            identifier (int): Streaming ID of the asset
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+            RuntimeError. If the client uses multicast
+        """
+        self._command(
+            self._subscription_command(f"SubscribeByID,{data_type},{identifier}")
+        )
+
+    async def SubscribeByIDAsync(
+        self, data_type: SubscriptionDataType, identifier: int
+    ) -> None:
+        """
+        Args:
+            data_type (SubscriptionDataType): Type of data to subscribe to
+            identifier (int): Streaming ID of the asset
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+            RuntimeError. If the client uses multicast
+        """
+        await self._command_async(
+            self._subscription_command(f"SubscribeByID,{data_type},{identifier}")
+        )
+
+    def UnsubscribeAll(self) -> None:
+        """
+        Stops streaming every data type until a new subscription is made
+
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+            RuntimeError. If the client uses multicast
+        """
+        self.SubscribeToData("AllTypes", "None")
+
+    async def UnsubscribeAllAsync(self) -> None:
+        """
+        Stops streaming every data type until a new subscription is made
+
+        Raises:
+            NatNetClientNotConnectedError. If there is no connection
+            RuntimeError. If the client uses multicast
+        """
+        await self.SubscribeToDataAsync("AllTypes", "None")
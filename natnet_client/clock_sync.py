@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Tuple
+
+from natnet_client.descriptors import FrameSuffix
+from natnet_client.stats import Histogram, exponential_bounds
+
+# 1 us to ~1 s, in nanoseconds
+LATENCY_BOUNDS = exponential_bounds(1_000, 2, 21)
+
+
+@dataclass
+class ClockSync:
+    """
+    Maps Motive's high resolution clock to the host monotonic clock.
+
+    Every frame gives a (transmit tick, receive time) pair whose difference is the
+    clock offset plus the network delay. The minimum of each window of pairs is kept,
+    since it is the one with the least queuing, and a line fitted over the last minima
+    gives offset and drift. Half of the smallest command round trip is removed as the
+    one way network delay.
+
+    Args:
+        frequency: (int). Ticks per second of Motive's clock, `ServerInfo.high_res_clock_frequency`
+        window: (int, optional). Frames per minimum filter window. Defaults to 240
+        history: (int, optional). Number of window minima used for the drift fit. Defaults to 32
+    """
+
+    frequency: int
+    window: int = 240
+    history: int = 32
+
+    _minima: deque[tuple[int, int]] = field(init=False)
+    _window_min: tuple[int, int] | None = field(init=False, default=None)
+    _window_count: int = field(init=False, default=0)
+    _round_trip_ns: int | None = field(init=False, default=None)
+    # Fitted line: host_ns - motive_ns = _offset_ns + _drift * (motive_ns - _origin_ns)
+    _origin_ns: int = field(init=False, default=0)
+    _offset_ns: float | None = field(init=False, default=None)
+    _drift: float = field(init=False, default=0.0)
+
+    def __post_init__(self) -> None:
+        if self.frequency <= 0:
+            raise ValueError("The clock frequency must be positive")
+        self._minima = deque(maxlen=self.history)
+
+    @property
+    def synchronized(self) -> bool:
+        return self._offset_ns is not None
+
+    @property
+    def offset_ns(self) -> float | None:
+        """Host minus Motive time at the last fitted point, network delay removed"""
+        if self._offset_ns is None:
+            return None
+        return self._offset_ns - self.one_way_delay_ns
+
+    @property
+    def drift_ppm(self) -> float:
+        return self._drift * 1e6
+
+    @property
+    def round_trip_ns(self) -> int | None:
+        return self._round_trip_ns
+
+    @property
+    def one_way_delay_ns(self) -> float:
+        return self._round_trip_ns / 2 if self._round_trip_ns is not None else 0.0
+
+    def ticks_to_ns(self, ticks: int) -> int:
+        return ticks * 1_000_000_000 // self.frequency
+
+    def add_round_trip(self, round_trip_ns: int) -> None:
+        if self._round_trip_ns is None or round_trip_ns < self._round_trip_ns:
+            self._round_trip_ns = round_trip_ns
+
+    def add_sample(self, motive_ticks: int, host_ns: int) -> None:
+        """
+        Args:
+            motive_ticks (int): Motive clock when the packet was sent, `FrameSuffix.stamp_transmit`
+            host_ns (int): Host monotonic clock when the packet was received
+        """
+        motive_ns = self.ticks_to_ns(motive_ticks)
+        difference = host_ns - motive_ns
+        if self._window_min is None or difference < self._window_min[1]:
+            self._window_min = (motive_ns, difference)
+        self._window_count += 1
+        if not self._minima:
+            # Provisional estimate until the first window is complete
+            self._origin_ns = self._window_min[0]
+            self._offset_ns = float(self._window_min[1])
+        if self._window_count >= self.window:
+            self._minima.append(self._window_min)
+            self._window_min = None
+            self._window_count = 0
+            self._fit()
+
+    def _fit(self) -> None:
+        origin = self._minima[-1][0]
+        n = len(self._minima)
+        xs = [motive_ns - origin for motive_ns, _ in self._minima]
+        ys = [difference for _, difference in self._minima]
+        mean_x = sum(xs) / n
+        mean_y = sum(ys) / n
+        variance = sum((x - mean_x) ** 2 for x in xs)
+        drift = 0.0
+        if variance > 0:
+            drift = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+        self._origin_ns = origin
+        self._drift = drift
+        self._offset_ns = mean_y - drift * mean_x
+
+    def to_host_ns(self, motive_ticks: int) -> int | None:
+        """Host monotonic time of a Motive clock tick, None before the first sample"""
+        if self._offset_ns is None:
+            return None
+        motive_ns = self.ticks_to_ns(motive_ticks)
+        return round(
+            motive_ns
+            + self._offset_ns
+            + self._drift * (motive_ns - self._origin_ns)
+            - self.one_way_delay_ns
+        )
+
+
+@dataclass(frozen=True)
+class FrameTiming:
+    """
+    Host monotonic times, in nanoseconds, of one frame through the pipeline.
+    Motive side times are None while the clock is not synchronized
+    """
+
+    exposure_ns: int | None
+    data_ns: int | None
+    transmit_ns: int | None
+    received_ns: int
+    decoded_ns: int
+
+
+@dataclass(frozen=True)
+class LatencyStats:
+    exposure_to_transmit: Histogram
+    transmit_to_receive: Histogram
+    receive_to_decode: Histogram
+    decode_to_deliver: Histogram
+    exposure_to_deliver: Histogram
+
+    @classmethod
+    def empty(cls) -> LatencyStats:
+        return cls(*(Histogram(LATENCY_BOUNDS) for _ in range(5)))
+
+    def histograms(self) -> Tuple[Histogram, ...]:
+        return (
+            self.exposure_to_transmit,
+            self.transmit_to_receive,
+            self.receive_to_decode,
+            self.decode_to_deliver,
+            self.exposure_to_deliver,
+        )
+
+    def copy(self) -> LatencyStats:
+        return LatencyStats(*(histogram.copy() for histogram in self.histograms()))
+
+
+@dataclass
+class LatencyTracker:
+    """
+    Rolling latency histograms for each step of exposure→transmit→receive→decode→deliver
+
+    Args:
+        window_ns: (int, optional). Length of the windows the recent histograms are kept for. Defaults to 10 s
+
+    The recent histograms cover the current window and the previous complete one,
+    so between one and two windows, and are swapped out by the frames. The total
+    histograms cover every frame since the creation or the last `clear`.
+    """
+
+    window_ns: int = 10_000_000_000
+
+    _total: LatencyStats = field(
+        init=False, default_factory=LatencyStats.empty, repr=False
+    )
+    _current: LatencyStats = field(
+        init=False, default_factory=LatencyStats.empty, repr=False
+    )
+    _previous: LatencyStats = field(
+        init=False, default_factory=LatencyStats.empty, repr=False
+    )
+    _window_start_ns: int | None = field(init=False, default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.window_ns <= 0:
+            raise ValueError("The window must be positive")
+
+    def _rotate(self, now_ns: int) -> None:
+        if self._window_start_ns is None:
+            self._window_start_ns = now_ns
+            return
+        elapsed_ns = now_ns - self._window_start_ns
+        if elapsed_ns < self.window_ns:
+            return
+        # Nothing arrived during the previous window if more than one went by
+        self._previous = (
+            self._current if elapsed_ns < 2 * self.window_ns else LatencyStats.empty()
+        )
+        self._current = LatencyStats.empty()
+        self._window_start_ns = now_ns
+
+    def _add(self, name: str, value: int) -> None:
+        getattr(self._total, name).add(value)
+        getattr(self._current, name).add(value)
+
+    def update(
+        self,
+        suffix: FrameSuffix,
+        clock_sync: ClockSync | None,
+        received_ns: int,
+        decoded_ns: int,
+    ) -> FrameTiming:
+        self._rotate(received_ns)
+        exposure_ns = data_ns = transmit_ns = None
+        if clock_sync is not None:
+            self._add(
+                "exposure_to_transmit",
+                clock_sync.ticks_to_ns(
+                    suffix.stamp_transmit - suffix.camera_mid_exposure
+                ),
+            )
+            if clock_sync.synchronized:
+                exposure_ns = clock_sync.to_host_ns(suffix.camera_mid_exposure)
+                data_ns = clock_sync.to_host_ns(suffix.stamp_data)
+                transmit_ns = clock_sync.to_host_ns(suffix.stamp_transmit)
+                self._add("transmit_to_receive", received_ns - transmit_ns)  # type: ignore
+        self._add("receive_to_decode", decoded_ns - received_ns)
+        return FrameTiming(exposure_ns, data_ns, transmit_ns, received_ns, decoded_ns)
+
+    def delivered(self, timing: FrameTiming, delivered_ns: int) -> None:
+        self._add("decode_to_deliver", delivered_ns - timing.decoded_ns)
+        if timing.exposure_ns is not None:
+            self._add("exposure_to_deliver", delivered_ns - timing.exposure_ns)
+
+    def stats(self) -> LatencyStats:
+        """Histograms of the last one to two windows"""
+        stats = self._previous.copy()
+        for histogram, current in zip(stats.histograms(), self._current.histograms()):
+            histogram.merge(current)
+        return stats
+
+    def total_stats(self) -> LatencyStats:
+        """Histograms of every frame since the creation or the last `clear`"""
+        return self._total.copy()
+
+    def clear(self) -> None:
+        self._total = LatencyStats.empty()
+        self._current = LatencyStats.empty()
+        self._previous = LatencyStats.empty()
+        self._window_start_ns = None
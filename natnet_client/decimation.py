@@ -0,0 +1,165 @@
+"""
+Rate limited delivery of frames for consumers slower than the mocap rate.
+
+A `RateLimitedListener` calls its listener at most `rate` times per second, on a
+fixed grid of host receive times. In "latest" mode it gets the first frame of every
+interval and needs none of the frames in between, so the client can skip decoding
+them, see `NatNetParams.decode_all_frames`. In "average" mode it gets the last frame
+of every interval with the rigid body and bone poses averaged over the interval.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Literal, Tuple
+
+from natnet_client.bytes_data import Position, Quaternion
+from natnet_client.clock_sync import FrameTiming
+from natnet_client.descriptors import MoCapDescription
+from natnet_client.mo_cap_data import RigidBody, RigidBodyData, Skeleton, SkeletonData
+
+DecimationMode = Literal["latest", "average"]
+
+
+@dataclass
+class _PoseSum:
+    """Sum of the tracked poses of one rigid body or bone"""
+
+    count: int = 0
+    # x, y, z, qx, qy, qz, qw and error, summed in place
+    sums: List[float] = field(default_factory=lambda: [0.0] * 8)
+
+    def add(self, body: RigidBody) -> None:
+        pos, rot, sums = body.pos, body.rot, self.sums
+        # q and -q are the same orientation, keep every sample on the side of the sum
+        sign = (
+            -1.0
+            if sums[3] * rot.x + sums[4] * rot.y + sums[5] * rot.z + sums[6] * rot.w
+            < 0.0
+            else 1.0
+        )
+        self.count += 1
+        sums[0] += pos.x
+        sums[1] += pos.y
+        sums[2] += pos.z
+        sums[3] += sign * rot.x
+        sums[4] += sign * rot.y
+        sums[5] += sign * rot.z
+        sums[6] += sign * rot.w
+        sums[7] += body.err
+
+    def mean(self, body: RigidBody) -> RigidBody:
+        """`body` with the averaged pose, unchanged if no pose was tracked"""
+        if not self.count:
+            return body
+        sums = self.sums
+        norm = math.sqrt(sum(value * value for value in sums[3:7])) or 1.0
+        return RigidBody(
+            body.identifier,
+            Position(sums[0] / self.count, sums[1] / self.count, sums[2] / self.count),
+            Quaternion(sums[3] / norm, sums[4] / norm, sums[5] / norm, sums[6] / norm),
+            sums[7] / self.count,
+            True,
+        )
+
+
+@dataclass
+class RateLimitedListener:
+    """
+    Args:
+        listener: (Callable[[MoCapDescription, FrameTiming], None]). Called with the delivered frames
+        rate: (float). Deliveries per second at most
+        mode: (DecimationMode, optional). "latest" delivers the first frame of every interval, "average" the poses averaged over the interval. Defaults to "latest"
+
+    Raises:
+        ValueError. If the rate is not positive or the mode is unknown
+
+    Example:
+        >>> dashboard = client.add_rate_limited_listener(draw, 30.0)
+        >>> logger = client.add_rate_limited_listener(log, 10.0, "average")
+        >>> client.remove_rate_limited_listener(dashboard)
+    """
+
+    listener: Callable[[MoCapDescription, FrameTiming], None]
+    rate: float
+    mode: DecimationMode = "latest"
+
+    delivered: int = field(init=False, default=0)
+    _period_ns: int = field(init=False, repr=False)
+    _next_ns: int | None = field(init=False, default=None, repr=False)
+    _rigid_bodies: Dict[int, _PoseSum] = field(init=False, repr=False)
+    # Keyed by skeleton id and bone id
+    _bones: Dict[Tuple[int, int], _PoseSum] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if not self.rate > 0:
+            raise ValueError("The rate must be positive")
+        if self.mode not in ("latest", "average"):
+            raise ValueError(f"Unknown decimation mode {self.mode!r}")
+        self._period_ns = round(1e9 / self.rate)
+        self._rigid_bodies = {}
+        self._bones = {}
+
+    def _due(self, received_ns: int) -> bool:
+        return self._next_ns is None or received_ns >= self._next_ns
+
+    def wants(self, received_ns: int) -> bool:
+        """Whether the frame received at `received_ns` must be decoded for this listener"""
+        return self.mode == "average" or self._due(received_ns)
+
+    def _accumulate(self, frame: MoCapDescription) -> None:
+        for body in frame.rigid_body_data.rigid_bodies:
+            if body.tracking:
+                self._rigid_bodies.setdefault(body.identifier, _PoseSum()).add(body)
+        for skeleton in frame.skeleton_data.skeletons:
+            for bone in skeleton.rigid_bodies:
+                if bone.tracking:
+                    key = (skeleton.identifier, bone.identifier)
+                    self._bones.setdefault(key, _PoseSum()).add(bone)
+
+    def _averaged(self, frame: MoCapDescription) -> MoCapDescription:
+        empty = _PoseSum()
+        rigid_bodies = tuple(
+            self._rigid_bodies.get(body.identifier, empty).mean(body)
+            for body in frame.rigid_body_data.rigid_bodies
+        )
+        skeletons = tuple(
+            Skeleton(
+                skeleton.identifier,
+                skeleton.num_rigid_bodies,
+                tuple(
+                    self._bones.get((skeleton.identifier, bone.identifier), empty).mean(
+                        bone
+                    )
+                    for bone in skeleton.rigid_bodies
+                ),
+            )
+            for skeleton in frame.skeleton_data.skeletons
+        )
+        self._rigid_bodies.clear()
+        self._bones.clear()
+        return dataclasses.replace(
+            frame,
+            rigid_body_data=RigidBodyData(len(rigid_bodies), rigid_bodies),
+            skeleton_data=SkeletonData(len(skeletons), skeletons),
+        )
+
+    def __call__(self, frame: MoCapDescription, timing: FrameTiming) -> None:
+        if self.mode == "average":
+            self._accumulate(frame)
+        received_ns = timing.received_ns
+        if not self._due(received_ns):
+            return
+        # Ticks stay on a fixed grid so receive jitter does not lower the rate,
+        # a consumer that fell a whole interval behind starts a new grid
+        self._next_ns = (
+            received_ns if self._next_ns is None else self._next_ns
+        ) + self._period_ns
+        if self._next_ns <= received_ns:
+            self._next_ns = received_ns + self._period_ns
+        if self.mode == "average":
+            frame = self._averaged(frame)
+        self.delivered += 1
+        self.listener(frame, timing)
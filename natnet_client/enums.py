@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntFlag
 
 
 class NatData(Enum):
@@ -34,4 +34,24 @@ class NatMessages(Enum):
 
     @classmethod
     def _missing_(cls, value):
-        return cls.UNDEFINED
\ No newline at end of file
+        return cls.UNDEFINED
+
+
+class FrameFlags(IntFlag):
+    # Frame sequence flags, see natnet_client.stats.FrameSequenceTracker
+    NONE = 0
+    GAP = 1
+    DUPLICATE = 2
+    OUT_OF_ORDER = 4
+    RESET = 8
+
+
+class MarkerFlags(IntFlag):
+    # LabeledMarker.param bits
+    NONE = 0
+    OCCLUDED = 1
+    POINT_CLOUD_SOLVED = 2
+    MODEL_SOLVED = 4
+    HAS_MODEL = 8
+    UNLABELED = 16
+    ACTIVE = 32
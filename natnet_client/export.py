@@ -0,0 +1,428 @@
+"""
+Columnar export of rigid body and labeled marker trajectories, requires numpy.
+
+Rows are buffered per rigid body and per marker and written every `chunk_frames`
+frames, so memory use does not grow with the session length. Chunks are written by
+a background thread, so frame listeners never wait on the disk.
+
+"npy" layout, every column is a `.npy` file appended to at each chunk, load it with
+`numpy.load(path, mmap_mode="r")`:
+    frames/{frame_number,timestamp,received_ns}.npy
+    rigid_bodies/<id>/{frame_number,timestamp,received_ns,pos,rot,err,tracking}.npy
+    markers/<id>/{frame_number,timestamp,received_ns,pos,size,residual,param}.npy
+
+"npz" layout, one `chunk_<n>.npz` per chunk with the same columns as members,
+e.g. `rigid_bodies/<id>/pos`.
+
+`timestamp` is Motive's frame timestamp in seconds and `received_ns` the host
+monotonic receive time.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import struct
+import threading
+from dataclasses import dataclass, field
+from typing import Any, ClassVar, Dict, List, Literal, Tuple
+
+try:
+    import numpy
+    from numpy.lib import format as npy_format
+except ImportError as error:
+    raise ImportError(
+        "The trajectory export requires numpy, `pip install new-natnet-client[numpy]`"
+    ) from error
+
+from natnet_client.capture import MappedCapture
+from natnet_client.clock_sync import FrameTiming
+from natnet_client.client import NatNetClient
+from natnet_client.descriptors import MoCapDescription
+from natnet_client.parallel import ordered_map
+
+FRAME_DTYPE = numpy.dtype(
+    [("frame_number", "<i4"), ("timestamp", "<f8"), ("received_ns", "<i8")]
+)
+RIGID_BODY_DTYPE = numpy.dtype(
+    FRAME_DTYPE.descr
+    + [("pos", "<f4", (3,)), ("rot", "<f4", (4,)), ("err", "<f4"), ("tracking", "?")]
+)
+MARKER_DTYPE = numpy.dtype(
+    FRAME_DTYPE.descr
+    + [("pos", "<f4", (3,)), ("size", "<f4"), ("residual", "<f4"), ("param", "<i2")]
+)
+
+# Fixed size `.npy` header, rewritten in place as the column grows
+_NPY_HEADER_SIZE = 128
+
+FileFormat = Literal["npy", "npz"]
+
+# Columns of one chunk and its frame count
+_Chunk = Tuple[Dict[str, numpy.ndarray], int]
+
+
+def _npy_header(dtype: numpy.dtype, shape: Tuple[int, ...]) -> bytes:
+    header = repr(
+        {
+            "descr": npy_format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": shape,
+        }
+    ).encode("latin1")
+    header = header.ljust(_NPY_HEADER_SIZE - 11) + b"\n"
+    return (
+        npy_format.MAGIC_PREFIX + b"\x01\x00" + struct.pack("<H", len(header)) + header
+    )
+
+
+def _append_npy(path: str, column: numpy.ndarray) -> None:
+    """Appends rows to a `.npy` file, created if needed, and updates its shape"""
+    if not os.path.exists(path):
+        with open(path, "wb") as file:
+            file.write(_npy_header(column.dtype, (0, *column.shape[1:])))
+    with open(path, "r+b") as file:
+        file.seek(0, os.SEEK_END)
+        file.write(numpy.ascontiguousarray(column).tobytes())
+        rows = (file.tell() - _NPY_HEADER_SIZE) // (
+            column.dtype.itemsize * max(int(numpy.prod(column.shape[1:])), 1)
+        )
+        file.seek(0)
+        file.write(_npy_header(column.dtype, (rows, *column.shape[1:])))
+
+
+@dataclass
+class _TrajectoryRows:
+    """Rows of one chunk, per rigid body and per marker"""
+
+    markers: bool = True
+
+    frames: List[Tuple[int, float, int]] = field(init=False, default_factory=list)
+    rigid_body_rows: Dict[int, List[Tuple[Any, ...]]] = field(
+        init=False, default_factory=dict
+    )
+    marker_rows: Dict[int, List[Tuple[Any, ...]]] = field(
+        init=False, default_factory=dict
+    )
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def add(self, frame: MoCapDescription, received_ns: int) -> None:
+        frame_number = frame.prefix_data.frame_number
+        timestamp = frame.suffix_data.timestamp
+        self.frames.append((frame_number, timestamp, received_ns))
+        for rigid_body in frame.rigid_body_data.rigid_bodies:
+            pos, rot = rigid_body.pos, rigid_body.rot
+            self.rigid_body_rows.setdefault(rigid_body.identifier, []).append(
+                (
+                    frame_number,
+                    timestamp,
+                    received_ns,
+                    (pos.x, pos.y, pos.z),
+                    (rot.x, rot.y, rot.z, rot.w),
+                    rigid_body.err,
+                    rigid_body.tracking,
+                )
+            )
+        if self.markers:
+            for marker in frame.labeled_marker_data.markers:
+                pos = marker.pos
+                self.marker_rows.setdefault(marker.identifier, []).append(
+                    (
+                        frame_number,
+                        timestamp,
+                        received_ns,
+                        (pos.x, pos.y, pos.z),
+                        marker.size,
+                        marker.residual,
+                        marker.param,
+                    )
+                )
+
+    def columns(self) -> Dict[str, numpy.ndarray]:
+        columns: Dict[str, numpy.ndarray] = {}
+        table = numpy.array(self.frames, dtype=FRAME_DTYPE)
+        for name in FRAME_DTYPE.names:  # type: ignore
+            columns[f"frames/{name}"] = table[name]
+        for group, rows_by_id, dtype in (
+            ("rigid_bodies", self.rigid_body_rows, RIGID_BODY_DTYPE),
+            ("markers", self.marker_rows, MARKER_DTYPE),
+        ):
+            for identifier, rows in rows_by_id.items():
+                table = numpy.array(rows, dtype=dtype)
+                for name in dtype.names:
+                    columns[f"{group}/{identifier}/{name}"] = table[name]
+        return columns
+
+    def clear(self) -> None:
+        self.frames.clear()
+        self.rigid_body_rows.clear()
+        self.marker_rows.clear()
+
+
+@dataclass
+class TrajectoryExporter:
+    """
+    Args:
+        directory: (str | os.PathLike). Output directory, created if needed
+        chunk_frames: (int, optional). Frames buffered before each write. Defaults to 4096
+        file_format: (FileFormat, optional). "npy" columns or "npz" chunks. Defaults to "npy"
+        markers: (bool, optional). Export labeled markers besides rigid bodies. Defaults to True
+        max_pending_chunks: (int, optional). Chunks waiting for the writer thread before `add` blocks. Defaults to 4
+
+    The writer thread starts with the first chunk and is a daemon, so an exporter
+    that is never closed does not keep the interpreter alive, but loses the frames
+    `close` would have written.
+
+    Example:
+        >>> with TrajectoryExporter("session") as exporter:
+        >>>     exporter.attach(client)
+        >>>     ...
+        >>> trajectories = load_trajectories("session")
+        >>> trajectories.rigid_bodies[1]["pos"]
+    """
+
+    logger: ClassVar[logging.Logger] = logging.getLogger("NatNet-Export")
+
+    directory: str | os.PathLike[str]
+    chunk_frames: int = 4096
+    file_format: FileFormat = "npy"
+    markers: bool = True
+    max_pending_chunks: int = 4
+
+    _rows: _TrajectoryRows = field(init=False)
+    _chunks: int = field(init=False, default=0)
+    # Frames written to disk, and handed to the writer thread
+    _total_frames: int = field(init=False, default=0)
+    _queued_frames: int = field(init=False, default=0)
+    _pending: queue.Queue[_TrajectoryRows | _Chunk | None] = field(init=False)
+    _thread: threading.Thread | None = field(init=False, default=None)
+    _closed: bool = field(init=False, default=False)
+    _clients: List[NatNetClient] = field(init=False, default_factory=list)
+    # Frames come from the client receive thread, `close` from the user's
+    _lock: threading.RLock = field(init=False, default_factory=threading.RLock)
+
+    def __post_init__(self) -> None:
+        if self.chunk_frames <= 0:
+            raise ValueError("A chunk must hold at least one frame")
+        if self.file_format not in ("npy", "npz"):
+            raise ValueError(f"Unknown file format {self.file_format}")
+        if os.path.isdir(self.directory) and os.listdir(self.directory):
+            raise FileExistsError(f"{self.directory} is not empty")
+        os.makedirs(self.directory, exist_ok=True)
+        self._rows = _TrajectoryRows(self.markers)
+        self._pending = queue.Queue(maxsize=max(self.max_pending_chunks, 1))
+
+    @property
+    def frames(self) -> int:
+        """Frames added so far"""
+        return self._queued_frames + len(self._rows)
+
+    def add(self, frame: MoCapDescription, received_ns: int = 0) -> None:
+        with self._lock:
+            self._add(frame, received_ns)
+
+    def _add(self, frame: MoCapDescription, received_ns: int) -> None:
+        self._rows.add(frame, received_ns)
+        if len(self._rows) >= self.chunk_frames:
+            self._flush()
+
+    def _on_frame(self, frame: MoCapDescription, timing: FrameTiming) -> None:
+        self.add(frame, timing.received_ns)
+
+    def attach(self, client: NatNetClient) -> None:
+        """Exports every frame decoded by `client` until `detach` or `close`"""
+        client.add_frame_listener(self._on_frame)
+        self._clients.append(client)
+
+    def detach(self, client: NatNetClient) -> None:
+        client.remove_frame_listener(self._on_frame)
+        self._clients.remove(client)
+
+    def flush(self) -> None:
+        """Writes the buffered frames, even if the chunk is not full, and waits for the disk"""
+        with self._lock:
+            self._flush()
+        self._pending.join()
+
+    def _flush(self) -> None:
+        if len(self._rows):
+            # The writer thread owns the rows from now on, new frames go to new rows
+            self._submit(self._rows, len(self._rows))
+            self._rows = _TrajectoryRows(self.markers)
+
+    def _submit(self, chunk: _TrajectoryRows | _Chunk, frames: int) -> None:
+        if self._closed:
+            raise RuntimeError("The exporter is closed")
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._writer, name="NatNet-Export", daemon=True
+            )
+            self._thread.start()
+        self._queued_frames += frames
+        self._pending.put(chunk)
+
+    def _writer(self) -> None:
+        while True:
+            chunk = self._pending.get()
+            try:
+                if chunk is None:
+                    return
+                if isinstance(chunk, _TrajectoryRows):
+                    self._write(chunk.columns(), len(chunk))
+                else:
+                    self._write(*chunk)
+            except Exception:
+                self.logger.exception("Writing chunk %i failed", self._chunks)
+            finally:
+                self._pending.task_done()
+
+    def _write(self, columns: Dict[str, numpy.ndarray], frames: int) -> None:
+        if self.file_format == "npz":
+            path = os.path.join(self.directory, f"chunk_{self._chunks:06d}.npz")
+            numpy.savez(path, **columns)
+        else:
+            for key, column in columns.items():
+                path = os.path.join(self.directory, *key.split("/"))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                _append_npy(path + ".npy", column)
+        self._chunks += 1
+        self._total_frames += frames
+
+    def close(self) -> None:
+        """Writes the buffered frames and stops the writer thread"""
+        for client in tuple(self._clients):
+            self.detach(client)
+        with self._lock:
+            if self._closed:
+                return
+            self._flush()
+            self._closed = True
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._pending.put(None)
+        if thread is not None:
+            thread.join()
+        self.logger.info(
+            "Exported %i frames to %s in %i chunks",
+            self._total_frames,
+            self.directory,
+            self._chunks,
+        )
+
+    def __enter__(self) -> TrajectoryExporter:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+@dataclass
+class Trajectories:
+    """Columns of an export, keyed by column name, see the module docstring"""
+
+    frames: Dict[str, numpy.ndarray]
+    rigid_bodies: Dict[int, Dict[str, numpy.ndarray]]
+    markers: Dict[int, Dict[str, numpy.ndarray]]
+
+
+def load_trajectories(
+    directory: str | os.PathLike[str], mmap: bool = True
+) -> Trajectories:
+    """
+    Loads an export, "npy" columns are memory mapped unless `mmap` is False and
+    "npz" chunks are concatenated
+    """
+    trajectories = Trajectories({}, {}, {})
+    chunks = sorted(
+        name
+        for name in os.listdir(directory)
+        if name.startswith("chunk_") and name.endswith(".npz")
+    )
+    if chunks:
+        parts: Dict[str, List[numpy.ndarray]] = {}
+        for chunk in chunks:
+            with numpy.load(os.path.join(directory, chunk)) as data:
+                for key in data.files:
+                    parts.setdefault(key, []).append(data[key])
+        columns = {key: numpy.concatenate(arrays) for key, arrays in parts.items()}
+    else:
+        columns = {}
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(".npy"):
+                    path = os.path.join(root, name)
+                    key = os.path.relpath(path, directory)[: -len(".npy")]
+                    columns[key.replace(os.sep, "/")] = numpy.load(
+                        path, mmap_mode="r" if mmap else None
+                    )
+    for key, column in columns.items():
+        group, *rest = key.split("/")
+        if group == "frames":
+            trajectories.frames[rest[0]] = column
+        else:
+            identifier, name = int(rest[0]), rest[1]
+            getattr(trajectories, group).setdefault(identifier, {})[name] = column
+    return trajectories
+
+
+# Capture opened once per worker process of a parallel export
+_worker_capture: MappedCapture | None = None
+_worker_markers: bool = True
+
+
+def _open_worker_capture(path: str | os.PathLike[str], markers: bool) -> None:
+    global _worker_capture, _worker_markers
+    _worker_capture = MappedCapture(path)
+    _worker_markers = markers
+
+
+def _export_chunk(bounds: Tuple[int, int]) -> Tuple[Dict[str, numpy.ndarray], int]:
+    capture: MappedCapture = _worker_capture  # type: ignore
+    rows = _TrajectoryRows(_worker_markers)
+    for index in range(*bounds):
+        rows.add(capture.frame_at(index), capture.timestamp(index))
+    return rows.columns(), len(rows)
+
+
+def export_capture(
+    capture_path: str | os.PathLike[str],
+    directory: str | os.PathLike[str],
+    chunk_frames: int = 4096,
+    file_format: FileFormat = "npy",
+    markers: bool = True,
+    workers: int | None = 1,
+) -> int:
+    """
+    Exports every frame of a capture file, `received_ns` is the recorded receive time.
+    With several workers each chunk is decoded in its own process and the chunks
+    are written in frame order, the result is the same as with one worker.
+
+    Args:
+        workers: (int | None, optional). Decoding processes, None for one per CPU. Defaults to 1
+
+    Returns:
+        int: Frames exported
+    """
+    with MappedCapture(capture_path) as capture, TrajectoryExporter(
+        directory, chunk_frames, file_format, markers
+    ) as exporter:
+        if workers == 1:
+            for index in range(len(capture)):
+                exporter.add(capture.frame_at(index), capture.timestamp(index))
+        else:
+            bounds = [
+                (start, min(start + chunk_frames, len(capture)))
+                for start in range(0, len(capture), chunk_frames)
+            ]
+            for columns, frames in ordered_map(
+                _export_chunk,
+                bounds,
+                workers,
+                _open_worker_capture,
+                (capture_path, markers),
+            ):
+                exporter._submit((columns, frames), frames)
+    return exporter.frames
@@ -0,0 +1,528 @@
+"""
+Vectorized smoothing of the pose of every rigid body, requires numpy.
+
+A filter keeps the state of all the rigid bodies in arrays and updates them in one
+batched pass per frame, with parameters per rigid body. Rigid bodies that are not
+tracked are predicted at their estimated velocity for at most `max_prediction_ns`
+after their last measurement, then held until they are tracked again.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Any, ClassVar, Dict, List, Tuple
+
+try:
+    import numpy
+except ImportError as error:
+    raise ImportError(
+        "The pose filters require numpy, `pip install new-natnet-client[numpy]`"
+    ) from error
+
+from natnet_client.bytes_data import Position, Quaternion
+from natnet_client.clock_sync import FrameTiming
+from natnet_client.client import NatNetClient
+from natnet_client.descriptors import MoCapDescription
+from natnet_client.history import PoseBatch
+from natnet_client.mo_cap_data import RigidBody, RigidBodyData
+from natnet_client.quaternions import (
+    conjugate,
+    from_rotation_vector,
+    multiply,
+    normalize,
+    to_rotation_vector,
+)
+
+
+@dataclass(frozen=True)
+class OneEuroParameters:
+    """
+    Args:
+        min_cutoff: (float, optional). Cutoff frequency in Hz of the positions at rest, lower is smoother. Defaults to 1.0
+        beta: (float, optional). Cutoff increase per unit of speed, higher lags less while moving. Defaults to 0.0
+        derivative_cutoff: (float, optional). Cutoff frequency in Hz of the speed estimates. Defaults to 1.0
+        rotation_min_cutoff: (float, optional). Cutoff frequency in Hz of the orientations at rest. Defaults to 1.0
+        rotation_beta: (float, optional). Cutoff increase per radian per second. Defaults to 0.0
+    """
+
+    min_cutoff: float = 1.0
+    beta: float = 0.0
+    derivative_cutoff: float = 1.0
+    rotation_min_cutoff: float = 1.0
+    rotation_beta: float = 0.0
+
+
+@dataclass(frozen=True)
+class KalmanParameters:
+    """
+    Args:
+        acceleration_noise: (float, optional). Spectral density of the random acceleration in units²/s³, higher follows faster changes of velocity. Defaults to 10.0
+        measurement_noise: (float, optional). Variance of the measured positions in units². Defaults to 1e-6
+        angular_acceleration_noise: (float, optional). Spectral density of the random angular acceleration in rad²/s³. Defaults to 10.0
+        rotation_measurement_noise: (float, optional). Variance of the measured orientations in rad². Defaults to 1e-4
+    """
+
+    acceleration_noise: float = 10.0
+    measurement_noise: float = 1e-6
+    angular_acceleration_noise: float = 10.0
+    rotation_measurement_noise: float = 1e-4
+
+
+@dataclass
+class PoseFilter:
+    """
+    Base of the rigid body filters. Subclasses implement `_correct`, and extend
+    `_reset` and `_predict` when they keep more state than the pose and velocities.
+
+    Args:
+        parameters: (optional). Parameters of the rigid bodies without their own, see `set_parameters`. Defaults to the default parameters of the filter
+        max_prediction_ns: (int, optional). Longest prediction of a rigid body that is not tracked. Defaults to 100 ms
+
+    Frames are timed with their Motive timestamp unless `update` is given another time.
+    """
+
+    parameters: Any = None
+    max_prediction_ns: int = 100_000_000
+    parameters_type: ClassVar[type]
+    # Columns of `_state` used by the subclass
+    state_columns: ClassVar[int] = 0
+
+    _rows: Dict[int, int] = field(init=False, default_factory=dict)
+    _overrides: Dict[int, Any] = field(init=False, default_factory=dict)
+    _initialized: numpy.ndarray = field(init=False, repr=False)
+    _times_ns: numpy.ndarray = field(init=False, repr=False)
+    _measured_ns: numpy.ndarray = field(init=False, repr=False)
+    _pos: numpy.ndarray = field(init=False, repr=False)
+    _rot: numpy.ndarray = field(init=False, repr=False)
+    _velocity: numpy.ndarray = field(init=False, repr=False)
+    _angular_velocity: numpy.ndarray = field(init=False, repr=False)
+    _parameters: numpy.ndarray = field(init=False, repr=False)
+    _state: numpy.ndarray = field(init=False, repr=False)
+    _clients: List[NatNetClient] = field(init=False, default_factory=list)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self) -> None:
+        if self.parameters is None:
+            self.parameters = self.parameters_type()
+        self._check(self.parameters)
+        self._allocate(8)
+
+    def _check(self, parameters: Any) -> None:
+        if not isinstance(parameters, self.parameters_type):
+            raise TypeError(
+                f"{type(self).__name__} expects {self.parameters_type.__name__}"
+            )
+
+    def _allocate(self, bodies: int) -> None:
+        """Allocates room for `bodies` rigid bodies, keeping the current state"""
+        arrays = (
+            numpy.zeros(bodies, dtype=bool),
+            numpy.zeros(bodies, dtype=numpy.int64),
+            numpy.zeros(bodies, dtype=numpy.int64),
+            numpy.zeros((bodies, 3)),
+            numpy.zeros((bodies, 4)),
+            numpy.zeros((bodies, 3)),
+            numpy.zeros((bodies, 3)),
+            numpy.zeros((bodies, len(dataclasses.fields(self.parameters_type)))),
+            numpy.zeros((bodies, self.state_columns)),
+        )
+        if self._rows:
+            current = len(self._initialized)
+            for new, old in zip(arrays, self._arrays()):
+                new[:current] = old
+        (
+            self._initialized,
+            self._times_ns,
+            self._measured_ns,
+            self._pos,
+            self._rot,
+            self._velocity,
+            self._angular_velocity,
+            self._parameters,
+            self._state,
+        ) = arrays
+
+    def _arrays(self) -> Tuple[numpy.ndarray, ...]:
+        return (
+            self._initialized,
+            self._times_ns,
+            self._measured_ns,
+            self._pos,
+            self._rot,
+            self._velocity,
+            self._angular_velocity,
+            self._parameters,
+            self._state,
+        )
+
+    def _row(self, identifier: int) -> int:
+        row = self._rows.get(identifier)
+        if row is None:
+            row = len(self._rows)
+            if row == len(self._initialized):
+                self._allocate(2 * row)
+            self._rows[identifier] = row
+            self._parameters[row] = dataclasses.astuple(
+                self._overrides.get(identifier, self.parameters)
+            )
+        return row
+
+    def set_parameters(self, parameters: Any, identifier: int | None = None) -> None:
+        """
+        Parameters of one rigid body, or of every rigid body without its own if
+        `identifier` is None. They can be set before the rigid body is seen.
+
+        Raises:
+            TypeError. If `parameters` are not the parameters of this filter
+        """
+        self._check(parameters)
+        with self._lock:
+            if identifier is not None:
+                self._overrides[identifier] = parameters
+                row = self._rows.get(identifier)
+                if row is not None:
+                    self._parameters[row] = dataclasses.astuple(parameters)
+                return
+            self.parameters = parameters
+            for other, row in self._rows.items():
+                if other not in self._overrides:
+                    self._parameters[row] = dataclasses.astuple(parameters)
+
+    def parameters_of(self, identifier: int) -> Any:
+        return self._overrides.get(identifier, self.parameters)
+
+    def update(
+        self, frame: MoCapDescription, timestamp_ns: int | None = None
+    ) -> PoseBatch:
+        """
+        Filters the pose of every rigid body of `frame`, row `i` of the result is
+        `frame.rigid_body_data.rigid_bodies[i]`. Rows predicted through a dropout are
+        `extrapolated`, rows not tracked for longer than `max_prediction_ns`, or never
+        tracked, are not `valid` and hold the last estimate, or the frame pose.
+        """
+        rigid_bodies = frame.rigid_body_data.rigid_bodies
+        if timestamp_ns is None:
+            timestamp_ns = round(frame.suffix_data.timestamp * 1e9)
+        values = numpy.array(
+            [
+                (
+                    rigid_body.identifier,
+                    rigid_body.pos.x,
+                    rigid_body.pos.y,
+                    rigid_body.pos.z,
+                    rigid_body.rot.x,
+                    rigid_body.rot.y,
+                    rigid_body.rot.z,
+                    rigid_body.rot.w,
+                    rigid_body.tracking,
+                )
+                for rigid_body in rigid_bodies
+            ]
+        ).reshape(-1, 9)
+        identifiers = values[:, 0].astype(numpy.int64)
+        pos = values[:, 1:4]
+        rot = normalize(values[:, 4:8])
+        tracking = values[:, 8] > 0
+        with self._lock:
+            rows = numpy.fromiter(
+                (self._row(rigid_body.identifier) for rigid_body in rigid_bodies),
+                dtype=numpy.intp,
+                count=len(rigid_bodies),
+            )
+            # State older than the prediction horizon is not trusted anymore
+            fresh = self._initialized[rows] & (
+                timestamp_ns - self._measured_ns[rows] <= self.max_prediction_ns
+            )
+            # Duplicated or out of order frames do not change the state
+            elapsed_ns = timestamp_ns - self._times_ns[rows]
+            reset = tracking & ~fresh
+            correct = tracking & fresh & (elapsed_ns > 0)
+            predict = ~tracking & fresh & (elapsed_ns > 0)
+            if correct.all():
+                # Usual case, every rigid body tracked, nothing to select
+                self._correct(rows, elapsed_ns * 1e-9, pos, rot)
+                self._times_ns[rows] = timestamp_ns
+                self._measured_ns[rows] = timestamp_ns
+                filtered_pos, filtered_rot = self._pos[rows], self._rot[rows]
+            else:
+                if reset.any():
+                    self._reset(rows[reset], pos[reset], rot[reset])
+                if correct.any():
+                    self._correct(
+                        rows[correct],
+                        elapsed_ns[correct] * 1e-9,
+                        pos[correct],
+                        rot[correct],
+                    )
+                if predict.any():
+                    self._predict(rows[predict], elapsed_ns[predict] * 1e-9)
+                self._times_ns[rows[reset | correct | predict]] = timestamp_ns
+                measured = rows[reset | correct]
+                self._measured_ns[measured] = timestamp_ns
+                self._initialized[measured] = True
+                known = self._initialized[rows][:, numpy.newaxis]
+                filtered_pos = numpy.where(known, self._pos[rows], pos)
+                filtered_rot = numpy.where(known, self._rot[rows], rot)
+        return PoseBatch(
+            timestamp_ns,
+            identifiers,
+            filtered_pos,
+            filtered_rot,
+            tracking,
+            tracking | fresh,
+            predict,
+        )
+
+    def apply(
+        self, frame: MoCapDescription, timestamp_ns: int | None = None
+    ) -> MoCapDescription:
+        """Copy of `frame` with the filtered rigid body poses, see `update`"""
+        batch = self.update(frame, timestamp_ns)
+        rigid_bodies = tuple(
+            RigidBody(
+                rigid_body.identifier,
+                Position(*pos),
+                Quaternion(*rot),
+                rigid_body.err,
+                rigid_body.tracking,
+            )
+            for rigid_body, pos, rot in zip(
+                frame.rigid_body_data.rigid_bodies,
+                batch.pos.tolist(),
+                batch.rot.tolist(),
+            )
+        )
+        return dataclasses.replace(
+            frame, rigid_body_data=RigidBodyData(len(rigid_bodies), rigid_bodies)
+        )
+
+    def _on_frame(
+        self, frame: MoCapDescription, timing: FrameTiming
+    ) -> MoCapDescription:
+        return self.apply(frame)
+
+    def attach(self, client: NatNetClient) -> None:
+        """Filters the rigid bodies of every frame `client` delivers until `detach`"""
+        client.add_frame_filter(self._on_frame)
+        self._clients.append(client)
+
+    def detach(self, client: NatNetClient) -> None:
+        client.remove_frame_filter(self._on_frame)
+        self._clients.remove(client)
+
+    def reset(self, identifier: int | None = None) -> None:
+        """Forgets the state of one rigid body, or of all of them"""
+        with self._lock:
+            if identifier is None:
+                self._initialized[:] = False
+            elif identifier in self._rows:
+                self._initialized[self._rows[identifier]] = False
+
+    def _reset(
+        self, rows: numpy.ndarray, pos: numpy.ndarray, rot: numpy.ndarray
+    ) -> None:
+        """Starts the state of `rows` at a measured pose, at rest"""
+        self._pos[rows] = pos
+        self._rot[rows] = rot
+        self._velocity[rows] = 0.0
+        self._angular_velocity[rows] = 0.0
+
+    def _predict(self, rows: numpy.ndarray, dt: numpy.ndarray) -> None:
+        """Moves `rows` `dt` seconds ahead at their velocities"""
+        dt = dt[:, numpy.newaxis]
+        self._pos[rows] += self._velocity[rows] * dt
+        self._rot[rows] = normalize(
+            multiply(
+                from_rotation_vector(self._angular_velocity[rows] * dt),
+                self._rot[rows],
+            )
+        )
+
+    def _correct(
+        self,
+        rows: numpy.ndarray,
+        dt: numpy.ndarray,
+        pos: numpy.ndarray,
+        rot: numpy.ndarray,
+    ) -> None:
+        """Updates `rows` with poses measured `dt` seconds after their state"""
+        raise NotImplementedError("Subclasses must implement the _correct method")
+
+
+def _smoothing(dt: numpy.ndarray, cutoff: numpy.ndarray) -> numpy.ndarray:
+    """Factor of an exponential smoothing with a `cutoff` Hz low pass"""
+    rate = 2 * math.pi * cutoff * dt
+    return rate / (rate + 1)
+
+
+@dataclass
+class OneEuroPoseFilter(PoseFilter):
+    """
+    One Euro filter, an exponential smoothing whose cutoff frequency rises with the
+    speed, smooth at rest and responsive in motion. Orientations are smoothed along
+    the rotation between the estimate and the measurement.
+
+    Example:
+        >>> pose_filter = OneEuroPoseFilter(OneEuroParameters(min_cutoff=0.5, beta=2.0))
+        >>> pose_filter.set_parameters(OneEuroParameters(min_cutoff=5.0), identifier=3)
+        >>> pose_filter.attach(client)
+    """
+
+    parameters: OneEuroParameters = field(default_factory=OneEuroParameters)
+    parameters_type: ClassVar[type] = OneEuroParameters
+    # Last measured position and orientation, speeds are derived from the raw poses
+    state_columns: ClassVar[int] = 7
+
+    def _reset(
+        self, rows: numpy.ndarray, pos: numpy.ndarray, rot: numpy.ndarray
+    ) -> None:
+        super()._reset(rows, pos, rot)
+        self._state[rows, 0:3] = pos
+        self._state[rows, 3:7] = rot
+
+    def _predict(self, rows: numpy.ndarray, dt: numpy.ndarray) -> None:
+        super()._predict(rows, dt)
+        # The raw poses move along, so the speed after a dropout stays continuous
+        dt = dt[:, numpy.newaxis]
+        self._state[rows, 0:3] += self._velocity[rows] * dt
+        self._state[rows, 3:7] = normalize(
+            multiply(
+                from_rotation_vector(self._angular_velocity[rows] * dt),
+                self._state[rows, 3:7],
+            )
+        )
+
+    def _correct(
+        self,
+        rows: numpy.ndarray,
+        dt: numpy.ndarray,
+        pos: numpy.ndarray,
+        rot: numpy.ndarray,
+    ) -> None:
+        min_cutoff, beta, derivative_cutoff, rotation_min_cutoff, rotation_beta = (
+            self._parameters[rows, :, numpy.newaxis].transpose(1, 0, 2)
+        )
+        raw = self._state[rows]
+        dt = dt[:, numpy.newaxis]
+        derivative = _smoothing(dt, derivative_cutoff)
+        velocity = self._velocity[rows]
+        velocity += derivative * ((pos - raw[:, 0:3]) / dt - velocity)
+        speed = numpy.sqrt((velocity * velocity).sum(axis=1, keepdims=True))
+        estimate = self._pos[rows]
+        self._pos[rows] = estimate + _smoothing(dt, min_cutoff + beta * speed) * (
+            pos - estimate
+        )
+        self._velocity[rows] = velocity
+        angular_velocity = self._angular_velocity[rows]
+        angular_velocity += derivative * (
+            to_rotation_vector(multiply(rot, conjugate(raw[:, 3:7]))) / dt
+            - angular_velocity
+        )
+        speed = numpy.sqrt(
+            (angular_velocity * angular_velocity).sum(axis=1, keepdims=True)
+        )
+        estimate = self._rot[rows]
+        delta = to_rotation_vector(multiply(rot, conjugate(estimate)))
+        alpha = _smoothing(dt, rotation_min_cutoff + rotation_beta * speed)
+        self._rot[rows] = normalize(
+            multiply(from_rotation_vector(alpha * delta), estimate)
+        )
+        self._angular_velocity[rows] = angular_velocity
+        self._state[rows, 0:3] = pos
+        self._state[rows, 3:7] = rot
+
+
+def _kalman_predict(
+    covariance: numpy.ndarray, dt: numpy.ndarray, noise: numpy.ndarray
+) -> None:
+    """Propagates (variance, covariance, velocity variance) of a constant velocity model"""
+    variance, cross, velocity = covariance.T
+    covariance[:, 0] = variance + dt * (2 * cross + dt * velocity) + noise * dt**3 / 3
+    covariance[:, 1] = cross + dt * velocity + noise * dt**2 / 2
+    covariance[:, 2] = velocity + noise * dt
+
+
+def _kalman_gain(
+    covariance: numpy.ndarray, noise: numpy.ndarray
+) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Gains of the position and velocity for a position measurement, updates the covariance"""
+    variance, cross, velocity = covariance.T
+    innovation = variance + noise
+    gain = variance / innovation
+    velocity_gain = cross / innovation
+    covariance[:, 2] = velocity - velocity_gain * cross
+    covariance[:, 1] = (1 - gain) * cross
+    covariance[:, 0] = (1 - gain) * variance
+    return gain[:, numpy.newaxis], velocity_gain[:, numpy.newaxis]
+
+
+@dataclass
+class KalmanPoseFilter(PoseFilter):
+    """
+    Constant velocity Kalman filter of the positions, independent per axis, and of
+    the orientations, on the rotation vector between prediction and measurement.
+    The axes share one covariance per rigid body, so the update stays a few array
+    operations whatever the number of bodies.
+
+    Example:
+        >>> pose_filter = KalmanPoseFilter(KalmanParameters(measurement_noise=4e-6))
+        >>> pose_filter.attach(client)
+        >>> batch = pose_filter.update(frame)
+    """
+
+    parameters: KalmanParameters = field(default_factory=KalmanParameters)
+    parameters_type: ClassVar[type] = KalmanParameters
+    # Position then orientation (variance, covariance, velocity variance)
+    state_columns: ClassVar[int] = 6
+
+    def _reset(
+        self, rows: numpy.ndarray, pos: numpy.ndarray, rot: numpy.ndarray
+    ) -> None:
+        super()._reset(rows, pos, rot)
+        parameters = self._parameters[rows]
+        # The velocity is unknown, its variance is the one after a second of noise
+        self._state[rows] = numpy.stack(
+            (
+                parameters[:, 1],
+                numpy.zeros(len(rows)),
+                parameters[:, 0],
+                parameters[:, 3],
+                numpy.zeros(len(rows)),
+                parameters[:, 2],
+            ),
+            axis=1,
+        )
+
+    def _predict(self, rows: numpy.ndarray, dt: numpy.ndarray) -> None:
+        super()._predict(rows, dt)
+        parameters = self._parameters[rows]
+        state = self._state[rows]
+        _kalman_predict(state[:, 0:3], dt, parameters[:, 0])
+        _kalman_predict(state[:, 3:6], dt, parameters[:, 2])
+        self._state[rows] = state
+
+    def _correct(
+        self,
+        rows: numpy.ndarray,
+        dt: numpy.ndarray,
+        pos: numpy.ndarray,
+        rot: numpy.ndarray,
+    ) -> None:
+        self._predict(rows, dt)
+        parameters = self._parameters[rows]
+        state = self._state[rows]
+        gain, velocity_gain = _kalman_gain(state[:, 0:3], parameters[:, 1])
+        residual = pos - self._pos[rows]
+        self._pos[rows] += gain * residual
+        self._velocity[rows] += velocity_gain * residual
+        gain, velocity_gain = _kalman_gain(state[:, 3:6], parameters[:, 3])
+        estimate = self._rot[rows]
+        residual = to_rotation_vector(multiply(rot, conjugate(estimate)))
+        self._rot[rows] = normalize(
+            multiply(from_rotation_vector(gain * residual), estimate)
+        )
+        self._angular_velocity[rows] += velocity_gain * residual
+        self._state[rows] = state
@@ -0,0 +1,415 @@
+"""
+Time indexed pose history of every rigid body, requires numpy.
+
+Each body owns a ring of `capacity` samples stored twice, at slot `i` and at
+`i + capacity`, so the latest samples are always a contiguous slice and queries
+return views instead of copies. Views are overwritten once `capacity` newer samples
+of the body arrived, copy them to keep them longer.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import ClassVar, Dict, List, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError as error:
+    raise ImportError(
+        "The pose history requires numpy, `pip install new-natnet-client[numpy]`"
+    ) from error
+
+from natnet_client.clock_sync import FrameTiming
+from natnet_client.client import NatNetClient
+from natnet_client.descriptors import MoCapDescription
+from natnet_client.quaternions import slerp
+
+
+@dataclass(frozen=True)
+class PoseSamples:
+    """Consecutive samples of one rigid body, oldest first"""
+
+    timestamp_ns: numpy.ndarray
+    frame_number: numpy.ndarray
+    pos: numpy.ndarray
+    rot: numpy.ndarray
+    err: numpy.ndarray
+    tracking: numpy.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp_ns)
+
+
+@dataclass(frozen=True)
+class Pose:
+    timestamp_ns: int
+    frame_number: int
+    pos: numpy.ndarray
+    rot: numpy.ndarray
+    err: float
+    tracking: bool
+
+
+@dataclass(frozen=True)
+class PoseBatch:
+    """
+    Poses of several rigid bodies at one instant, row `i` is body `identifiers[i]`.
+    Rows without a sample at or before the instant are not `valid`
+    """
+
+    timestamp_ns: int
+    identifiers: numpy.ndarray
+    pos: numpy.ndarray
+    rot: numpy.ndarray
+    tracking: numpy.ndarray
+    valid: numpy.ndarray
+    extrapolated: numpy.ndarray
+
+
+@dataclass
+class PoseHistory:
+    """
+    Args:
+        capacity: (int, optional). Samples kept per rigid body. Defaults to 1024
+        use_exposure_time: (bool, optional). Time samples at the camera exposure instead of the reception, once the clock is synchronized. Defaults to False
+
+    Timestamps are host monotonic nanoseconds, like `time.monotonic_ns()`.
+    Queries can run on any thread, they take the bodies and ring references under
+    the lock `add` holds, then work on them unlocked.
+
+    Example:
+        >>> history = PoseHistory(capacity=2048)
+        >>> history.attach(client)
+        >>> pose = history.at(1, time.monotonic_ns() - 50_000_000)
+        >>> samples = history.window(1, start_ns, end_ns)
+    """
+
+    capacity: int = 1024
+    use_exposure_time: bool = False
+    # Smoothing of the measured exposure to reception latency
+    latency_smoothing: ClassVar[float] = 0.05
+
+    _rows: Dict[int, int] = field(init=False, default_factory=dict)
+    _counts: numpy.ndarray = field(init=False, repr=False)
+    _timestamps: numpy.ndarray = field(init=False, repr=False)
+    _frame_numbers: numpy.ndarray = field(init=False, repr=False)
+    _pos: numpy.ndarray = field(init=False, repr=False)
+    _rot: numpy.ndarray = field(init=False, repr=False)
+    _err: numpy.ndarray = field(init=False, repr=False)
+    _tracking: numpy.ndarray = field(init=False, repr=False)
+    _clients: List[NatNetClient] = field(init=False, default_factory=list)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+    _latency_ns: float | None = field(init=False, default=None)
+
+    def __post_init__(self) -> None:
+        if self.capacity <= 0:
+            raise ValueError("The capacity must be positive")
+        self._allocate(8)
+
+    def _allocate(self, bodies: int) -> None:
+        """Allocates room for `bodies` rigid bodies, keeping the current samples"""
+        size = 2 * self.capacity
+        arrays = (
+            numpy.zeros(bodies, dtype=numpy.int64),
+            numpy.zeros((bodies, size), dtype=numpy.int64),
+            numpy.zeros((bodies, size), dtype=numpy.int32),
+            numpy.zeros((bodies, size, 3)),
+            numpy.zeros((bodies, size, 4)),
+            numpy.zeros((bodies, size)),
+            numpy.zeros((bodies, size), dtype=bool),
+        )
+        if self._rows:
+            current = len(self._counts)
+            for new, old in zip(arrays, self._arrays()):
+                new[:current] = old
+        (
+            self._counts,
+            self._timestamps,
+            self._frame_numbers,
+            self._pos,
+            self._rot,
+            self._err,
+            self._tracking,
+        ) = arrays
+
+    def _arrays(self) -> Tuple[numpy.ndarray, ...]:
+        return (
+            self._counts,
+            self._timestamps,
+            self._frame_numbers,
+            self._pos,
+            self._rot,
+            self._err,
+            self._tracking,
+        )
+
+    def _row(self, identifier: int) -> int:
+        row = self._rows.get(identifier)
+        if row is None:
+            row = len(self._rows)
+            if row == len(self._counts):
+                self._allocate(2 * row)
+            self._rows[identifier] = row
+        return row
+
+    def add(self, frame: MoCapDescription, timestamp_ns: int) -> None:
+        """Appends the pose of every rigid body of `frame`, sampled at `timestamp_ns`"""
+        rigid_bodies = frame.rigid_body_data.rigid_bodies
+        if not rigid_bodies:
+            return
+        values = numpy.array(
+            [
+                (
+                    rigid_body.pos.x,
+                    rigid_body.pos.y,
+                    rigid_body.pos.z,
+                    rigid_body.rot.x,
+                    rigid_body.rot.y,
+                    rigid_body.rot.z,
+                    rigid_body.rot.w,
+                    rigid_body.err,
+                    rigid_body.tracking,
+                )
+                for rigid_body in rigid_bodies
+            ]
+        )
+        with self._lock:
+            rows = numpy.fromiter(
+                (self._row(rigid_body.identifier) for rigid_body in rigid_bodies),
+                dtype=numpy.intp,
+                count=len(rigid_bodies),
+            )
+            slots = self._counts[rows] % self.capacity
+            for slot in (slots, slots + self.capacity):
+                self._timestamps[rows, slot] = timestamp_ns
+                self._frame_numbers[rows, slot] = frame.prefix_data.frame_number
+                self._pos[rows, slot] = values[:, 0:3]
+                self._rot[rows, slot] = values[:, 3:7]
+                self._err[rows, slot] = values[:, 7]
+                self._tracking[rows, slot] = values[:, 8]
+            self._counts[rows] += 1
+
+    def _on_frame(self, frame: MoCapDescription, timing: FrameTiming) -> None:
+        timestamp_ns = timing.received_ns
+        if timing.exposure_ns is not None:
+            latency_ns = timing.received_ns - timing.exposure_ns
+            if self._latency_ns is None:
+                self._latency_ns = float(latency_ns)
+            else:
+                self._latency_ns += self.latency_smoothing * (
+                    latency_ns - self._latency_ns
+                )
+            if self.use_exposure_time:
+                timestamp_ns = timing.exposure_ns
+        self.add(frame, timestamp_ns)
+
+    @property
+    def latency_ns(self) -> float | None:
+        """
+        Smoothed latency from camera exposure to reception, measured once the clock
+        of an attached client is synchronized
+        """
+        return self._latency_ns
+
+    def attach(self, client: NatNetClient) -> None:
+        """Records every frame decoded by `client` until `detach`"""
+        client.add_frame_listener(self._on_frame)
+        self._clients.append(client)
+
+    def detach(self, client: NatNetClient) -> None:
+        client.remove_frame_listener(self._on_frame)
+        self._clients.remove(client)
+
+    @property
+    def identifiers(self) -> Tuple[int, ...]:
+        """Rigid bodies with samples"""
+        with self._lock:
+            return tuple(self._rows)
+
+    def __contains__(self, identifier: int) -> bool:
+        return identifier in self._rows
+
+    def count(self, identifier: int) -> int:
+        """Samples currently kept for a rigid body"""
+        with self._lock:
+            row = self._rows.get(identifier)
+            if row is None:
+                return 0
+            return min(int(self._counts[row]), self.capacity)
+
+    def last(self, identifier: int, n: int | None = None) -> PoseSamples:
+        """
+        Views of the last `n` samples of a rigid body, every kept sample if `n` is None
+
+        Raises:
+            KeyError. If the rigid body has no samples
+        """
+        with self._lock:
+            row = self._rows[identifier]
+            count = int(self._counts[row])
+            # `add` may grow the arrays, views of the previous ones stay consistent
+            arrays = self._arrays()[1:]
+        kept = min(count, self.capacity)
+        n = kept if n is None else min(max(n, 0), kept)
+        end = count % self.capacity + self.capacity
+        # The second copy of the ring makes the last samples contiguous
+        span = slice(end - n, end)
+        return PoseSamples(*(values[row, span] for values in arrays))
+
+    def window(self, identifier: int, start_ns: int, end_ns: int) -> PoseSamples:
+        """
+        Views of the samples with `start_ns <= timestamp < end_ns`
+
+        Raises:
+            KeyError. If the rigid body has no samples
+        """
+        samples = self.last(identifier)
+        start, end = numpy.searchsorted(samples.timestamp_ns, (start_ns, end_ns))
+        return PoseSamples(
+            samples.timestamp_ns[start:end],
+            samples.frame_number[start:end],
+            samples.pos[start:end],
+            samples.rot[start:end],
+            samples.err[start:end],
+            samples.tracking[start:end],
+        )
+
+    def at(self, identifier: int, timestamp_ns: int) -> Pose | None:
+        """
+        Latest sample at or before `timestamp_ns`, None if every kept sample is newer
+
+        Raises:
+            KeyError. If the rigid body has no samples
+        """
+        samples = self.last(identifier)
+        index = int(numpy.searchsorted(samples.timestamp_ns, timestamp_ns, "right"))
+        if index == 0:
+            return None
+        index -= 1
+        return Pose(
+            int(samples.timestamp_ns[index]),
+            int(samples.frame_number[index]),
+            samples.pos[index],
+            samples.rot[index],
+            float(samples.err[index]),
+            bool(samples.tracking[index]),
+        )
+
+    def sample(
+        self,
+        timestamp_ns: int,
+        identifiers: Sequence[int] | None = None,
+        max_extrapolation_ns: int = 50_000_000,
+    ) -> PoseBatch:
+        """
+        Poses of every rigid body, or of `identifiers`, at `timestamp_ns` in one
+        vectorized pass. Positions are interpolated linearly and rotations with slerp
+        between the samples around the instant. After the last sample both are
+        extrapolated at the velocity of the last two samples, at most
+        `max_extrapolation_ns` ahead.
+
+        Raises:
+            KeyError. If one of `identifiers` has no samples
+        """
+        with self._lock:
+            if identifiers is None:
+                ids = numpy.fromiter(
+                    self._rows, dtype=numpy.int64, count=len(self._rows)
+                )
+                rows = numpy.arange(len(ids))
+            else:
+                ids = numpy.asarray(identifiers, dtype=numpy.int64)
+                rows = numpy.fromiter(
+                    (self._rows[identifier] for identifier in identifiers),
+                    dtype=numpy.intp,
+                    count=len(ids),
+                )
+            counts = self._counts[rows]
+            _, timestamps, _, positions, rotations, _, tracking = self._arrays()
+        end = counts % self.capacity + self.capacity
+        start = end - numpy.minimum(counts, self.capacity)
+        flat = timestamps.reshape(-1)
+        base = rows * timestamps.shape[1] - 1
+        if (flat[base + end] <= timestamp_ns).all():
+            # Usual real time query, after the last sample of every body
+            low = end
+        else:
+            # Branchless binary search, batched over the bodies, for the first
+            # sample after the instant
+            low = start
+            step = 1 << self.capacity.bit_length()
+            while step:
+                candidate = low + step
+                inside = candidate <= end
+                before = (
+                    flat[base + numpy.where(inside, candidate, low + 1)] <= timestamp_ns
+                )
+                low = numpy.where(inside & before, candidate, low)
+                step >>= 1
+        valid = low > start
+        extrapolated = valid & (low == end)
+        # Interpolate between (low - 1, low), extrapolate from (end - 2, end - 1)
+        second = numpy.where(extrapolated, end - 1, numpy.maximum(low, start))
+        first = numpy.where(valid, numpy.maximum(second - 1, start), start)
+        second = numpy.where(valid, second, start)
+        t0 = timestamps[rows, first]
+        t1 = timestamps[rows, second]
+        query = numpy.minimum(timestamp_ns, t1 + max_extrapolation_ns)
+        span = t1 - t0
+        alpha = numpy.where(
+            span > 0, (query - t0) / numpy.where(span > 0, span, 1), 0.0
+        )
+        p0, p1 = positions[rows, first], positions[rows, second]
+        return PoseBatch(
+            timestamp_ns,
+            ids,
+            p0 + alpha[:, numpy.newaxis] * (p1 - p0),
+            slerp(rotations[rows, first], rotations[rows, second], alpha),
+            tracking[rows, first] & tracking[rows, second],
+            valid,
+            extrapolated,
+        )
+
+    def predict(
+        self,
+        timestamp_ns: int | None = None,
+        identifiers: Sequence[int] | None = None,
+        latency_ns: float | None = None,
+        max_extrapolation_ns: int = 50_000_000,
+    ) -> PoseBatch:
+        """
+        Poses of the rigid bodies as they are at `timestamp_ns`, now by default,
+        compensating the latency between camera exposure and reception.
+
+        Samples timed at reception describe the scene `latency_ns` earlier, so they
+        are extrapolated that much further. Defaults to the latency measured from the
+        attached client, 0 when unknown or with `use_exposure_time`.
+        """
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns()
+        if latency_ns is None:
+            latency_ns = 0.0
+            if not self.use_exposure_time and self._latency_ns is not None:
+                latency_ns = self._latency_ns
+        batch = self.sample(
+            timestamp_ns + round(latency_ns),
+            identifiers,
+            max_extrapolation_ns + round(latency_ns),
+        )
+        return PoseBatch(
+            timestamp_ns,
+            batch.identifiers,
+            batch.pos,
+            batch.rot,
+            batch.tracking,
+            batch.valid,
+            batch.extrapolated,
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+            self._allocate(8)
+        self._latency_ns = None
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, ClassVar, Dict, List, Tuple
+
+from natnet_client.client import NatNetClient
+
+
+@dataclass
+class NatNetHub:
+    """
+    Runs many NatNetClient instances on a fixed pool of event loop threads, so the
+    number of threads does not grow with the number of servers.
+    Clients are assigned to the loop currently hosting the fewest clients.
+
+    Args:
+        num_loops: (int, optional). Number of event loop threads. Defaults to 1
+        loop_factory: (Callable[[], asyncio.AbstractEventLoop] | None, optional). Creates each loop of the pool, see `natnet_client.loops`. Defaults to None, the stock asyncio loop
+
+    Example:
+        >>> with NatNetHub() as hub:
+        >>>     hub.connect(NatNetClient(NatNetParams(server_address="10.0.0.1")))
+        >>>     hub.connect(NatNetClient(NatNetParams(server_address="10.0.0.2")))
+    """
+
+    logger: ClassVar[logging.Logger] = logging.getLogger("NatNet-Hub")
+
+    num_loops: int = 1
+    loop_factory: Callable[[], asyncio.AbstractEventLoop] | None = None
+
+    _loops: List[asyncio.AbstractEventLoop] = field(init=False, default_factory=list)
+    _threads: List[threading.Thread] = field(init=False, default_factory=list)
+    _clients: Dict[int, List[NatNetClient]] = field(init=False, default_factory=dict)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self) -> None:
+        if self.num_loops < 1:
+            raise ValueError("A hub needs at least one event loop")
+
+    @property
+    def running(self) -> bool:
+        return len(self._loops) > 0
+
+    @property
+    def clients(self) -> Tuple[NatNetClient, ...]:
+        with self._lock:
+            return tuple(
+                client for clients in self._clients.values() for client in clients
+            )
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def start(self) -> None:
+        if self.running:
+            raise RuntimeError("The hub is already running")
+        loop_factory = self.loop_factory or asyncio.new_event_loop
+        for index in range(self.num_loops):
+            loop = loop_factory()
+            thread = threading.Thread(
+                target=self._run_loop, args=(loop,), name=f"NatNetHub-{index}"
+            )
+            thread.start()
+            self._loops.append(loop)
+            self._threads.append(thread)
+            self._clients[index] = []
+        self.logger.info("Hub started with %i loops", self.num_loops)
+
+    def connect(self, client: NatNetClient, timeout: float | None = None) -> bool:
+        """Connects the client on the least loaded loop of the hub
+
+        Args:
+            client (NatNetClient): Client not yet connected
+            timeout (float|None, optional): Passed to `NatNetClient.connect`, when None `client.params.connection_timeout` is used. Defaults to None.
+
+        Returns:
+            bool: If the client connected
+        """
+        if not self.running:
+            raise RuntimeError("The hub is not running")
+        if timeout is None:
+            timeout = client.params.connection_timeout
+        with self._lock:
+            index = min(self._clients, key=lambda i: len(self._clients[i]))
+            self._clients[index].append(client)
+        connected = client.connect(timeout, self._loops[index])
+        if not connected:
+            with self._lock:
+                self._clients[index].remove(client)
+        return connected
+
+    def disconnect(self, client: NatNetClient) -> None:
+        with self._lock:
+            for clients in self._clients.values():
+                if client in clients:
+                    clients.remove(client)
+                    break
+            else:
+                raise ValueError("The client is not part of this hub")
+        client.shutdown()
+
+    def shutdown(self) -> None:
+        for client in self.clients:
+            if client.running:
+                client.shutdown()
+        for loop in self._loops:
+            loop.call_soon_threadsafe(loop.stop)
+        for thread in self._threads:
+            thread.join()
+        self._loops.clear()
+        self._threads.clear()
+        self._clients.clear()
+        self.logger.info("Hub shutdown")
+
+    def __enter__(self) -> NatNetHub:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
@@ -0,0 +1,231 @@
+"""
+Forward kinematics of skeletons, requires numpy.
+
+Skeleton bones are streamed relative to their parent bone when Motive streams
+skeletons in local coordinates. `KinematicTree` compiles the parent links of the
+skeleton descriptions once, then composes the world pose of every bone of every
+skeleton with one batched pass per depth of the trees.
+"""
+
+from __future__ import annotations
+
+from dataclasses import InitVar, dataclass, field
+from typing import Dict, List, Tuple
+
+try:
+    import numpy
+except ImportError as error:
+    raise ImportError(
+        "Skeleton kinematics require numpy, `pip install new-natnet-client[numpy]`"
+    ) from error
+
+from natnet_client.descriptors import Descriptors, MoCapDescription
+from natnet_client.quaternions import multiply, normalize, rotate
+from natnet_client.unpackers import DataUnpackerV3_0
+
+
+@dataclass(frozen=True)
+class SkeletonPoses:
+    """
+    World poses of the bones of the compiled skeletons, in `KinematicTree` order.
+    Bones without a tracked pose in the frame are not `measured`, they keep the
+    offset of their description and the orientation of their parent.
+    """
+
+    skeleton_ids: numpy.ndarray
+    bone_ids: numpy.ndarray
+    pos: numpy.ndarray
+    rot: numpy.ndarray
+    measured: numpy.ndarray
+    slices: Dict[int, slice] = field(repr=False)
+
+    def of(self, skeleton_id: int) -> SkeletonPoses:
+        """
+        Views of the bones of one skeleton
+
+        Raises:
+            KeyError. If the skeleton is not compiled
+        """
+        span = self.slices[skeleton_id]
+        return SkeletonPoses(
+            self.skeleton_ids[span],
+            self.bone_ids[span],
+            self.pos[span],
+            self.rot[span],
+            self.measured[span],
+            {skeleton_id: slice(0, span.stop - span.start)},
+        )
+
+
+@dataclass
+class KinematicTree:
+    """
+    Bones of every skeleton, each skeleton contiguous and its bones parents first.
+    Row `i` is bone `bone_ids[i]` of skeleton `skeleton_ids[i]`, its parent is row
+    `parents[i]`, -1 for the roots, at `offsets[i]` from it.
+
+    Args:
+        descriptors: (Descriptors). Descriptions of the skeletons, compile a new tree when they change
+
+    Raises:
+        ValueError. If the parent links of a skeleton form a cycle
+
+    Example:
+        >>> tree = KinematicTree(client.descriptors)
+        >>> poses = tree.world(client.last_mocap_data)
+        >>> hips = poses.of(skeleton_id).pos[0]
+    """
+
+    descriptors: InitVar[Descriptors]
+
+    skeleton_ids: numpy.ndarray = field(init=False)
+    bone_ids: numpy.ndarray = field(init=False)
+    names: Tuple[str, ...] = field(init=False, repr=False)
+    parents: numpy.ndarray = field(init=False)
+    offsets: numpy.ndarray = field(init=False, repr=False)
+    slices: Dict[int, slice] = field(init=False, repr=False)
+    # Bones are composed depth by depth, so they are stored depth first and each
+    # depth is a slice. `_order` maps stored rows to rows, `_stored` the reverse
+    _order: numpy.ndarray = field(init=False, repr=False)
+    _stored: numpy.ndarray = field(init=False, repr=False)
+    _stored_parents: numpy.ndarray = field(init=False, repr=False)
+    _stored_offsets: numpy.ndarray = field(init=False, repr=False)
+    _levels: List[slice] = field(init=False, repr=False)
+    # Stored row of each bone id of each skeleton, packed and plain
+    _rows: Dict[int, Dict[int, int]] = field(init=False, repr=False)
+
+    def __post_init__(self, descriptors: Descriptors) -> None:
+        skeleton_ids: List[int] = []
+        bone_ids: List[int] = []
+        names: List[str] = []
+        parents: List[int] = []
+        offsets: List[Tuple[float, float, float]] = []
+        depths: List[int] = []
+        self.slices = {}
+        for skeleton in descriptors.skeleton_description.values():
+            bones = skeleton.rigid_bodies_d
+            depth: Dict[int, int] = {}
+            for bone in skeleton.rigid_bodies:
+                chain = []
+                identifier = bone.identifier
+                while identifier in bones and identifier not in depth:
+                    if len(chain) > len(bones):
+                        raise ValueError(
+                            f"The bones of skeleton {skeleton.name} form a cycle"
+                        )
+                    chain.append(identifier)
+                    identifier = bones[identifier].parent_id
+                base = depth.get(identifier, -1)
+                for level, link in enumerate(reversed(chain), start=base + 1):
+                    depth[link] = level
+            start = len(bone_ids)
+            # Stable, so bones of the same depth keep the order of the description
+            ordered = sorted(
+                skeleton.rigid_bodies, key=lambda bone: depth[bone.identifier]
+            )
+            rows = {bone.identifier: start + i for i, bone in enumerate(ordered)}
+            for bone in ordered:
+                skeleton_ids.append(skeleton.identifier)
+                bone_ids.append(bone.identifier)
+                names.append(bone.name)
+                parents.append(rows.get(bone.parent_id, -1))
+                offsets.append((bone.pos.x, bone.pos.y, bone.pos.z))
+                depths.append(depth[bone.identifier])
+            self.slices[skeleton.identifier] = slice(start, len(bone_ids))
+        self.skeleton_ids = numpy.array(skeleton_ids, dtype=numpy.int32)
+        self.bone_ids = numpy.array(bone_ids, dtype=numpy.int32)
+        self.names = tuple(names)
+        self.parents = numpy.array(parents, dtype=numpy.intp)
+        self.offsets = numpy.array(offsets, dtype=numpy.float64).reshape(-1, 3)
+        depth_array = numpy.array(depths, dtype=numpy.intp)
+        self._order = numpy.argsort(depth_array, kind="stable")
+        self._stored = numpy.empty_like(self._order)
+        self._stored[self._order] = numpy.arange(len(self._order))
+        stored_parents = self.parents[self._order]
+        self._stored_parents = numpy.where(
+            stored_parents >= 0, self._stored[stored_parents], -1
+        )
+        self._stored_offsets = self.offsets[self._order]
+        bounds = numpy.cumsum(numpy.bincount(depth_array)).tolist()
+        # The roots, depth 0, are already in world coordinates
+        self._levels = [slice(start, end) for start, end in zip(bounds, bounds[1:])]
+        self._rows = {skeleton_id: {} for skeleton_id in self.slices}
+        for row, (skeleton_id, bone_id) in enumerate(zip(skeleton_ids, bone_ids)):
+            stored = int(self._stored[row])
+            # Frames pack the skeleton id with the bone id like labeled marker ids
+            self._rows[skeleton_id][bone_id] = stored
+            self._rows[skeleton_id][
+                DataUnpackerV3_0.encode_marker_id(skeleton_id, bone_id)
+            ] = stored
+
+    def __len__(self) -> int:
+        return len(self.bone_ids)
+
+    def _compose(
+        self, pos: numpy.ndarray, rot: numpy.ndarray
+    ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """World poses of local poses in stored order, in place"""
+        for level in self._levels:
+            parents = self._stored_parents[level]
+            parent_rot = rot[parents]
+            pos[level] = pos[parents] + rotate(parent_rot, pos[level])
+            rot[level] = multiply(parent_rot, rot[level])
+        return pos, rot
+
+    def compose(
+        self, pos: numpy.ndarray, rot: numpy.ndarray
+    ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        World positions and orientations of (bones, 3) positions and (bones, 4)
+        orientations relative to the parent bones, e.g. `compose(tree.offsets,
+        identity)` is the rest pose
+        """
+        world_pos, world_rot = self._compose(
+            numpy.array(pos, dtype=numpy.float64)[self._order],
+            numpy.array(rot, dtype=numpy.float64)[self._order],
+        )
+        return world_pos[self._stored], world_rot[self._stored]
+
+    def world(self, frame: MoCapDescription) -> SkeletonPoses:
+        """World pose of every bone of the compiled skeletons in `frame`"""
+        rows: List[int] = []
+        values: List[Tuple[float, ...]] = []
+        for skeleton in frame.skeleton_data.skeletons:
+            bone_rows = self._rows.get(skeleton.identifier)
+            if bone_rows is None:
+                continue
+            for bone in skeleton.rigid_bodies:
+                row = bone_rows.get(bone.identifier)
+                if row is None or not bone.tracking:
+                    continue
+                rows.append(row)
+                values.append(
+                    (
+                        bone.pos.x,
+                        bone.pos.y,
+                        bone.pos.z,
+                        bone.rot.x,
+                        bone.rot.y,
+                        bone.rot.z,
+                        bone.rot.w,
+                    )
+                )
+        pos = self._stored_offsets.copy()
+        rot = numpy.zeros((len(pos), 4))
+        rot[:, 3] = 1.0
+        measured = numpy.zeros(len(pos), dtype=bool)
+        if rows:
+            measured_rows = numpy.array(rows, dtype=numpy.intp)
+            local = numpy.array(values)
+            pos[measured_rows] = local[:, 0:3]
+            rot[measured_rows] = normalize(local[:, 3:7])
+            measured[measured_rows] = True
+        pos, rot = self._compose(pos, rot)
+        return SkeletonPoses(
+            self.skeleton_ids,
+            self.bone_ids,
+            pos[self._stored],
+            rot[self._stored],
+            measured[self._stored],
+            self.slices,
+        )
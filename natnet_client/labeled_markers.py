@@ -0,0 +1,137 @@
+"""
+Labeled markers of a frame as arrays grouped by model, requires numpy.
+
+The packed ids of `LabeledMarkerData` are decoded in bulk into model ids and marker
+ids. Markers are sorted by model, so the markers of one asset or rigid body are a
+slice found through a CSR style index, `models` and `indptr`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict
+
+try:
+    import numpy
+except ImportError as error:
+    raise ImportError(
+        "Labeled marker arrays require numpy, `pip install new-natnet-client[numpy]`"
+    ) from error
+
+from natnet_client.descriptors import MoCapDescription
+from natnet_client.mo_cap_data import LabeledMarkerData
+from natnet_client.unpackers import DataUnpackerV3_0
+
+
+@dataclass(frozen=True)
+class LabeledMarkerArrays:
+    """
+    Row `i` is the labeled marker `order[i]` of the frame, rows sorted by model id
+    and in frame order within a model. The markers of model `models[j]` are the rows
+    `indptr[j]:indptr[j + 1]`.
+
+    Example:
+        >>> markers = LabeledMarkerArrays.from_frame(frame)
+        >>> positions = markers.of(rigid_body_id).pos
+    """
+
+    identifiers: numpy.ndarray
+    model_ids: numpy.ndarray
+    marker_ids: numpy.ndarray
+    pos: numpy.ndarray
+    size: numpy.ndarray
+    param: numpy.ndarray
+    residual: numpy.ndarray
+    order: numpy.ndarray
+    models: numpy.ndarray
+    indptr: numpy.ndarray
+    _groups: Dict[int, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self, "_groups", dict(zip(self.models.tolist(), range(len(self.models))))
+        )
+
+    @classmethod
+    def from_data(cls, data: LabeledMarkerData) -> LabeledMarkerArrays:
+        values = numpy.array(
+            [
+                (
+                    marker.identifier,
+                    marker.pos.x,
+                    marker.pos.y,
+                    marker.pos.z,
+                    marker.size,
+                    marker.param,
+                    marker.residual,
+                )
+                for marker in data.markers
+            ]
+        ).reshape(-1, 7)
+        identifiers = values[:, 0].astype(numpy.int64)
+        model_ids, marker_ids = DataUnpackerV3_0.decode_marker_id(identifiers)
+        order = numpy.argsort(model_ids, kind="stable")
+        model_ids = model_ids[order]
+        values = values[order]
+        # First row of every model, the sorted ids change there
+        starts = numpy.flatnonzero(
+            numpy.concatenate(([True], model_ids[1:] != model_ids[:-1]))
+        )
+        if not len(model_ids):
+            starts = starts[:0]
+        return cls(
+            identifiers[order],
+            model_ids,
+            marker_ids[order],
+            values[:, 1:4],
+            values[:, 4],
+            values[:, 5].astype(numpy.int64),
+            values[:, 6],
+            order,
+            model_ids[starts],
+            numpy.append(starts, len(model_ids)),
+        )
+
+    @classmethod
+    def from_frame(cls, frame: MoCapDescription) -> LabeledMarkerArrays:
+        return cls.from_data(frame.labeled_marker_data)
+
+    def __len__(self) -> int:
+        return len(self.identifiers)
+
+    def __contains__(self, model_id: int) -> bool:
+        return model_id in self._groups
+
+    def group(self, model_id: int) -> slice:
+        """
+        Rows of the markers of one model
+
+        Raises:
+            KeyError. If no marker of the model is in the frame
+        """
+        index = self._groups[model_id]
+        return slice(int(self.indptr[index]), int(self.indptr[index + 1]))
+
+    def of(self, model_id: int) -> LabeledMarkerArrays:
+        """
+        Views of the markers of one model, empty if none is in the frame
+        """
+        index = self._groups.get(model_id)
+        if index is None:
+            span = slice(0, 0)
+            models = slice(0, 0)
+        else:
+            span = slice(int(self.indptr[index]), int(self.indptr[index + 1]))
+            models = slice(index, index + 1)
+        return LabeledMarkerArrays(
+            self.identifiers[span],
+            self.model_ids[span],
+            self.marker_ids[span],
+            self.pos[span],
+            self.size[span],
+            self.param[span],
+            self.residual[span],
+            self.order[span],
+            self.models[models],
+            self.indptr[models.start : models.stop + 1] - span.start,
+        )
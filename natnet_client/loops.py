@@ -0,0 +1,37 @@
+"""
+Event loop factories for `NatNetParams.event_loop_factory` and `NatNetHub.loop_factory`
+"""
+
+import asyncio
+import logging
+from typing import Callable
+
+logger = logging.getLogger("NatNet-Loops")
+
+EventLoopFactory = Callable[[], asyncio.AbstractEventLoop]
+
+
+def uvloop_available() -> bool:
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def uvloop_factory() -> EventLoopFactory:
+    """
+    Raises:
+        ImportError. If uvloop is not installed, `pip install new-natnet-client[uvloop]`
+    """
+    import uvloop
+
+    return uvloop.new_event_loop
+
+
+def fastest_event_loop_factory() -> EventLoopFactory:
+    """Returns uvloop's factory when it is installed, otherwise the stock asyncio one"""
+    if uvloop_available():
+        return uvloop_factory()
+    logger.debug("uvloop not installed, using the stock asyncio loop")
+    return asyncio.new_event_loop
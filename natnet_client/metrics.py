@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, ClassVar, Dict
+
+from natnet_client.stats import Histogram, exponential_bounds
+
+# 100 ns to ~100 ms, in nanoseconds
+TIMING_BOUNDS = exponential_bounds(100, 2, 21)
+
+
+@dataclass
+class Metrics:
+    """
+    Counters and timing histograms of the client stages, enabled with
+    `NatNetParams.enable_metrics`.
+
+    Timings, in nanoseconds:
+        process_message: Dispatch and handling of every received message
+        unpack_mocap_data: Decoding of a whole frame
+        unpack_<section>: Each section of `unpack_mocap_data`, e.g. unpack_rigid_body_data
+        notify: Waking up the synchronous and asynchronous frame consumers
+        deliver: From the end of decoding until `NatNetClient.mocap` yields the frame
+
+    Counters:
+        <socket>_packets, <socket>_bytes: Received datagrams per socket, data or command
+        messages_<message>: Received messages per NatMessages type
+        dropped_frames: Frames that could not be decoded
+    """
+
+    _counters: Dict[str, int] = field(init=False, default_factory=dict)
+    _timings: Dict[str, Histogram] = field(init=False, default_factory=dict)
+
+    def count(self, name: str, value: int = 1) -> None:
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    def time(self, name: str, elapsed_ns: int) -> None:
+        histogram = self._timings.get(name)
+        if histogram is None:
+            histogram = self._timings[name] = Histogram(TIMING_BOUNDS)
+        histogram.add(elapsed_ns)
+
+    def section(
+        self, frame_number: int, section: str, start_ns: int, end_ns: int
+    ) -> None:
+        """`unpackers.SectionHook` recording each section of a frame"""
+        self.time("unpack_" + section, end_ns - start_ns)
+
+    def counters(self) -> Dict[str, int]:
+        return self._counters.copy()
+
+    def timings(self) -> Dict[str, Histogram]:
+        return {
+            name: histogram.copy() for name, histogram in self._timings.copy().items()
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain dict, suitable for json, of every counter and timing"""
+        return {
+            "counters": self.counters(),
+            "timings": {
+                name: {
+                    "count": histogram.count,
+                    "sum_ns": histogram.total,
+                    "mean_ns": histogram.mean,
+                    "min_ns": histogram.minimum if histogram.count else 0,
+                    "max_ns": histogram.maximum if histogram.count else 0,
+                    "p50_ns": histogram.quantile(0.5),
+                    "p99_ns": histogram.quantile(0.99),
+                }
+                for name, histogram in self.timings().items()
+            },
+        }
+
+    def prometheus(self, prefix: str = "natnet") -> str:
+        """Prometheus text exposition format, timings are exported in seconds"""
+        lines = []
+        for name, value in sorted(self.counters().items()):
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for name, histogram in sorted(self.timings().items()):
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            accumulated = 0
+            for bound, bucket_count in zip(histogram.bounds, histogram.counts):
+                accumulated += bucket_count
+                lines.append(f'{metric}_bucket{{le="{bound / 1e9:g}"}} {accumulated}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum {histogram.total / 1e9:g}")
+            lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        self._counters.clear()
+        self._timings.clear()
+
+
+@dataclass
+class MetricsServer:
+    """
+    Serves `Metrics.prometheus` on http://host:port/metrics from a background thread
+
+    Example:
+        >>> with MetricsServer(client.metrics, port=9464):
+        >>>     ...
+    """
+
+    logger: ClassVar[logging.Logger] = logging.getLogger("NatNet-Metrics")
+
+    metrics: Metrics
+    host: str = "127.0.0.1"
+    port: int = 9464
+
+    _server: ThreadingHTTPServer | None = field(init=False, default=None)
+    _thread: threading.Thread | None = field(init=False, default=None)
+
+    def start(self) -> None:
+        if self._server is not None:
+            raise RuntimeError("The metrics server is already running")
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                MetricsServer.logger.debug(format, *args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="NatNet-Metrics", daemon=True
+        )
+        self._thread.start()
+        self.logger.info(
+            "Serving metrics on http://%s:%i/metrics", self.host, self.port
+        )
+
+    def shutdown(self) -> None:
+        if self._server is None:
+            raise RuntimeError("The metrics server is not running")
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()  # type: ignore
+        self._server = None
+        self._thread = None
+
+    def __enter__(self) -> MetricsServer:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
@@ -1,4 +1,8 @@
+import asyncio
 from dataclasses import dataclass
+from typing import Callable
+
+from natnet_client.transforms import CoordinateTransform
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -16,6 +20,10 @@ class NatNetParams:
 
         max_buffer_size: (int | None, optional). Size for server messages buffer. Defaults to None
         connection_timeout: (float | None, optional). Time to wait for the server to send back its ServerInfo when using a context, passed to `NatNetClient.connect`. Defaults to None
+        enable_metrics: (bool, optional). Collect counters and timings of every stage, see `NatNetClient.metrics`. Defaults to False
+        event_loop_factory: (Callable[[], asyncio.AbstractEventLoop] | None, optional). Creates the loop of the background thread, see `natnet_client.loops`. Defaults to None, the stock asyncio loop
+        coordinate_transform: (CoordinateTransform | None, optional). Frame and units frames are decoded in, see `NatNetClient.set_coordinate_transform`. Defaults to None, as sent by Motive
+        decode_all_frames: (bool, optional). Decode frames no frame listener, frame filter or rate limited listener needs, `mocap` and `last_mocap_data` only see decoded frames when False, see `NatNetClient.add_rate_limited_listener`. The clock synchronization and the latency statistics are then also fed by the decoded frames only, e.g. one in eight at 30 Hz from 240 Hz, so `ClockSync.window` spans that many times longer. Defaults to True
     """
 
     server_address: str = '127.0.0.1'
@@ -27,3 +35,7 @@ class NatNetParams:
 
     max_buffer_size: int | None = None
     connection_timeout: float | None = None
+    enable_metrics: bool = False
+    event_loop_factory: Callable[[], asyncio.AbstractEventLoop] | None = None
+    coordinate_transform: CoordinateTransform | None = None
+    decode_all_frames: bool = True
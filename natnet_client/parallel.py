@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Generator, Iterable, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def ordered_map(
+    function: Callable[[T], R],
+    tasks: Iterable[T],
+    workers: int | None = None,
+    initializer: Callable[..., None] | None = None,
+    initargs: Tuple[Any, ...] = (),
+) -> Generator[R, None, None]:
+    """
+    Runs `function` over `tasks` in a process pool and yields the results in task
+    order. At most two tasks per worker are in flight, so results never pile up
+    while the consumer writes them.
+
+    Args:
+        function: (Callable). Module level function, it is pickled to the workers
+        tasks: (Iterable). Arguments of each call
+        workers: (int | None, optional). Processes, None for one per CPU. Defaults to None
+        initializer: (Callable | None, optional). Called once in every worker with `initargs`, e.g. to open a file
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        workers, initializer=initializer, initargs=initargs
+    ) as executor:
+        pending: deque[Future[R]] = deque()
+        for task in tasks:
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+            pending.append(executor.submit(function, task))
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Tuple
+
+from natnet_client.unpackers import SectionHook
+
+# Called with (frame_number, section, perf_counter_ns)
+StartHook = Callable[[int, str, int], None]
+EndHook = Callable[[int, str, int], None]
+
+
+@dataclass
+class ProfilingHooks:
+    """
+    Registry of profiling callbacks, itself a `unpackers.SectionHook`.
+
+    Sections are reported once finished, so each start callback is immediately
+    followed by its end callback, both with the `perf_counter_ns` times of the section.
+    Besides the sections of `unpack_mocap_data`, `NatNetClient` reports the whole
+    decoding of a frame as "mocap_data". Its end excludes the time spent in the
+    callbacks of the sections, so it may end before its last section in a trace.
+    An instance can also be passed to `DataUnpacker*.unpack_mocap_data` directly.
+    """
+
+    # Tuples are replaced, never mutated, so registering from another thread is safe
+    _pairs: Tuple[Tuple[StartHook | None, EndHook | None], ...] = field(
+        init=False, default=()
+    )
+    _spans: Tuple[SectionHook, ...] = field(init=False, default=())
+    # Time spent in the callbacks, from the end of a section until they return
+    spent_ns: int = field(init=False, default=0)
+
+    def __bool__(self) -> bool:
+        return bool(self._pairs or self._spans)
+
+    def add(
+        self, on_start: StartHook | None = None, on_end: EndHook | None = None
+    ) -> None:
+        self._pairs += ((on_start, on_end),)
+
+    def remove(
+        self, on_start: StartHook | None = None, on_end: EndHook | None = None
+    ) -> None:
+        pairs = list(self._pairs)
+        pairs.remove((on_start, on_end))
+        self._pairs = tuple(pairs)
+
+    def add_span(self, hook: SectionHook) -> None:
+        self._spans += (hook,)
+
+    def remove_span(self, hook: SectionHook) -> None:
+        spans = list(self._spans)
+        spans.remove(hook)
+        self._spans = tuple(spans)
+
+    def __call__(
+        self, frame_number: int, section: str, start_ns: int, end_ns: int
+    ) -> None:
+        for on_start, on_end in self._pairs:
+            if on_start is not None:
+                on_start(frame_number, section, start_ns)
+            if on_end is not None:
+                on_end(frame_number, section, end_ns)
+        for hook in self._spans:
+            hook(frame_number, section, start_ns, end_ns)
+        self.spent_ns += time.perf_counter_ns() - end_ns
+
+
+@dataclass
+class ChromeTraceWriter:
+    """
+    Collects sections as Chrome trace / Perfetto complete events and writes them as
+    JSON, open the file in chrome://tracing or https://ui.perfetto.dev
+
+    Args:
+        max_events: (int | None, optional). Keep only the most recent events. Defaults to 1_000_000
+
+    Example:
+        >>> writer = ChromeTraceWriter()
+        >>> client.add_profiling_hook(writer.on_start, writer.on_end)
+        >>> ...
+        >>> writer.write("natnet_trace.json")
+    """
+
+    max_events: int | None = 1_000_000
+
+    _events: deque[Dict[str, Any]] = field(init=False)
+    _starts: Dict[Tuple[int, str], int] = field(init=False, default_factory=dict)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self) -> None:
+        self._events = deque(maxlen=self.max_events)
+
+    def on_start(self, frame_number: int, section: str, start_ns: int) -> None:
+        self._starts[(frame_number, section)] = start_ns
+
+    def on_end(self, frame_number: int, section: str, end_ns: int) -> None:
+        start_ns = self._starts.pop((frame_number, section), end_ns)
+        event = {
+            "name": section,
+            "cat": "natnet",
+            "ph": "X",
+            "ts": start_ns / 1e3,
+            "dur": (end_ns - start_ns) / 1e3,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {"frame_number": frame_number},
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def events(self) -> Tuple[Dict[str, Any], ...]:
+        with self._lock:
+            return tuple(self._events)
+
+    def write(self, path: str | os.PathLike[str]) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"traceEvents": list(self.events()), "displayTimeUnit": "ns"}, file
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._events.clear()
+        self._starts.clear()
@@ -0,0 +1,108 @@
+"""
+Vectorized quaternion helpers, requires numpy.
+
+Quaternions are arrays whose last axis is (x, y, z, w), the order of NatNet.
+"""
+
+from __future__ import annotations
+
+try:
+    import numpy
+except ImportError as error:
+    raise ImportError(
+        "Quaternion math requires numpy, `pip install new-natnet-client[numpy]`"
+    ) from error
+
+# Below this sine of the angle between quaternions slerp falls back to nlerp
+_SLERP_EPSILON = 1e-6
+_NEXT = numpy.array((1, 2, 0))
+_PREVIOUS = numpy.array((2, 0, 1))
+_PRODUCT_INDEX = numpy.array(((3, 2, 1, 0), (2, 3, 0, 1), (1, 0, 3, 2), (0, 1, 2, 3)))
+_PRODUCT_SIGN = numpy.array(
+    (
+        (1.0, -1.0, 1.0, 1.0),
+        (1.0, 1.0, -1.0, 1.0),
+        (-1.0, 1.0, 1.0, 1.0),
+        (-1.0, -1.0, -1.0, 1.0),
+    )
+)
+
+
+def _norm(v: numpy.ndarray) -> numpy.ndarray:
+    return numpy.sqrt((v * v).sum(axis=-1, keepdims=True))
+
+
+def normalize(q: numpy.ndarray) -> numpy.ndarray:
+    norm = _norm(q)
+    return q / numpy.where(norm > 0, norm, 1)
+
+
+def slerp(q0: numpy.ndarray, q1: numpy.ndarray, t: numpy.ndarray) -> numpy.ndarray:
+    """
+    Spherical linear interpolation along the shortest arc, `t` outside [0, 1]
+    extrapolates along the same great circle
+
+    Args:
+        q0 (numpy.ndarray): (..., 4) quaternions at t = 0
+        q1 (numpy.ndarray): (..., 4) quaternions at t = 1
+        t (numpy.ndarray): (...) interpolation factors
+    """
+    t = numpy.asarray(t, dtype=numpy.float64)[..., numpy.newaxis]
+    dot = numpy.sum(q0 * q1, axis=-1, keepdims=True)
+    # q and -q are the same rotation, take the closest one
+    q1 = numpy.where(dot < 0, -q1, q1)
+    dot = numpy.abs(dot)
+    theta = numpy.arccos(numpy.clip(dot, -1.0, 1.0))
+    sin_theta = numpy.sin(theta)
+    small = sin_theta < _SLERP_EPSILON
+    safe_sin = numpy.where(small, 1.0, sin_theta)
+    w0 = numpy.where(small, 1.0 - t, numpy.sin((1.0 - t) * theta) / safe_sin)
+    w1 = numpy.where(small, t, numpy.sin(t * theta) / safe_sin)
+    return normalize(w0 * q0 + w1 * q1)
+
+
+def multiply(a: numpy.ndarray, b: numpy.ndarray) -> numpy.ndarray:
+    """Hamilton product `a b`, the rotation `b` followed by `a`"""
+    # Rows of the left multiplication matrix of `a`, applied to (bx, by, bz, bw)
+    left = a[..., _PRODUCT_INDEX] * _PRODUCT_SIGN
+    return (left * b[..., numpy.newaxis, :]).sum(axis=-1)
+
+
+def conjugate(q: numpy.ndarray) -> numpy.ndarray:
+    """Inverse rotation of unit quaternions"""
+    return q * numpy.array((-1.0, -1.0, -1.0, 1.0))
+
+
+def to_rotation_vector(q: numpy.ndarray) -> numpy.ndarray:
+    """(..., 3) axis times angle in radians of unit quaternions, angles in [0, pi]"""
+    # q and -q are the same rotation, take the one with the smallest angle
+    q = numpy.where(q[..., 3:] < 0, -q, q)
+    sin_half = _norm(q[..., :3])
+    angle = 2.0 * numpy.arctan2(sin_half, q[..., 3:])
+    small = sin_half < _SLERP_EPSILON
+    # angle / sin(angle / 2) tends to 2 near the identity
+    factor = numpy.where(small, 2.0, angle / numpy.where(small, 1.0, sin_half))
+    return q[..., :3] * factor
+
+
+def from_rotation_vector(v: numpy.ndarray) -> numpy.ndarray:
+    """Unit quaternions of (..., 3) axis times angle in radians rotation vectors"""
+    angle = _norm(v)
+    small = angle < _SLERP_EPSILON
+    # sin(angle / 2) / angle tends to 1 / 2 near the identity
+    factor = numpy.where(
+        small, 0.5, numpy.sin(0.5 * angle) / numpy.where(small, 1.0, angle)
+    )
+    return numpy.concatenate((v * factor, numpy.cos(0.5 * angle)), axis=-1)
+
+
+def _cross(a: numpy.ndarray, b: numpy.ndarray) -> numpy.ndarray:
+    # numpy.cross moves axes around, much slower on small batches
+    return a[..., _NEXT] * b[..., _PREVIOUS] - a[..., _PREVIOUS] * b[..., _NEXT]
+
+
+def rotate(q: numpy.ndarray, v: numpy.ndarray) -> numpy.ndarray:
+    """(..., 3) vectors `v` rotated by unit quaternions `q`"""
+    u = q[..., :3]
+    t = 2.0 * _cross(u, v)
+    return v + q[..., 3:] * t + _cross(u, t)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import ClassVar, FrozenSet
+
+from natnet_client.capture import CaptureSource, iter_capture
+from natnet_client.client import NatNetClient
+from natnet_client.enums import NatMessages
+
+
+@dataclass(frozen=True)
+class ReplayStats:
+    packets: int
+    frames: int
+    elapsed: float
+
+    @property
+    def packets_per_second(self) -> float:
+        return self.packets / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed if self.elapsed else 0.0
+
+
+@dataclass
+class CaptureReplay:
+    """
+    Drives a NatNetClient from a capture file instead of its sockets. Packets go
+    through the same `_process_message` path as live data, so frames are read with
+    `client.mocap()` and every client feature (metrics, history, ...) applies.
+
+    Args:
+        client: (NatNetClient). Client that is not connected to a server
+        path: (str | os.PathLike). Capture file written by `NatNetClient.start_capture`
+        speed: (float | None, optional). Replay speed relative to the recorded timestamps, None replays as fast as possible. Defaults to 1.0
+        sources: (FrozenSet[CaptureSource], optional). Recorded sockets to replay. Defaults to every source
+
+    Example:
+        >>> replay = CaptureReplay(NatNetClient(NatNetParams()), "session.nncap", speed=None)
+        >>> replay.start()
+        >>> for frame in replay.client.mocap(timeout=1):
+        >>>     ...
+    """
+
+    logger: ClassVar[logging.Logger] = logging.getLogger("NatNet-Replay")
+
+    client: NatNetClient
+    path: str | os.PathLike[str]
+    speed: float | None = 1.0
+    sources: FrozenSet[CaptureSource] = frozenset(CaptureSource)
+
+    _thread: threading.Thread | None = field(init=False, default=None)
+    _stop: threading.Event = field(init=False, default_factory=threading.Event)
+    _stats: ReplayStats | None = field(init=False, default=None)
+
+    def __post_init__(self) -> None:
+        if self.speed is not None and self.speed <= 0:
+            raise ValueError("The replay speed must be positive")
+
+    @property
+    def stats(self) -> ReplayStats | None:
+        """Result of the last completed replay"""
+        return self._stats
+
+    def run(self) -> ReplayStats:
+        """Replays the whole capture, blocking until it ends or `stop` is called"""
+        if self.client.running:
+            raise RuntimeError("The client is connected to a server")
+        self._stop.clear()
+        frame_of_data = NatMessages.FRAME_OF_DATA.value
+        packets = frames = 0
+        first_timestamp: int | None = None
+        start = time.perf_counter()
+        for record in iter_capture(self.path):
+            if self._stop.is_set():
+                break
+            if record.source not in self.sources:
+                continue
+            if self.speed is not None:
+                if first_timestamp is None:
+                    first_timestamp = record.timestamp_ns
+                target = (record.timestamp_ns - first_timestamp) / 1e9 / self.speed
+                delay = target - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            self.client._process_message(record.data, time.monotonic_ns())
+            packets += 1
+            if record.message_id == frame_of_data:
+                frames += 1
+        self._stats = ReplayStats(packets, frames, time.perf_counter() - start)
+        self.logger.info(
+            "Replayed %i packets, %.1f frames/s",
+            packets,
+            self._stats.frames_per_second,
+        )
+        return self._stats
+
+    def start(self) -> None:
+        """Replays on a background thread"""
+        if self._thread is not None:
+            raise RuntimeError("The replay is already running")
+        self._thread = threading.Thread(target=self.run, name="NatNet-Replay")
+        self._thread.start()
+
+    def join(self, timeout: float | None = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._thread = None
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.join()
@@ -0,0 +1,224 @@
+"""
+Expected markers of the rigid bodies and their residuals, requires numpy.
+
+`MarkerModel` compiles the marker offsets of every rigid body description once. Per
+frame it places every expected marker with the rigid body poses and matches it to
+the labeled marker of the same label, all rigid bodies in one batched pass.
+"""
+
+from __future__ import annotations
+
+from dataclasses import InitVar, dataclass, field
+from typing import Dict, List, Tuple
+
+try:
+    import numpy
+except ImportError as error:
+    raise ImportError(
+        "Marker residuals require numpy, `pip install new-natnet-client[numpy]`"
+    ) from error
+
+from natnet_client.descriptors import Descriptors, MoCapDescription
+from natnet_client.enums import MarkerFlags
+from natnet_client.labeled_markers import LabeledMarkerArrays
+from natnet_client.quaternions import normalize, rotate
+
+
+@dataclass(frozen=True)
+class MarkerResiduals:
+    """
+    Row `i` is marker `marker_ids[i]` of rigid body `rigid_body_ids[i]`. Markers of
+    rigid bodies that are not tracked have no `expected` position, markers expected
+    without a visible labeled marker are `missing`, unknown values are NaN.
+    Row `j` of `rms` and `missing_count` summarizes rigid body `bodies[j]`.
+    """
+
+    rigid_body_ids: numpy.ndarray
+    marker_ids: numpy.ndarray
+    expected: numpy.ndarray
+    measured: numpy.ndarray
+    residuals: numpy.ndarray
+    missing: numpy.ndarray
+    bodies: numpy.ndarray
+    rms: numpy.ndarray
+    missing_count: numpy.ndarray
+    slices: Dict[int, slice] = field(repr=False)
+
+    def of(self, rigid_body_id: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Views of the residuals and missing flags of one rigid body
+
+        Raises:
+            KeyError. If the rigid body has no markers in the model
+        """
+        span = self.slices[rigid_body_id]
+        return self.residuals[span], self.missing[span]
+
+
+@dataclass
+class MarkerModel:
+    """
+    Marker offsets of every rigid body with markers, each rigid body contiguous.
+    Row `i` is the marker labeled `marker_ids[i]`, its index in the description
+    plus 1, of rigid body `rigid_body_ids[i]`, at `offsets[i]` in the body frame.
+
+    Args:
+        descriptors: (Descriptors). Descriptions of the rigid bodies, compile a new model when they change
+
+    Example:
+        >>> model = MarkerModel(client.descriptors)
+        >>> residuals = model.residuals(client.last_mocap_data)
+        >>> unhealthy = residuals.bodies[residuals.rms > 2e-3]
+    """
+
+    descriptors: InitVar[Descriptors]
+
+    rigid_body_ids: numpy.ndarray = field(init=False)
+    marker_ids: numpy.ndarray = field(init=False)
+    names: Tuple[str, ...] = field(init=False, repr=False)
+    offsets: numpy.ndarray = field(init=False, repr=False)
+    bodies: numpy.ndarray = field(init=False)
+    slices: Dict[int, slice] = field(init=False, repr=False)
+    # Row of the rigid body of every marker, first marker and marker count per body
+    _body_of: numpy.ndarray = field(init=False, repr=False)
+    _starts: numpy.ndarray = field(init=False, repr=False)
+    _counts: numpy.ndarray = field(init=False, repr=False)
+    # `bodies` sorted, and the rows of `bodies` in that order, to match model ids
+    _sorted_bodies: numpy.ndarray = field(init=False, repr=False)
+    _sorted_rows: numpy.ndarray = field(init=False, repr=False)
+    _body_rows: Dict[int, int] = field(init=False, repr=False)
+
+    def __post_init__(self, descriptors: Descriptors) -> None:
+        rigid_body_ids: List[int] = []
+        marker_ids: List[int] = []
+        names: List[str] = []
+        offsets: List[Tuple[float, float, float]] = []
+        bodies: List[int] = []
+        starts: List[int] = []
+        self.slices = {}
+        for description in descriptors.rigid_body_description.values():
+            if not description.markers:
+                continue
+            start = len(marker_ids)
+            for index, marker in enumerate(description.markers):
+                rigid_body_ids.append(description.identifier)
+                marker_ids.append(index + 1)
+                names.append(marker.name)
+                offsets.append((marker.pos.x, marker.pos.y, marker.pos.z))
+            bodies.append(description.identifier)
+            starts.append(start)
+            self.slices[description.identifier] = slice(start, len(marker_ids))
+        self.rigid_body_ids = numpy.array(rigid_body_ids, dtype=numpy.int32)
+        self.marker_ids = numpy.array(marker_ids, dtype=numpy.int32)
+        self.names = tuple(names)
+        self.offsets = numpy.array(offsets, dtype=numpy.float64).reshape(-1, 3)
+        self.bodies = numpy.array(bodies, dtype=numpy.int32)
+        self._starts = numpy.array(starts, dtype=numpy.intp)
+        self._counts = numpy.diff(numpy.append(self._starts, len(marker_ids)))
+        self._body_of = numpy.repeat(numpy.arange(len(bodies)), self._counts)
+        self._sorted_rows = numpy.argsort(self.bodies)
+        self._sorted_bodies = self.bodies[self._sorted_rows]
+        self._body_rows = {identifier: row for row, identifier in enumerate(bodies)}
+
+    def __len__(self) -> int:
+        return len(self.marker_ids)
+
+    def expected(self, frame: MoCapDescription) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        World positions of every marker of the model placed by the rigid body poses of
+        `frame`, and whether their rigid body is tracked. Untracked are NaN.
+        """
+        rows: List[int] = []
+        values: List[Tuple[float, ...]] = []
+        for rigid_body in frame.rigid_body_data.rigid_bodies:
+            row = self._body_rows.get(rigid_body.identifier)
+            if row is None or not rigid_body.tracking:
+                continue
+            rows.append(row)
+            values.append(
+                (
+                    rigid_body.pos.x,
+                    rigid_body.pos.y,
+                    rigid_body.pos.z,
+                    rigid_body.rot.x,
+                    rigid_body.rot.y,
+                    rigid_body.rot.z,
+                    rigid_body.rot.w,
+                )
+            )
+        pos = numpy.full((len(self.bodies), 3), numpy.nan)
+        rot = numpy.zeros((len(self.bodies), 4))
+        rot[:, 3] = 1.0
+        tracked = numpy.zeros(len(self.bodies), dtype=bool)
+        if rows:
+            tracked_rows = numpy.array(rows, dtype=numpy.intp)
+            poses = numpy.array(values)
+            pos[tracked_rows] = poses[:, 0:3]
+            rot[tracked_rows] = normalize(poses[:, 3:7])
+            tracked[tracked_rows] = True
+        body_of = self._body_of
+        return pos[body_of] + rotate(rot[body_of], self.offsets), tracked[body_of]
+
+    def measured(
+        self, frame: MoCapDescription, markers: LabeledMarkerArrays | None = None
+    ) -> numpy.ndarray:
+        """
+        Positions of the labeled markers of `frame` in model rows, NaN for the markers
+        that are not labeled or are occluded. Pass `markers` when they are already
+        decoded for the frame.
+        """
+        if markers is None:
+            markers = LabeledMarkerArrays.from_frame(frame)
+        measured = numpy.full((len(self.marker_ids), 3), numpy.nan)
+        if not len(markers) or not len(self.bodies):
+            return measured
+        # Markers are grouped by model, so each model is looked up once
+        index = numpy.minimum(
+            numpy.searchsorted(self._sorted_bodies, markers.models),
+            len(self._sorted_bodies) - 1,
+        )
+        sizes = numpy.diff(markers.indptr)
+        body = numpy.repeat(self._sorted_rows[index], sizes)
+        labels = markers.marker_ids
+        known = (
+            numpy.repeat(self._sorted_bodies[index] == markers.models, sizes)
+            & ((markers.param & MarkerFlags.OCCLUDED) == 0)
+            & (labels >= 1)
+            & (labels <= self._counts[body])
+        )
+        measured[self._starts[body[known]] + labels[known] - 1] = markers.pos[known]
+        return measured
+
+    def residuals(
+        self, frame: MoCapDescription, markers: LabeledMarkerArrays | None = None
+    ) -> MarkerResiduals:
+        """Distances between the expected and the labeled markers of `frame`"""
+        expected, tracked = self.expected(frame)
+        measured = self.measured(frame, markers)
+        delta = measured - expected
+        residuals = numpy.sqrt((delta * delta).sum(axis=1))
+        missing = tracked & numpy.isnan(measured[:, 0])
+        found = ~numpy.isnan(residuals)
+        squares = numpy.where(found, residuals * residuals, 0.0)
+        if len(self.bodies):
+            sums = numpy.add.reduceat(squares, self._starts)
+            found_count = numpy.add.reduceat(found.astype(numpy.intp), self._starts)
+            missing_count = numpy.add.reduceat(missing.astype(numpy.intp), self._starts)
+        else:
+            sums = found_count = missing_count = numpy.zeros(0, dtype=numpy.intp)
+        rms = numpy.sqrt(
+            numpy.where(found_count > 0, sums, numpy.nan)
+            / numpy.maximum(found_count, 1)
+        )
+        return MarkerResiduals(
+            self.rigid_body_ids,
+            self.marker_ids,
+            expected,
+            measured,
+            residuals,
+            missing,
+            self.bodies,
+            rms,
+            missing_count,
+            self.slices,
+        )
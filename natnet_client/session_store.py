@@ -0,0 +1,726 @@
+"""
+Compact storage of decoded sessions, using only the standard library.
+
+Each frame is split into its layout (counts, identifiers and names) and its values
+(integers, float32 and float64). Layouts are dictionary encoded per block, so the
+identifiers and names of a stable scene are stored once per block. Consecutive frames
+with the same layout form a run whose values are delta encoded along time, integers
+by subtraction and floats by xor of their bits, stored column by column with their
+bytes shuffled into planes and the whole block compressed with zlib or lzma.
+Frames are restored exactly.
+
+Session file:
+    SESSION_MAGIC, then per block a BLOCK_HEADER (codec, compressed length, frames,
+    first and last frame number) followed by the compressed block. Closing the writer
+    appends an index of INDEX_ENTRY (block offset, frames, first and last frame
+    number) and a TRAILER (index offset, blocks, SESSION_END). A session without
+    trailer, e.g. from a crashed writer, is read by scanning its blocks.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import lzma
+import os
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from enum import IntEnum
+from itertools import accumulate
+from operator import xor
+from typing import Any, BinaryIO, ClassVar, Dict, Generator, Iterable, List, Tuple
+
+from natnet_client.bytes_data import Position, Quaternion
+from natnet_client.capture import MappedCapture
+from natnet_client.descriptors import FrameSuffix, MoCapDescription
+from natnet_client.mo_cap_data import (
+    Asset,
+    AssetData,
+    AssetMarker,
+    AssetRigidBody,
+    Channel,
+    Device,
+    DeviceData,
+    ForcePlate,
+    ForcePlateData,
+    FramePrefix,
+    LabeledMarker,
+    LabeledMarkerData,
+    LegacyMarkerSetData,
+    MarkerData,
+    MarkerSetData,
+    RigidBody,
+    RigidBodyData,
+    Skeleton,
+    SkeletonData,
+)
+from natnet_client.parallel import ordered_map
+
+SESSION_MAGIC = b"NNSES\x00\x01\x00"
+SESSION_END = b"NNSESEND"
+BLOCK_HEADER = struct.Struct("<BIIii")
+INDEX_ENTRY = struct.Struct("<QIii")
+TRAILER = struct.Struct("<QI8s")
+
+_MASK = (1 << 64) - 1
+_HALF = 1 << 63
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+# Layout element, value integers, float32 values, float64 values of one frame
+_Flat = Tuple[Tuple[Any, ...], List[int], List[float], List[float]]
+
+
+class SessionCodec(IntEnum):
+    ZLIB = 0
+    LZMA = 1
+
+
+def _flatten(frame: MoCapDescription) -> _Flat:
+    layout: List[Any] = []
+    ints: List[int] = [frame.prefix_data.frame_number]
+    f32: List[float] = []
+    f64: List[float] = []
+
+    def positions(values: Iterable[Position]) -> None:
+        for pos in values:
+            f32.extend((pos.x, pos.y, pos.z))
+
+    def rigid_bodies(values: Tuple[RigidBody, ...]) -> None:
+        layout.append(len(values))
+        for rigid_body in values:
+            layout.append(rigid_body.identifier)
+            pos, rot = rigid_body.pos, rigid_body.rot
+            f32.extend((pos.x, pos.y, pos.z, rot.x, rot.y, rot.z, rot.w))
+            f32.append(rigid_body.err)
+            ints.append(rigid_body.tracking)
+
+    def channels(values: Tuple[Channel, ...]) -> None:
+        layout.append(len(values))
+        for channel in values:
+            layout.append(len(channel.frames))
+            f32.extend(channel.frames)
+
+    marker_sets = frame.marker_set_data.marker_sets
+    layout.append(len(marker_sets))
+    for marker_set in marker_sets:
+        layout += (marker_set.name, len(marker_set.positions))
+        positions(marker_set.positions)
+    layout.append(len(frame.legacy_marker_set_data.positions))
+    positions(frame.legacy_marker_set_data.positions)
+    rigid_bodies(frame.rigid_body_data.rigid_bodies)
+    skeletons = frame.skeleton_data.skeletons
+    layout.append(len(skeletons))
+    for skeleton in skeletons:
+        layout.append(skeleton.identifier)
+        rigid_bodies(skeleton.rigid_bodies)
+    if frame.asset_data is None:
+        layout.append(-1)
+    else:
+        layout.append(len(frame.asset_data.assets))
+        for asset in frame.asset_data.assets:
+            layout += (asset.identifier, len(asset.rigid_bodies))
+            for asset_rigid_body in asset.rigid_bodies:
+                layout.append(asset_rigid_body.identifier)
+                pos, rot = asset_rigid_body.pos, asset_rigid_body.rot
+                f32 += (pos.x, pos.y, pos.z, rot.x, rot.y, rot.z, rot.w)
+                f32.append(asset_rigid_body.err)
+                ints.append(asset_rigid_body.param)
+            layout.append(len(asset.markers))
+            for asset_marker in asset.markers:
+                layout.append(asset_marker.identifier)
+                pos = asset_marker.pos
+                f32 += (pos.x, pos.y, pos.z, asset_marker.size, asset_marker.residual)
+                ints.append(asset_marker.param)
+    labeled_markers = frame.labeled_marker_data.markers
+    layout.append(len(labeled_markers))
+    for labeled_marker in labeled_markers:
+        layout.append(labeled_marker.identifier)
+        pos = labeled_marker.pos
+        f32 += (pos.x, pos.y, pos.z, labeled_marker.size)
+        ints.append(labeled_marker.param)
+        f64.append(labeled_marker.residual)
+    force_plates = frame.force_plate_data.force_plates
+    layout.append(len(force_plates))
+    for force_plate in force_plates:
+        layout.append(force_plate.identifier)
+        channels(force_plate.channels)
+    devices = frame.device_data.devices
+    layout.append(len(devices))
+    for device in devices:
+        layout.append(device.identifier)
+        channels(device.channels)
+    suffix = frame.suffix_data
+    ints += (
+        suffix.time_code,
+        suffix.time_code_sub,
+        suffix.camera_mid_exposure,
+        suffix.stamp_data,
+        suffix.stamp_transmit,
+        suffix.recording | suffix.tracked_models_changed << 1,
+    )
+    f64.append(suffix.timestamp)
+    if suffix.precision_timestamp_sec is None:
+        layout.append(0)
+    else:
+        layout.append(1)
+        ints += (suffix.precision_timestamp_sec, suffix.precision_timestamp_frac_sec)
+    return tuple(layout), ints, f32, f64
+
+
+def _unflatten(
+    layout: Tuple[Any, ...],
+    ints: Tuple[int, ...],
+    f32: Tuple[float, ...],
+    f64: Tuple[float, ...],
+) -> MoCapDescription:
+    next_layout = iter(layout).__next__
+    next_int = iter(ints).__next__
+    next_f32 = iter(f32).__next__
+    next_f64 = iter(f64).__next__
+
+    def position() -> Position:
+        return Position(next_f32(), next_f32(), next_f32())
+
+    def quaternion() -> Quaternion:
+        return Quaternion(next_f32(), next_f32(), next_f32(), next_f32())
+
+    def rigid_bodies() -> Tuple[RigidBody, ...]:
+        return tuple(
+            RigidBody(next_layout(), position(), quaternion(), next_f32(), False)
+            for _ in range(next_layout())
+        )
+
+    def tracking(values: Tuple[RigidBody, ...]) -> None:
+        for rigid_body in values:
+            rigid_body.tracking = bool(next_int())
+
+    def channels() -> Tuple[Channel, ...]:
+        result = []
+        for _ in range(next_layout()):
+            num_frames = next_layout()
+            result.append(
+                Channel(num_frames, tuple(next_f32() for _ in range(num_frames)))
+            )
+        return tuple(result)
+
+    frame_number = next_int()
+    marker_sets = []
+    for _ in range(next_layout()):
+        name, num_markers = next_layout(), next_layout()
+        marker_sets.append(
+            MarkerData(name, num_markers, tuple(position() for _ in range(num_markers)))
+        )
+    legacy_positions = tuple(position() for _ in range(next_layout()))
+    # Rigid body floats precede their tracking flags in each section
+    bodies = rigid_bodies()
+    tracking(bodies)
+    skeletons = []
+    for _ in range(next_layout()):
+        identifier = next_layout()
+        skeleton_bodies = rigid_bodies()
+        tracking(skeleton_bodies)
+        skeletons.append(Skeleton(identifier, len(skeleton_bodies), skeleton_bodies))
+    asset_data = None
+    if (num_assets := next_layout()) >= 0:
+        assets = []
+        for _ in range(num_assets):
+            identifier = next_layout()
+            asset_bodies = tuple(
+                AssetRigidBody(
+                    next_layout(), position(), quaternion(), next_f32(), next_int()
+                )
+                for _ in range(next_layout())
+            )
+            asset_markers = []
+            for _ in range(next_layout()):
+                marker_identifier = next_layout()
+                pos = position()
+                size, residual = next_f32(), next_f32()
+                asset_markers.append(
+                    AssetMarker(marker_identifier, pos, size, next_int(), residual)
+                )
+            assets.append(
+                Asset(
+                    identifier,
+                    len(asset_bodies),
+                    asset_bodies,
+                    len(asset_markers),
+                    tuple(asset_markers),
+                )
+            )
+        asset_data = AssetData(num_assets, tuple(assets))
+    labeled_markers = tuple(
+        LabeledMarker(next_layout(), position(), next_f32(), next_int(), next_f64())
+        for _ in range(next_layout())
+    )
+    force_plates = []
+    for _ in range(next_layout()):
+        identifier = next_layout()
+        force_plate_channels = channels()
+        force_plates.append(
+            ForcePlate(identifier, len(force_plate_channels), force_plate_channels)
+        )
+    devices = []
+    for _ in range(next_layout()):
+        identifier = next_layout()
+        device_channels = channels()
+        devices.append(Device(identifier, len(device_channels), device_channels))
+    time_code, time_code_sub = next_int(), next_int()
+    camera_mid_exposure, stamp_data, stamp_transmit = next_int(), next_int(), next_int()
+    flags = next_int()
+    precision_sec = precision_frac_sec = None
+    if next_layout():
+        precision_sec, precision_frac_sec = next_int(), next_int()
+    return MoCapDescription(
+        FramePrefix(frame_number),
+        MarkerSetData(len(marker_sets), tuple(marker_sets)),
+        LegacyMarkerSetData(len(legacy_positions), legacy_positions),
+        RigidBodyData(len(bodies), bodies),
+        SkeletonData(len(skeletons), tuple(skeletons)),
+        LabeledMarkerData(len(labeled_markers), labeled_markers),
+        ForcePlateData(len(force_plates), tuple(force_plates)),
+        DeviceData(len(devices), tuple(devices)),
+        FrameSuffix(
+            time_code,
+            time_code_sub,
+            next_f64(),
+            camera_mid_exposure,
+            stamp_data,
+            stamp_transmit,
+            bool(flags & 0x01),
+            bool(flags & 0x02),
+            precision_sec,
+            precision_frac_sec,
+        ),
+        asset_data,
+    )
+
+
+def _shuffle(values: array[int]) -> bytes:
+    """Little endian bytes of `values` grouped by significance, high bytes compress well"""
+    if not _LITTLE_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    data = values.tobytes()
+    size = values.itemsize
+    return b"".join(data[plane::size] for plane in range(size))
+
+
+def _unshuffle(data: bytes, typecode: str) -> array[int]:
+    values = array(typecode)
+    size = values.itemsize
+    length = len(data) // size
+    interleaved = bytearray(len(data))
+    for plane in range(size):
+        interleaved[plane::size] = data[plane * length : (plane + 1) * length]
+    values.frombytes(interleaved)
+    if not _LITTLE_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _encode_columns(flat: array[int], width: int) -> bytes:
+    """
+    Deltas along time, transposed to column major. `flat` holds rows of `width`
+    items, signed integers ("q") are subtracted and float bits ("I", "Q") are xored
+    """
+    deltas = array(flat.typecode, flat[:width])
+    if flat.typecode == "q":
+        deltas.extend(
+            ((b - a + _HALF) & _MASK) - _HALF for a, b in zip(flat, flat[width:])
+        )
+    else:
+        deltas.extend(a ^ b for a, b in zip(flat, flat[width:]))
+    columns = array(flat.typecode)
+    for column in range(width):
+        columns += deltas[column::width]
+    return _shuffle(columns)
+
+
+def _decode_columns(data: bytes, typecode: str, count: int) -> array[int]:
+    """Inverse of `_encode_columns`, the values are left column major"""
+    deltas = _unshuffle(data, typecode)
+    values = array(typecode)
+    for start in range(0, len(deltas), count):
+        column = deltas[start : start + count]
+        if typecode == "q":
+            restored = list(accumulate(column))
+            if min(restored) < -_HALF or max(restored) >= _HALF:
+                restored = [((value + _HALF) & _MASK) - _HALF for value in restored]
+            values.extend(restored)
+        else:
+            values.extend(accumulate(column, xor))
+    return values
+
+
+def _rows(values: List[Any], count: int, width: int) -> List[Tuple[Any, ...]]:
+    """Rows of a column major list"""
+    if not width:
+        return [()] * count
+    return list(
+        zip(*(values[start : start + count] for start in range(0, len(values), count)))
+    )
+
+
+def _encode_block(frames: List[MoCapDescription]) -> bytes:
+    """
+    Frames are grouped by layout, so values are delta encoded against the previous
+    frame with the same layout even when layouts alternate, e.g. with force plates
+    """
+    layouts: Dict[Tuple[Any, ...], int] = {}
+    widths: List[Tuple[int, int, int]] = []
+    values: List[Tuple[array[int], List[float], List[float]]] = []
+    sequence: List[int] = []
+    for frame in frames:
+        layout, ints, f32, f64 = _flatten(frame)
+        layout_index = layouts.setdefault(layout, len(layouts))
+        if layout_index == len(values):
+            widths.append((len(ints), len(f32), len(f64)))
+            values.append((array("q"), [], []))
+        group_ints, group_f32, group_f64 = values[layout_index]
+        group_ints.extend(ints)
+        group_f32.extend(f32)
+        group_f64.extend(f64)
+        sequence.append(layout_index)
+    header = json.dumps(
+        {"layouts": list(layouts), "widths": widths, "sequence": sequence},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    chunks = [struct.pack("<I", len(header)), header]
+    for (int_width, f32_width, f64_width), (ints, f32, f64) in zip(widths, values):
+        chunks.append(_encode_columns(ints, int_width))
+        chunks.append(_encode_columns(array("I", array("f", f32).tobytes()), f32_width))
+        chunks.append(_encode_columns(array("Q", array("d", f64).tobytes()), f64_width))
+    return b"".join(chunks)
+
+
+def _decode_block(data: bytes) -> Tuple[MoCapDescription, ...]:
+    (header_length,) = struct.unpack_from("<I", data)
+    offset = 4 + header_length
+    header = json.loads(data[4:offset])
+    sequence: List[int] = header["sequence"]
+    groups = []
+    for layout_index, widths in enumerate(header["widths"]):
+        count = sequence.count(layout_index)
+        streams = []
+        for typecode, real_typecode, width in zip(
+            ("q", "I", "Q"), ("q", "f", "d"), widths
+        ):
+            length = count * width * array(typecode).itemsize
+            columns = _decode_columns(
+                data[offset : (offset := offset + length)], typecode, count
+            )
+            streams.append(
+                _rows(array(real_typecode, columns.tobytes()).tolist(), count, width)
+            )
+        groups.append(iter(zip(*streams)))
+    layouts = [tuple(layout) for layout in header["layouts"]]
+    return tuple(
+        _unflatten(layouts[layout_index], *next(groups[layout_index]))
+        for layout_index in sequence
+    )
+
+
+def _compress(data: bytes, codec: SessionCodec, level: int | None) -> bytes:
+    if codec == SessionCodec.LZMA:
+        return lzma.compress(data, preset=6 if level is None else level)
+    return zlib.compress(data, 6 if level is None else level)
+
+
+def _decompress(data: bytes, codec: SessionCodec) -> bytes:
+    if codec == SessionCodec.LZMA:
+        return lzma.decompress(data)
+    return zlib.decompress(data)
+
+
+@dataclass
+class SessionWriter:
+    """
+    Writes decoded frames to a compressed session file. Frames are buffered and each
+    block is encoded and written by `append` once `block_frames` frames are buffered.
+
+    Args:
+        path: (str | os.PathLike). Session file, created or truncated
+        block_frames: (int, optional). Frames per block, the unit of random access. Defaults to 1024
+        codec: (SessionCodec, optional). Block compression. Defaults to SessionCodec.ZLIB
+        level: (int | None, optional). Compression level or lzma preset, None for the codec default
+
+    Example:
+        >>> with SessionWriter("session.nns") as writer:
+        >>>     for frame in client.mocap():
+        >>>         writer.append(frame)
+    """
+
+    logger: ClassVar[logging.Logger] = logging.getLogger("NatNet-Session")
+
+    path: str | os.PathLike[str]
+    block_frames: int = 1024
+    codec: SessionCodec = SessionCodec.ZLIB
+    level: int | None = None
+
+    _file: BinaryIO | None = field(init=False, default=None)
+    _pending: List[MoCapDescription] = field(init=False, default_factory=list)
+    _index: List[Tuple[int, int, int, int]] = field(init=False, default_factory=list)
+    _frames: int = field(init=False, default=0)
+    _bytes: int = field(init=False, default=0)
+
+    def __post_init__(self) -> None:
+        if self.block_frames <= 0:
+            raise ValueError("A block must hold at least one frame")
+
+    @property
+    def frames(self) -> int:
+        """Frames appended so far"""
+        return self._frames + len(self._pending)
+
+    @property
+    def running(self) -> bool:
+        return self._file is not None
+
+    def start(self) -> None:
+        if self._file is not None:
+            raise RuntimeError("The session writer is already running")
+        self._file = open(self.path, "wb")
+        self._file.write(SESSION_MAGIC)
+        self._bytes = len(SESSION_MAGIC)
+        self._index.clear()
+        self._frames = 0
+
+    def append(self, frame: MoCapDescription) -> None:
+        if self._file is None:
+            raise RuntimeError("The session writer is not running")
+        self._pending.append(frame)
+        if len(self._pending) >= self.block_frames:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the buffered frames as a block, even if it is not full"""
+        if self._file is None:
+            raise RuntimeError("The session writer is not running")
+        if not self._pending:
+            return
+        self._write_block(
+            _compress(_encode_block(self._pending), self.codec, self.level),
+            len(self._pending),
+            self._pending[0].prefix_data.frame_number,
+            self._pending[-1].prefix_data.frame_number,
+        )
+        self._pending.clear()
+
+    def _write_block(self, data: bytes, frames: int, first: int, last: int) -> None:
+        file: BinaryIO = self._file  # type: ignore
+        file.write(BLOCK_HEADER.pack(self.codec, len(data), frames, first, last))
+        file.write(data)
+        self._index.append((self._bytes, frames, first, last))
+        self._bytes += BLOCK_HEADER.size + len(data)
+        self._frames += frames
+
+    def close(self) -> None:
+        """Writes the remaining frames and the block index"""
+        self.flush()
+        file: BinaryIO = self._file  # type: ignore
+        for entry in self._index:
+            file.write(INDEX_ENTRY.pack(*entry))
+        file.write(TRAILER.pack(self._bytes, len(self._index), SESSION_END))
+        file.close()
+        self._file = None
+        self.logger.info(
+            "Session %s closed, %i frames in %i blocks",
+            self.path,
+            self._frames,
+            len(self._index),
+        )
+
+    def __enter__(self) -> SessionWriter:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+@dataclass
+class SessionReader:
+    """
+    Random access to a session file, only the block holding a requested frame is
+    decompressed and the last decoded block is kept.
+
+    Args:
+        path: (str | os.PathLike). Session file written by `SessionWriter`
+    """
+
+    path: str | os.PathLike[str]
+
+    _file: BinaryIO = field(init=False, repr=False)
+    _offsets: List[int] = field(init=False, default_factory=list)
+    # Index of the first frame of each block, plus the total number of frames
+    _starts: List[int] = field(init=False, default_factory=lambda: [0])
+    _first_frame_numbers: List[int] = field(init=False, default_factory=list)
+    _last_frame_numbers: List[int] = field(init=False, default_factory=list)
+    _cached: Tuple[int, Tuple[MoCapDescription, ...]] | None = field(
+        init=False, default=None
+    )
+
+    def __post_init__(self) -> None:
+        self._file = open(self.path, "rb")
+        if self._file.read(len(SESSION_MAGIC)) != SESSION_MAGIC:
+            self._file.close()
+            raise ValueError("Not a NatNet session file")
+        for offset, frames, first, last in self._read_index():
+            self._offsets.append(offset)
+            self._starts.append(self._starts[-1] + frames)
+            self._first_frame_numbers.append(first)
+            self._last_frame_numbers.append(last)
+
+    def _read_index(self) -> List[Tuple[int, int, int, int]]:
+        size = self._file.seek(0, os.SEEK_END)
+        if size >= len(SESSION_MAGIC) + TRAILER.size:
+            self._file.seek(size - TRAILER.size)
+            index_offset, blocks, end = TRAILER.unpack(self._file.read(TRAILER.size))
+            if end == SESSION_END:
+                self._file.seek(index_offset)
+                data = self._file.read(blocks * INDEX_ENTRY.size)
+                return list(INDEX_ENTRY.iter_unpack(data))
+        # No trailer, scan the complete blocks
+        index = []
+        offset = self._file.seek(len(SESSION_MAGIC))
+        while len(header := self._file.read(BLOCK_HEADER.size)) == BLOCK_HEADER.size:
+            _, length, frames, first, last = BLOCK_HEADER.unpack(header)
+            if offset + BLOCK_HEADER.size + length > size:
+                break
+            index.append((offset, frames, first, last))
+            offset = self._file.seek(length, os.SEEK_CUR)
+        return index
+
+    def __len__(self) -> int:
+        return self._starts[-1]
+
+    @property
+    def blocks(self) -> int:
+        return len(self._offsets)
+
+    def block(self, block_index: int) -> Tuple[MoCapDescription, ...]:
+        if self._cached is not None and self._cached[0] == block_index:
+            return self._cached[1]
+        self._file.seek(self._offsets[block_index])
+        codec, length, _, _, _ = BLOCK_HEADER.unpack(self._file.read(BLOCK_HEADER.size))
+        frames = _decode_block(
+            _decompress(self._file.read(length), SessionCodec(codec))
+        )
+        self._cached = (block_index, frames)
+        return frames
+
+    def frame_at(self, index: int) -> MoCapDescription:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Frame index out of range")
+        block_index = bisect.bisect_right(self._starts, index) - 1
+        return self.block(block_index)[index - self._starts[block_index]]
+
+    def index_of_frame(self, frame_number: int) -> int:
+        """
+        Frame numbers are expected to increase, as they do unless Motive's playback loops
+
+        Raises:
+            KeyError. If the frame was not stored
+        """
+        block_index = bisect.bisect_right(self._first_frame_numbers, frame_number) - 1
+        if block_index >= 0 and frame_number <= self._last_frame_numbers[block_index]:
+            for position, frame in enumerate(self.block(block_index)):
+                if frame.prefix_data.frame_number == frame_number:
+                    return self._starts[block_index] + position
+        raise KeyError(frame_number)
+
+    def frame(self, frame_number: int) -> MoCapDescription:
+        """
+        Raises:
+            KeyError. If the frame was not stored
+        """
+        return self.frame_at(self.index_of_frame(frame_number))
+
+    def frames(
+        self, start: int = 0, stop: int | None = None
+    ) -> Generator[MoCapDescription, None, None]:
+        """Frames from index `start` to `stop`, decompressing one block at a time"""
+        for index in range(start, len(self) if stop is None else stop):
+            yield self.frame_at(index)
+
+    def close(self) -> None:
+        self._cached = None
+        self._file.close()
+
+    def __enter__(self) -> SessionReader:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+# Capture and compression opened once per worker process of a parallel compression
+_worker_capture: MappedCapture | None = None
+_worker_codec: Tuple[SessionCodec, int | None] = (SessionCodec.ZLIB, None)
+
+
+def _open_worker_capture(
+    path: str | os.PathLike[str], codec: SessionCodec, level: int | None
+) -> None:
+    global _worker_capture, _worker_codec
+    _worker_capture = MappedCapture(path)
+    _worker_codec = (codec, level)
+
+
+def _compress_chunk(bounds: Tuple[int, int]) -> Tuple[bytes, int, int, int]:
+    capture: MappedCapture = _worker_capture  # type: ignore
+    frames = list(capture.frames(*bounds))
+    return (
+        _compress(_encode_block(frames), *_worker_codec),
+        len(frames),
+        frames[0].prefix_data.frame_number,
+        frames[-1].prefix_data.frame_number,
+    )
+
+
+def compress_capture(
+    capture_path: str | os.PathLike[str],
+    session_path: str | os.PathLike[str],
+    block_frames: int = 1024,
+    codec: SessionCodec = SessionCodec.ZLIB,
+    level: int | None = None,
+    workers: int | None = 1,
+) -> int:
+    """
+    Decodes every frame of a capture file into a session file. With several workers
+    each block is decoded and compressed in its own process and the blocks are
+    written in frame order, the result is the same as with one worker.
+
+    Args:
+        workers: (int | None, optional). Processes, None for one per CPU. Defaults to 1
+
+    Returns:
+        int: Frames written
+    """
+    with MappedCapture(capture_path) as capture, SessionWriter(
+        session_path, block_frames, codec, level
+    ) as writer:
+        if workers == 1:
+            for frame in capture.frames():
+                writer.append(frame)
+        else:
+            bounds = [
+                (start, min(start + block_frames, len(capture)))
+                for start in range(0, len(capture), block_frames)
+            ]
+            for block in ordered_map(
+                _compress_chunk,
+                bounds,
+                workers,
+                _open_worker_capture,
+                (capture_path, codec, level),
+            ):
+                writer._write_block(*block)
+        return writer.frames
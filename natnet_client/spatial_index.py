@@ -0,0 +1,328 @@
+"""
+Uniform grid over the markers of a frame for neighborhood queries, requires numpy.
+
+Points are bucketed into cubic cells and sorted by cell, building the grid is a
+handful of array operations per frame. Queries take many points at once and look at
+the cells around all of them in one batched pass, so the build is amortized over
+every query of the frame.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+try:
+    import numpy
+except ImportError as error:
+    raise ImportError(
+        "The spatial index requires numpy, `pip install new-natnet-client[numpy]`"
+    ) from error
+
+from natnet_client.descriptors import MoCapDescription
+from natnet_client.labeled_markers import LabeledMarkerArrays
+
+# Wider searches fall back to comparing every point, at most that many distances
+# at once
+_MAX_NEAREST_REACH = 2
+_MAX_RADIUS_REACH = 4
+_BRUTE_FORCE_ELEMENTS = 1 << 21
+# Neighbor cells looked up at once by the grid searches
+_CANDIDATE_CELLS = 1 << 20
+# Axes thinner than that fraction of the widest one are flat, e.g. floor markers
+_FLAT_AXIS = 1e-3
+
+
+@dataclass(frozen=True)
+class RadiusMatches:
+    """
+    Points of the index within the radius of every query, in CSR form: matches of
+    query `i` are `indices[indptr[i]:indptr[i + 1]]`, not sorted by distance
+    """
+
+    indptr: numpy.ndarray
+    indices: numpy.ndarray
+    distances: numpy.ndarray
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def of(self, query: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Views of the indices and distances of the matches of one query"""
+        span = slice(int(self.indptr[query]), int(self.indptr[query + 1]))
+        return self.indices[span], self.distances[span]
+
+    @property
+    def counts(self) -> numpy.ndarray:
+        return numpy.diff(self.indptr)
+
+
+@dataclass
+class MarkerIndex:
+    """
+    Args:
+        points: (numpy.ndarray). (n, 3) positions to index
+        cell_size: (float | None, optional). Edge of the cells, about the usual query radius works best. Defaults to the mean spacing of the points
+
+    Example:
+        >>> index = MarkerIndex.from_frame(frame, cell_size=0.02)
+        >>> matches = index.query_radius(index.points[: index.labeled_count], 0.005)
+        >>> nearest, distances = index.query_nearest(unlabeled_positions)
+    """
+
+    points: numpy.ndarray
+    cell_size: float | None = None
+    # Rows below `labeled_count` are labeled markers, in `labeled` order, when
+    # built with `from_frame`, the legacy markers follow
+    labeled_count: int = 0
+    labeled: LabeledMarkerArrays | None = field(default=None, repr=False)
+
+    _origin: numpy.ndarray = field(init=False, repr=False)
+    _dims: numpy.ndarray = field(init=False, repr=False)
+    # Points sorted by cell, `_keys` are the occupied cells and `_starts` their
+    # first sorted point, with the point count appended
+    _order: numpy.ndarray = field(init=False, repr=False)
+    _keys: numpy.ndarray = field(init=False, repr=False)
+    _starts: numpy.ndarray = field(init=False, repr=False)
+    _offsets: Dict[int, numpy.ndarray] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.points = numpy.asarray(self.points, dtype=numpy.float64).reshape(-1, 3)
+        self._offsets = {}
+        if len(self.points):
+            low = self.points.min(axis=0)
+            extent = self.points.max(axis=0) - low
+        else:
+            low = extent = numpy.zeros(3)
+        if self.cell_size is None:
+            self.cell_size = self._mean_spacing(extent, len(self.points))
+        if not self.cell_size > 0:
+            raise ValueError("The cell size must be positive")
+        # Keys are exact cell numbers, they must fit in 63 bits
+        cells = numpy.floor(extent / self.cell_size) + 1
+        while float(numpy.prod(cells)) >= 2**62:
+            self.cell_size *= 2
+            cells = numpy.floor(extent / self.cell_size) + 1
+        self._origin = low
+        self._dims = cells.astype(numpy.int64)
+        keys = self._key(self._cell(self.points))
+        self._order = numpy.argsort(keys, kind="stable")
+        keys = keys[self._order]
+        starts = numpy.flatnonzero(numpy.concatenate(([True], keys[1:] != keys[:-1])))
+        if not len(keys):
+            starts = starts[:0]
+        self._keys = keys[starts]
+        self._starts = numpy.append(starts, len(keys))
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: MoCapDescription,
+        cell_size: float | None = None,
+        labeled: bool = True,
+        legacy: bool = True,
+        markers: LabeledMarkerArrays | None = None,
+    ) -> MarkerIndex:
+        """
+        Index over the labeled markers and the legacy marker set of `frame`. Pass
+        `markers` when the labeled markers are already decoded for the frame.
+        """
+        parts = []
+        labeled_count = 0
+        if labeled:
+            if markers is None:
+                markers = LabeledMarkerArrays.from_frame(frame)
+            parts.append(markers.pos)
+            labeled_count = len(markers)
+        else:
+            markers = None
+        if legacy:
+            parts.append(
+                numpy.array(
+                    [
+                        (position.x, position.y, position.z)
+                        for position in frame.legacy_marker_set_data.positions
+                    ]
+                ).reshape(-1, 3)
+            )
+        points = numpy.concatenate(parts) if parts else numpy.zeros((0, 3))
+        return cls(points, cell_size, labeled_count, markers)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    @staticmethod
+    def _mean_spacing(extent: numpy.ndarray, count: int) -> float:
+        """Spacing of `count` points spread evenly over the axes they span"""
+        widest = float(extent.max())
+        spanned = extent[extent > _FLAT_AXIS * widest]
+        if not widest > 0 or count < 2:
+            # One point, or every point at one place, any cell holds them all
+            return widest or 1.0
+        return (float(numpy.prod(spanned)) / count) ** (1 / len(spanned))
+
+    def _cell(self, points: numpy.ndarray) -> numpy.ndarray:
+        return numpy.floor((points - self._origin) / self.cell_size).astype(numpy.int64)
+
+    def _key(self, cells: numpy.ndarray) -> numpy.ndarray:
+        _, rows, columns = self._dims
+        return (cells[..., 0] * rows + cells[..., 1]) * columns + cells[..., 2]
+
+    def _neighborhood(self, reach: int) -> numpy.ndarray:
+        """(k, 3) cell offsets within `reach` cells on every axis"""
+        offsets = self._offsets.get(reach)
+        if offsets is None:
+            steps = numpy.arange(-reach, reach + 1)
+            offsets = numpy.stack(
+                numpy.meshgrid(steps, steps, steps, indexing="ij"), axis=-1
+            ).reshape(-1, 3)
+            self._offsets[reach] = offsets
+        return offsets
+
+    def _candidates(
+        self, queries: numpy.ndarray, reach: int
+    ) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Every (query, point) pair whose cells are within `reach` cells, grouped by
+        query, with their distances
+        """
+        offsets = self._neighborhood(reach)
+        rows = max(1, _CANDIDATE_CELLS // len(offsets))
+        if len(queries) <= rows:
+            return self._chunk_candidates(queries, offsets)
+        pair_queries, indices, distances = [], [], []
+        for start in range(0, len(queries), rows):
+            chunk = self._chunk_candidates(queries[start : start + rows], offsets)
+            pair_queries.append(chunk[0] + start)
+            indices.append(chunk[1])
+            distances.append(chunk[2])
+        return (
+            numpy.concatenate(pair_queries),
+            numpy.concatenate(indices),
+            numpy.concatenate(distances),
+        )
+
+    def _chunk_candidates(
+        self, queries: numpy.ndarray, offsets: numpy.ndarray
+    ) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        neighbors = self._cell(queries)[:, numpy.newaxis, :] + offsets
+        inside = ((neighbors >= 0) & (neighbors < self._dims)).all(axis=-1)
+        keys = self._key(neighbors)
+        slots = numpy.minimum(
+            numpy.searchsorted(self._keys, keys), len(self._keys) - 1
+        ).ravel()
+        found = inside.ravel() & (self._keys[slots] == keys.ravel())
+        starts = self._starts[slots]
+        counts = numpy.where(found, self._starts[slots + 1] - starts, 0)
+        total = int(counts.sum())
+        # Expand the cell ranges into one row per candidate point
+        first = numpy.cumsum(counts) - counts
+        rows = numpy.repeat(starts - first, counts) + numpy.arange(total)
+        pair_queries = numpy.repeat(
+            numpy.repeat(numpy.arange(len(queries)), keys.shape[1]), counts
+        )
+        indices = self._order[rows]
+        delta = self.points[indices] - queries[pair_queries]
+        return pair_queries, indices, numpy.sqrt((delta * delta).sum(axis=1))
+
+    def _all_within(
+        self, queries: numpy.ndarray, radius: float
+    ) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """Pairs within `radius` comparing every point, for radii of many cells"""
+        pair_queries, indices, distances = [], [], []
+        rows = max(1, _BRUTE_FORCE_ELEMENTS // (3 * len(self.points)))
+        for start in range(0, len(queries), rows):
+            chunk = queries[start : start + rows]
+            delta = self.points[numpy.newaxis, :, :] - chunk[:, numpy.newaxis, :]
+            chunk_distances = numpy.sqrt((delta * delta).sum(axis=-1))
+            query, index = numpy.nonzero(chunk_distances <= radius)
+            pair_queries.append(query + start)
+            indices.append(index)
+            distances.append(chunk_distances[query, index])
+        return (
+            numpy.concatenate(pair_queries),
+            numpy.concatenate(indices),
+            numpy.concatenate(distances),
+        )
+
+    def query_radius(self, queries: numpy.ndarray, radius: float) -> RadiusMatches:
+        """Points within `radius` of every query point of (m, 3) `queries`"""
+        queries = numpy.asarray(queries, dtype=numpy.float64).reshape(-1, 3)
+        if not len(self.points) or not len(queries):
+            empty = numpy.zeros(0, dtype=numpy.intp)
+            return RadiusMatches(
+                numpy.zeros(len(queries) + 1, dtype=numpy.intp),
+                empty,
+                numpy.zeros(0),
+            )
+        reach = radius / self.cell_size
+        if reach > _MAX_RADIUS_REACH:
+            pair_queries, indices, distances = self._all_within(queries, radius)
+        else:
+            pair_queries, indices, distances = self._candidates(
+                queries, max(math.ceil(reach), 1)
+            )
+        keep = distances <= radius
+        counts = numpy.bincount(pair_queries[keep], minlength=len(queries))
+        return RadiusMatches(
+            numpy.concatenate(([0], numpy.cumsum(counts))),
+            indices[keep],
+            distances[keep],
+        )
+
+    def query_nearest(
+        self, queries: numpy.ndarray, max_distance: float = math.inf
+    ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Nearest point of every query point of (m, 3) `queries` and its distance, -1
+        and infinity when no point is within `max_distance`
+        """
+        queries = numpy.asarray(queries, dtype=numpy.float64).reshape(-1, 3)
+        nearest = numpy.full(len(queries), -1, dtype=numpy.intp)
+        best = numpy.full(len(queries), math.inf)
+        if not len(self.points):
+            return nearest, best
+        pending = numpy.arange(len(queries))
+        reach = 1
+        while len(pending) and reach <= _MAX_NEAREST_REACH:
+            pair_queries, indices, distances = self._candidates(queries[pending], reach)
+            closest = numpy.full(len(pending), math.inf)
+            numpy.minimum.at(closest, pair_queries, distances)
+            winners = distances == closest[pair_queries]
+            best[pending] = closest
+            nearest[pending[pair_queries[winners]]] = indices[winners]
+            # Exact once the nearest point is closer than the searched cells reach
+            pending = pending[
+                (closest > reach * self.cell_size)
+                & (reach * self.cell_size < max_distance)
+            ]
+            reach *= 2
+        # Far from every point, compare with all of them through a matrix product
+        squares = (self.points * self.points).sum(axis=1)
+        rows = max(1, _BRUTE_FORCE_ELEMENTS // len(self.points))
+        for start in range(0, len(pending), rows):
+            chunk = pending[start : start + rows]
+            chunk_queries = queries[chunk]
+            # |p - q|² without the |q|² term, which does not change the argmin
+            scores = squares - 2.0 * (chunk_queries @ self.points.T)
+            nearest[chunk] = scores.argmin(axis=1)
+            delta = self.points[nearest[chunk]] - chunk_queries
+            best[chunk] = numpy.sqrt((delta * delta).sum(axis=1))
+        beyond = best > max_distance
+        nearest[beyond] = -1
+        best[beyond] = math.inf
+        return nearest, best
+
+    def pairs(self, radius: float) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        (k, 2) index pairs `i < j` of the indexed points within `radius` of each
+        other, e.g. merged or ghost markers, and their distances
+        """
+        matches = self.query_radius(self.points, radius)
+        first = numpy.repeat(numpy.arange(len(self.points)), matches.counts)
+        keep = first < matches.indices
+        return (
+            numpy.stack((first[keep], matches.indices[keep]), axis=1),
+            matches.distances[keep],
+        )
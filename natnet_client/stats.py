@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import bisect
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Set, Tuple
+
+from natnet_client.enums import FrameFlags
+
+
+def exponential_bounds(start: float, factor: float, count: int) -> Tuple[float, ...]:
+    """Upper bounds start, start * factor, ..., for `count` buckets"""
+    return tuple(start * factor**i for i in range(count))
+
+
+@dataclass
+class Histogram:
+    """
+    Fixed buckets histogram, cheap enough to be updated on every frame.
+    `bounds` are inclusive upper bounds, values above the last bound go to an extra
+    overflow bucket
+    """
+
+    bounds: Tuple[float, ...]
+    counts: List[int] = field(init=False)
+    count: int = field(init=False, default=0)
+    total: float = field(init=False, default=0.0)
+    minimum: float = field(init=False, default=float("inf"))
+    maximum: float = field(init=False, default=float("-inf"))
+
+    def __post_init__(self) -> None:
+        self.counts = [0] * (len(self.bounds) + 1)
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q quantile, `maximum` for the overflow bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        accumulated = 0
+        for bound, bucket_count in zip(self.bounds, self.counts):
+            accumulated += bucket_count
+            if accumulated >= rank:
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def copy(self) -> Histogram:
+        histogram = Histogram(self.bounds)
+        histogram.counts = self.counts.copy()
+        histogram.count = self.count
+        histogram.total = self.total
+        histogram.minimum = self.minimum
+        histogram.maximum = self.maximum
+        return histogram
+
+    def merge(self, other: Histogram) -> None:
+        """Adds the values of `other`, which must have the same bounds"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def clear(self) -> None:
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = float("-inf")
+
+
+# 1 us to ~67 ms, in nanoseconds
+INTER_ARRIVAL_BOUNDS = exponential_bounds(1_000, 2, 17)
+
+
+@dataclass(frozen=True)
+class FrameSequenceStats:
+    received: int
+    missing: int
+    duplicated: int
+    out_of_order: int
+    resets: int
+    last_frame_number: int | None
+    # Smoothed absolute deviation of the inter-arrival time (RFC 3550), in nanoseconds
+    jitter: float
+    inter_arrival: Histogram
+
+
+@dataclass
+class FrameSequenceTracker:
+    """
+    Follows `FramePrefix.frame_number` for missing, duplicated and out of order frames.
+
+    Args:
+        window: (int, optional). Number of recent frame numbers remembered to tell
+            duplicated frames from late ones. A frame number more than the window
+            behind the expected one is considered a restart of the stream (e.g. a
+            looping playback), a jump forward of any length counts as missing
+            frames. Defaults to 64
+    """
+
+    window: int = 64
+
+    _expected: int | None = field(init=False, default=None)
+    _seen: deque[int] = field(init=False)
+    _seen_set: Set[int] = field(init=False, default_factory=set)
+    _pending: Set[int] = field(init=False, default_factory=set)
+    _last_arrival: int | None = field(init=False, default=None)
+    _received: int = field(init=False, default=0)
+    _missing: int = field(init=False, default=0)
+    _duplicated: int = field(init=False, default=0)
+    _out_of_order: int = field(init=False, default=0)
+    _resets: int = field(init=False, default=0)
+    _jitter: float = field(init=False, default=0.0)
+    _last_delta: int | None = field(init=False, default=None)
+    _inter_arrival: Histogram = field(
+        init=False, default_factory=lambda: Histogram(INTER_ARRIVAL_BOUNDS)
+    )
+
+    def __post_init__(self) -> None:
+        self._seen = deque(maxlen=self.window)
+
+    def _remember(self, frame_number: int) -> None:
+        if len(self._seen) == self.window:
+            self._seen_set.discard(self._seen[0])
+        self._seen.append(frame_number)
+        self._seen_set.add(frame_number)
+
+    def _restart(self, frame_number: int) -> None:
+        self._seen.clear()
+        self._seen_set.clear()
+        self._pending.clear()
+        self._expected = frame_number + 1
+
+    def update(self, frame_number: int, arrival_ns: int) -> FrameFlags:
+        """Registers a received frame
+
+        Args:
+            frame_number (int): `FramePrefix.frame_number`
+            arrival_ns (int): Monotonic host time at which the frame was received
+
+        Returns:
+            FrameFlags: Classification of this frame
+        """
+        self._received += 1
+        if self._last_arrival is not None:
+            delta = arrival_ns - self._last_arrival
+            self._inter_arrival.add(delta)
+            if self._last_delta is not None:
+                self._jitter += (abs(delta - self._last_delta) - self._jitter) / 16
+            self._last_delta = delta
+        self._last_arrival = arrival_ns
+
+        flags = FrameFlags.NONE
+        expected = self._expected
+        if expected is None:
+            self._restart(frame_number)
+        elif frame_number == expected:
+            self._expected = frame_number + 1
+        elif expected - frame_number > self.window:
+            # Checked first, numbers seen before a restart are not duplicates
+            self._resets += 1
+            self._restart(frame_number)
+            flags = FrameFlags.RESET
+        elif frame_number > expected:
+            flags = FrameFlags.GAP
+            self._missing += frame_number - expected
+            self._pending.update(
+                range(max(expected, frame_number - self.window), frame_number)
+            )
+            if len(self._pending) > self.window:
+                self._pending = set(
+                    sorted(self._pending)[len(self._pending) - self.window :]
+                )
+            self._expected = frame_number + 1
+        elif frame_number in self._seen_set:
+            self._duplicated += 1
+            return FrameFlags.DUPLICATE
+        elif frame_number in self._pending:
+            self._pending.discard(frame_number)
+            self._missing -= 1
+            self._out_of_order += 1
+            flags = FrameFlags.OUT_OF_ORDER
+        else:
+            self._out_of_order += 1
+            flags = FrameFlags.OUT_OF_ORDER
+        self._remember(frame_number)
+        return flags
+
+    def stats(self) -> FrameSequenceStats:
+        return FrameSequenceStats(
+            self._received,
+            self._missing,
+            self._duplicated,
+            self._out_of_order,
+            self._resets,
+            self._seen[-1] if self._seen else None,
+            self._jitter,
+            self._inter_arrival.copy(),
+        )
+
+    def reset(self) -> None:
+        self._restart(0)
+        self._expected = None
+        self._last_arrival = None
+        self._last_delta = None
+        self._received = 0
+        self._missing = 0
+        self._duplicated = 0
+        self._out_of_order = 0
+        self._resets = 0
+        self._jitter = 0.0
+        self._inter_arrival.clear()
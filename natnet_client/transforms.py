@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Sequence, Tuple
+
+Matrix = Tuple[Tuple[float, float, float], ...]
+
+_AXES = {"x": 0, "y": 1, "z": 2}
+
+
+def _quaternion_multiply(
+    a: Tuple[float, float, float, float], b: Tuple[float, float, float, float]
+) -> Tuple[float, float, float, float]:
+    ax, ay, az, aw = a
+    bx, by, bz, bw = b
+    return (
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz,
+    )
+
+
+def _matrix_to_quaternion(m: Matrix) -> Tuple[float, float, float, float]:
+    trace = m[0][0] + m[1][1] + m[2][2]
+    if trace > 0:
+        s = 2.0 * math.sqrt(trace + 1.0)
+        return (
+            (m[2][1] - m[1][2]) / s,
+            (m[0][2] - m[2][0]) / s,
+            (m[1][0] - m[0][1]) / s,
+            0.25 * s,
+        )
+    if m[0][0] > m[1][1] and m[0][0] > m[2][2]:
+        s = 2.0 * math.sqrt(1.0 + m[0][0] - m[1][1] - m[2][2])
+        return (
+            0.25 * s,
+            (m[0][1] + m[1][0]) / s,
+            (m[0][2] + m[2][0]) / s,
+            (m[2][1] - m[1][2]) / s,
+        )
+    if m[1][1] > m[2][2]:
+        s = 2.0 * math.sqrt(1.0 + m[1][1] - m[0][0] - m[2][2])
+        return (
+            (m[0][1] + m[1][0]) / s,
+            0.25 * s,
+            (m[1][2] + m[2][1]) / s,
+            (m[0][2] - m[2][0]) / s,
+        )
+    s = 2.0 * math.sqrt(1.0 + m[2][2] - m[0][0] - m[1][1])
+    return (
+        (m[0][2] + m[2][0]) / s,
+        (m[1][2] + m[2][1]) / s,
+        0.25 * s,
+        (m[1][0] - m[0][1]) / s,
+    )
+
+
+def _quaternion_to_matrix(q: Tuple[float, float, float, float]) -> Matrix:
+    x, y, z, w = q
+    return (
+        (1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)),
+        (2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)),
+        (2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)),
+    )
+
+
+@dataclass(frozen=True)
+class CoordinateTransform:
+    """
+    Change of coordinate frame and units applied by the unpacker while decoding,
+    see `NatNetClient.set_coordinate_transform`.
+
+    Positions become `scale * R p` and orientations `r q r*`, so both the world axes
+    and the rigid body local axes follow the new convention. Distances (marker sizes,
+    marker residuals, rigid body errors) are multiplied by `scale`.
+
+    Args:
+        rotation: (Tuple[float, float, float, float], optional). Quaternion (x, y, z, w) of R. Defaults to the identity
+        scale: (float, optional). Unit factor. Defaults to 1.0
+
+    Example:
+        >>> transform = CoordinateTransform.y_up_to_z_up()
+        >>> client.set_coordinate_transform(transform.scaled(client.UnitesToMillimeters()))
+    """
+
+    rotation: Tuple[float, float, float, float] = (0.0, 0.0, 0.0, 1.0)
+    scale: float = 1.0
+
+    _matrix: Matrix = field(init=False, repr=False, compare=False)
+    _inverse_rotation: Tuple[float, float, float, float] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        norm = math.sqrt(sum(value * value for value in self.rotation))
+        if norm == 0:
+            raise ValueError("The rotation quaternion can not be zero")
+        rotation = tuple(value / norm for value in self.rotation)
+        object.__setattr__(self, "rotation", rotation)
+        # Axis permutations stay exact despite the round trip through the quaternion
+        matrix = tuple(
+            tuple(
+                round(value) if abs(value - round(value)) < 1e-9 else value
+                for value in row
+            )
+            for row in _quaternion_to_matrix(rotation)  # type: ignore
+        )
+        object.__setattr__(self, "_matrix", matrix)
+        x, y, z, w = rotation
+        object.__setattr__(self, "_inverse_rotation", (-x, -y, -z, w))
+
+    @classmethod
+    def from_matrix(
+        cls, matrix: Sequence[Sequence[float]], scale: float = 1.0
+    ) -> CoordinateTransform:
+        """
+        Raises:
+            ValueError. If `matrix` is not a rotation, e.g. a reflection
+        """
+        m: Matrix = tuple(tuple(float(value) for value in row) for row in matrix)  # type: ignore
+        for i in range(3):
+            for j in range(3):
+                dot = sum(m[i][k] * m[j][k] for k in range(3))
+                if abs(dot - (i == j)) > 1e-6:
+                    raise ValueError("The matrix is not orthonormal")
+        determinant = (
+            m[0][0] * (m[1][1] * m[2][2] - m[1][2] * m[2][1])
+            - m[0][1] * (m[1][0] * m[2][2] - m[1][2] * m[2][0])
+            + m[0][2] * (m[1][0] * m[2][1] - m[1][1] * m[2][0])
+        )
+        if determinant < 0:
+            raise ValueError("The matrix changes handedness, it is not a rotation")
+        return cls(_matrix_to_quaternion(m), scale)
+
+    @classmethod
+    def from_axes(
+        cls, x: str, y: str, z: str, scale: float = 1.0
+    ) -> CoordinateTransform:
+        """
+        Axis permutation, each argument is the Motive axis that becomes that axis,
+        optionally negated, e.g. `from_axes("x", "-z", "y")` for Y up to Z up
+
+        Raises:
+            ValueError. If an axis is not x, y or z, or the axes are not a rotation
+        """
+        rows = []
+        for axis in (x, y, z):
+            name = axis.strip().lower()
+            sign = -1.0 if name.startswith("-") else 1.0
+            column = _AXES.get(name[1:] if name[:1] in "+-" else name)
+            if column is None:
+                raise ValueError(f"Unknown axis {axis!r}, expected x, y or z")
+            row = [0.0, 0.0, 0.0]
+            row[column] = sign
+            rows.append(row)
+        return cls.from_matrix(rows, scale)
+
+    @classmethod
+    def y_up_to_z_up(cls, scale: float = 1.0) -> CoordinateTransform:
+        """Motive's default Y up frame to a right handed Z up frame"""
+        return cls.from_axes("x", "-z", "y", scale)
+
+    def scaled(self, factor: float) -> CoordinateTransform:
+        """Same rotation with the scale multiplied by `factor`, e.g. `UnitesToMillimeters`"""
+        return CoordinateTransform(self.rotation, self.scale * factor)
+
+    def position(self, x: float, y: float, z: float) -> Tuple[float, float, float]:
+        m = self._matrix
+        s = self.scale
+        return (
+            s * (m[0][0] * x + m[0][1] * y + m[0][2] * z),
+            s * (m[1][0] * x + m[1][1] * y + m[1][2] * z),
+            s * (m[2][0] * x + m[2][1] * y + m[2][2] * z),
+        )
+
+    def quaternion(
+        self, x: float, y: float, z: float, w: float
+    ) -> Tuple[float, float, float, float]:
+        return _quaternion_multiply(
+            _quaternion_multiply(self.rotation, (x, y, z, w)), self._inverse_rotation
+        )
+
+    def distance(self, value: float) -> float:
+        return value * self.scale
@@ -1,7 +1,9 @@
+import functools
 import itertools
-from typing import Iterable, Tuple, Dict
+from typing import Callable, Iterable, Tuple, Dict
 from collections import deque
 from struct import unpack
+from time import perf_counter_ns
 import logging
 
 from natnet_client.bytes_data import Position, Quaternion
@@ -41,9 +43,14 @@ from natnet_client.descriptors import (
     Descriptors,
 )
 from natnet_client.enums import NatData
+from natnet_client.transforms import CoordinateTransform
 
 logger = logging.getLogger("NatNet-Unpacker")
 
+# Called after each section of a frame with (frame_number, section, start_ns, end_ns),
+# section names are the MoCapDescription field names
+SectionHook = Callable[[int, str, int, int], None]
+
 
 def batched(iterable: Iterable[int], n: int) -> Iterable[Tuple[int, ...]]:
     """Yield successive n-sized chunks from iterable."""
@@ -61,6 +68,19 @@ class DataUnpackerV3_0:
     def unpack_data_size(cls, data: bytes) -> Tuple[int, int]:
         return 0, 0
 
+    @classmethod
+    def unpack_position(cls, data: bytes) -> Position:
+        return Position.unpack(data)
+
+    @classmethod
+    def unpack_quaternion(cls, data: bytes) -> Quaternion:
+        return Quaternion.unpack(data)
+
+    @classmethod
+    def unpack_distance(cls, data: bytes) -> float:
+        """Float in scene units, e.g. a marker size"""
+        return unpack("<f", data)[0]
+
     @classmethod
     def unpack_frame_prefix_data(cls, data: bytes) -> Tuple[FramePrefix, int]:
         offset = 0
@@ -89,7 +109,7 @@ class DataUnpackerV3_0:
             )
             positions = tuple(
                 map(
-                    lambda position_data: Position.unpack(bytes(position_data)),
+                    lambda position_data: cls.unpack_position(bytes(position_data)),
                     batched(data[offset : (offset := offset + (12 * num_markers))], 12),
                 )
             )
@@ -108,7 +128,7 @@ class DataUnpackerV3_0:
         offset += tmp_offset
         positions = deque(
             map(
-                lambda position_data: Position.unpack(bytes(position_data)),
+                lambda position_data: cls.unpack_position(bytes(position_data)),
                 batched(data[offset : (offset := offset + (12 * num_markers))], 12),
             )
         )
@@ -120,9 +140,9 @@ class DataUnpackerV3_0:
         identifier = int.from_bytes(
             data[offset : (offset := offset + 4)], byteorder="little", signed=True
         )
-        pos = Position.unpack(data[offset : (offset := offset + 12)])
-        rot = Quaternion.unpack(data[offset : (offset := offset + 16)])
-        err = unpack("<f", data[offset : (offset := offset + 4)])[0]
+        pos = cls.unpack_position(data[offset : (offset := offset + 12)])
+        rot = cls.unpack_quaternion(data[offset : (offset := offset + 16)])
+        err = cls.unpack_distance(data[offset : (offset := offset + 4)])
         param: int = unpack("h", data[offset : (offset := offset + 2)])[0]
         tracking = bool(param & 0x01)
         return RigidBody(identifier, pos, rot, err, tracking)
@@ -211,16 +231,36 @@ class DataUnpackerV3_0:
     def decode_marker_id(cls, identifier: int) -> Tuple[int, int]:
         return (identifier >> 16, identifier & 0x0000FFFF)
 
+    @classmethod
+    def encode_marker_id(cls, model_id: int, marker_id: int) -> int:
+        return (model_id << 16) | marker_id
+
+    @classmethod
+    def decode_timecode(cls, time_code: int) -> Tuple[int, int, int, int]:
+        """SMPTE (hours, minutes, seconds, frames) of `FrameSuffix.time_code`"""
+        return (
+            (time_code >> 24) & 0xFF,
+            (time_code >> 16) & 0xFF,
+            (time_code >> 8) & 0xFF,
+            time_code & 0xFF,
+        )
+
+    @classmethod
+    def encode_timecode(
+        cls, hours: int, minutes: int, seconds: int, frames: int
+    ) -> int:
+        return (hours << 24) | (minutes << 16) | (seconds << 8) | frames
+
     @classmethod
     def unpack_labeled_marker(cls, data: bytes) -> LabeledMarker:
         offset = 0
         identifier = int.from_bytes(
             data[offset : (offset := offset + 4)], byteorder="little", signed=True
         )
-        pos = Position.unpack(data[offset : (offset := offset + 12)])
-        size = unpack("<f", data[offset : (offset := offset + 4)])[0]
+        pos = cls.unpack_position(data[offset : (offset := offset + 12)])
+        size = cls.unpack_distance(data[offset : (offset := offset + 4)])
         param = unpack("h", data[offset : (offset := offset + 2)])[0]
-        residual = unpack("<f", data[offset : (offset := offset + 4)])[0] * 1000.0
+        residual = cls.unpack_distance(data[offset : (offset := offset + 4)]) * 1000.0
         return LabeledMarker(identifier, pos, size, param, residual)
 
     @classmethod
@@ -342,37 +382,68 @@ class DataUnpackerV3_0:
         )
 
     @classmethod
-    def unpack_mocap_data(cls, data: bytes) -> MoCapDescription:
+    def unpack_mocap_data(
+        cls, data: bytes, hook: SectionHook | None = None
+    ) -> MoCapDescription:
         offset = 0
         tmp_offset = 0
+        start = perf_counter_ns() if hook is not None else 0
 
         prefix_data, tmp_offset = cls.unpack_frame_prefix_data(data[offset:])
         offset += tmp_offset
+        frame_number = prefix_data.frame_number
+        if hook is not None:
+            hook(frame_number, "prefix_data", start, perf_counter_ns())
+            # The next section starts after the hook, its cost is not decoding time
+            start = perf_counter_ns()
 
         marker_set_data, tmp_offset = cls.unpack_marker_set_data(data[offset:])
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "marker_set_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         legacy_marker_set_data, tmp_offset = cls.unpack_legacy_other_markers(
             data[offset:]
         )
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "legacy_marker_set_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         rigid_body_data, tmp_offset = cls.unpack_rigid_body_data(data[offset:])
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "rigid_body_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         skeleton_data, tmp_offset = cls.unpack_skeleton_data(data[offset:])
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "skeleton_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         labeled_marker_data, tmp_offset = cls.unpack_labeled_marker_data(data[offset:])
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "labeled_marker_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         force_plate_data, tmp_offset = cls.unpack_force_plate_data(data[offset:])
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "force_plate_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         device_data, tmp_offset = cls.unpack_device_data(data[offset:])
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "device_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         suffix_data = cls.unpack_frame_suffix_data(data[offset:])
+        if hook is not None:
+            hook(frame_number, "suffix_data", start, perf_counter_ns())
 
         return MoCapDescription(
             prefix_data,
@@ -420,7 +491,7 @@ class DataUnpackerV3_0:
         parent_id = int.from_bytes(
             data[offset : (offset := offset + 4)], byteorder="little", signed=True
         )
-        pos = Position.unpack(data[offset : (offset := offset + 12)])
+        pos = cls.unpack_position(data[offset : (offset := offset + 12)])
         num_markers = int.from_bytes(
             data[offset : (offset := offset + 4)], byteorder="little", signed=True
         )
@@ -430,7 +501,7 @@ class DataUnpackerV3_0:
         marker_name = ""
         markers: deque[RigidBodyMarker] = deque()
         for _ in range(num_markers):
-            marker_pos = Position.unpack(
+            marker_pos = cls.unpack_position(
                 data[offset_pos : (offset_pos := offset_pos + 12)]
             )
             marker_id = int.from_bytes(
@@ -484,20 +555,22 @@ class DataUnpackerV3_0:
         offset += len(serial_number_bytes) + 1
         serial_number = str(serial_number_bytes, encoding="utf-8")
 
-        f_width: float = unpack("<f", data[offset : (offset := offset + 4)])[0]
-        f_length: float = unpack("<f", data[offset : (offset := offset + 4)])[0]
+        f_width = cls.unpack_distance(data[offset : (offset := offset + 4)])
+        f_length = cls.unpack_distance(data[offset : (offset := offset + 4)])
         dimensions = (f_width, f_length)
 
-        origin = Position.unpack(data[offset : (offset := offset + 12)])
+        origin = cls.unpack_position(data[offset : (offset := offset + 12)])
 
         # Not tested
         calibration_matrix = tuple(
             unpack("<f", data[offset : (offset := offset + 4)])[0]
             for _ in range(12 * 12)
         )
-        corners = tuple(
-            unpack("<f", data[offset : (offset := offset + 4)])[0] for _ in range(4 * 3)
-        )
+        # x, y, z of each of the 4 corners
+        corners: Tuple[float, ...] = ()
+        for _ in range(4):
+            corner = cls.unpack_position(data[offset : (offset := offset + 12)])
+            corners += (corner.x, corner.y, corner.z)
 
         plate_type = int.from_bytes(
             data[offset : (offset := offset + 4)], byteorder="little", signed=True
@@ -581,8 +654,8 @@ class DataUnpackerV3_0:
         name_bytes, _, _ = data[offset:].partition(b"\0")
         offset += len(name_bytes) + 1
         name = str(name_bytes, encoding="utf-8")
-        pos = Position.unpack(data[offset : (offset := offset + 12)])
-        orientation = Quaternion.unpack(data[offset : (offset := offset + 16)])
+        pos = cls.unpack_position(data[offset : (offset := offset + 12)])
+        orientation = cls.unpack_quaternion(data[offset : (offset := offset + 16)])
         return {name: CameraDescription(name, pos, orientation)}, offset
 
     @classmethod
@@ -596,8 +669,8 @@ class DataUnpackerV3_0:
         identifier = int.from_bytes(
             data[offset : (offset := offset + 4)], byteorder="little", signed=True
         )
-        pos = Position.unpack(data[offset : (offset := offset + 12)])
-        size = unpack("<f", data[offset : (offset := offset + 4)])[0]
+        pos = cls.unpack_position(data[offset : (offset := offset + 12)])
+        size = cls.unpack_distance(data[offset : (offset := offset + 4)])
         param = unpack("h", data[offset : (offset := offset + 2)])[0]
         return {
             identifier: MarkerDescription(name, identifier, pos, size, param)
@@ -722,9 +795,9 @@ class DataUnpackerV4_1(DataUnpackerV3_0):
         identifier = int.from_bytes(
             data[offset : (offset := offset + 4)], byteorder="little", signed=True
         )
-        pos = Position.unpack(data[offset : (offset := offset + 12)])
-        rot = Quaternion.unpack(data[offset : (offset := offset + 16)])
-        err = unpack("<f", data[offset : (offset := offset + 4)])[0]
+        pos = cls.unpack_position(data[offset : (offset := offset + 12)])
+        rot = cls.unpack_quaternion(data[offset : (offset := offset + 16)])
+        err = cls.unpack_distance(data[offset : (offset := offset + 4)])
         param = unpack("h", data[offset : (offset := offset + 2)])[0]
         return AssetRigidBody(identifier, pos, rot, err, param)
 
@@ -734,10 +807,10 @@ class DataUnpackerV4_1(DataUnpackerV3_0):
         identifier = int.from_bytes(
             data[offset : (offset := offset + 4)], byteorder="little", signed=True
         )
-        pos = Position.unpack(data[offset : (offset := offset + 12)])
-        size = unpack("<f", data[offset : (offset := offset + 4)])[0]
+        pos = cls.unpack_position(data[offset : (offset := offset + 12)])
+        size = cls.unpack_distance(data[offset : (offset := offset + 4)])
         param = unpack("h", data[offset : (offset := offset + 2)])[0]
-        residual = unpack("<f", data[offset : (offset := offset + 4)])[0]
+        residual = cls.unpack_distance(data[offset : (offset := offset + 4)])
         return AssetMarker(identifier, pos, size, param, residual)
 
     @classmethod
@@ -843,40 +916,74 @@ class DataUnpackerV4_1(DataUnpackerV3_0):
         )
 
     @classmethod
-    def unpack_mocap_data(cls, data: bytes) -> MoCapDescription:
+    def unpack_mocap_data(
+        cls, data: bytes, hook: SectionHook | None = None
+    ) -> MoCapDescription:
         offset = 0
         tmp_offset = 0
+        start = perf_counter_ns() if hook is not None else 0
 
         prefix_data, tmp_offset = cls.unpack_frame_prefix_data(data[offset:])
         offset += tmp_offset
+        frame_number = prefix_data.frame_number
+        if hook is not None:
+            hook(frame_number, "prefix_data", start, perf_counter_ns())
+            # The next section starts after the hook, its cost is not decoding time
+            start = perf_counter_ns()
 
         marker_set_data, tmp_offset = cls.unpack_marker_set_data(data[offset:])
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "marker_set_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         legacy_marker_set_data, tmp_offset = cls.unpack_legacy_other_markers(
             data[offset:]
         )
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "legacy_marker_set_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         rigid_body_data, tmp_offset = cls.unpack_rigid_body_data(data[offset:])
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "rigid_body_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         skeleton_data, tmp_offset = cls.unpack_skeleton_data(data[offset:])
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "skeleton_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         asset_data, tmp_offset = cls.unpack_asset_data(data[offset:])
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "asset_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         labeled_marker_data, tmp_offset = cls.unpack_labeled_marker_data(data[offset:])
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "labeled_marker_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         force_plate_data, tmp_offset = cls.unpack_force_plate_data(data[offset:])
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "force_plate_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         device_data, tmp_offset = cls.unpack_device_data(data[offset:])
         offset += tmp_offset
+        if hook is not None:
+            hook(frame_number, "device_data", start, perf_counter_ns())
+            start = perf_counter_ns()
 
         suffix_data = cls.unpack_frame_suffix_data(data[offset:])
+        if hook is not None:
+            hook(frame_number, "suffix_data", start, perf_counter_ns())
 
         return MoCapDescription(
             prefix_data,
@@ -959,3 +1066,35 @@ class DataUnpackerV4_1(DataUnpackerV3_0):
                 continue
             offset += tmp_offset
         return descriptors
+
+
+def unpacker_for_version(major: int, minor: int) -> type[DataUnpackerV3_0]:
+    """Unpacker for a NatNet bitstream version, 0 is used by servers sending their latest"""
+    if (major == 4 and minor >= 1) or major == 0:
+        return DataUnpackerV4_1
+    return DataUnpackerV3_0
+
+
+@functools.lru_cache(maxsize=None)
+def transformed_unpacker(
+    unpacker: type[DataUnpackerV3_0], transform: CoordinateTransform
+) -> type[DataUnpackerV3_0]:
+    """Subclass of `unpacker` decoding positions, rotations and distances in the frame of `transform`"""
+
+    class TransformedUnpacker(unpacker):  # type: ignore
+        @classmethod
+        def unpack_position(cls, data: bytes) -> Position:
+            return Position(*transform.position(*unpack("<fff", data)))
+
+        @classmethod
+        def unpack_quaternion(cls, data: bytes) -> Quaternion:
+            return Quaternion(*transform.quaternion(*unpack("<ffff", data)))
+
+        @classmethod
+        def unpack_distance(cls, data: bytes) -> float:
+            return transform.distance(unpack("<f", data)[0])
+
+    TransformedUnpacker.__name__ = TransformedUnpacker.__qualname__ = (
+        f"Transformed{unpacker.__name__}"
+    )
+    return TransformedUnpacker